@@ -0,0 +1,326 @@
+# === Indeks Embedding (Pencarian Tetangga Terdekat) ===
+# Deskripsi: Embedding setiap gambar diambil dari keluaran GlobalAveragePooling2D model
+# saat ini (fitur MobileNetV2), dinormalisasi L2, dan disimpan sebagai matriks float16
+# yang hanya ditambah di ujung (append). Pencarian top-k untuk banyak query sekaligus
+# cukup satu perkalian matriks, sehingga puluhan ribu gambar tetap dicari dalam milidetik.
+# Dipakai untuk mencari telapak tangan yang mirip, klasifikasi k-NN opsional, dan (jika
+# diaktifkan) menolak foto yang hampir sama sebelum disimpan ke DATASET.
+#
+# Pemakaian:
+#   python app/embedding_index.py build                 # indeks semua gambar di DATASET
+#   python app/embedding_index.py search foto.jpg -k 5  # gambar paling mirip
+#   python app/embedding_index.py classify foto.jpg     # klasifikasi k-NN
+#   python app/embedding_index.py calibrate             # ambang foto hampir sama
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import MODEL_PATH, input_size, load_input, load_model
+from app.prediction_cache import file_fingerprint
+from app.sample_store import IMAGE_EXTENSIONS, SampleStore, sample_hash
+
+INDEX_DIR = "model/embedding_index"
+# Kemiripan kosinus minimum untuk dianggap foto yang (hampir) sama, selama belum ada
+# ambang hasil kalibrasi (threshold.json). Fitur MobileNetV2 dari telapak tangan yang
+# berbeda sering di atas 0.97, jadi nilai awal dibuat ketat.
+DUPLICATE_THRESHOLD = 0.995
+# Jarak aman di atas kemiripan tertinggi antar gambar yang pasti berbeda saat kalibrasi
+CALIBRATION_MARGIN = 0.005
+
+# Fungsi untuk membuat model embedding: backbone + GlobalAveragePooling2D dari model
+# klasifikasi yang sudah dimuat (lapisan dipakai bersama, tanpa salinan bobot).
+# Artefak siap-inferensi (CompiledModel) sudah memiliki output embedding sendiri.
+def build_embedder(model):
+    if hasattr(model, "embedder"):
+        return model.embedder()
+    import tensorflow as tf
+    return tf.keras.Sequential([model.layers[0], model.layers[1]])
+
+# Fungsi untuk menghitung embedding ternormalisasi L2 dari batch array input model
+def embed(embedder, arrays):
+    vectors = np.asarray(embedder.predict_on_batch(np.stack(arrays)), dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+# Kelas indeks embedding: vectors.f16 (matriks float16 mentah, append-only),
+# meta.jsonl (satu baris per vektor: key, label, path), dan info.json (sidik jari model).
+# Jika model berganti, indeks lama tidak berlaku dan dikosongkan.
+class EmbeddingIndex:
+    def __init__(self, fingerprint, dim, root=INDEX_DIR):
+        self.root = root
+        self.fingerprint = fingerprint
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.vectors_path = os.path.join(root, "vectors.f16")
+        self.meta_path = os.path.join(root, "meta.jsonl")
+        self.threshold_path = os.path.join(root, "threshold.json")
+        os.makedirs(root, exist_ok=True)
+
+        self.info_path = os.path.join(root, "info.json")
+        info = self._read_info()
+        if info != {"fingerprint": fingerprint, "dim": dim}:
+            for path in (self.vectors_path, self.meta_path, self.threshold_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            with open(self.info_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "dim": dim}, f)
+
+        self.meta = []
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.meta.append(json.loads(line))
+                    except ValueError:
+                        break  # Baris terakhir terpotong (crash saat menulis)
+        stored = np.fromfile(self.vectors_path, dtype=np.float16) if os.path.exists(self.vectors_path) else \
+            np.zeros(0, dtype=np.float16)
+        lines = len(self.meta)
+        rows = min(lines, len(stored) // dim)
+        self.meta = self.meta[:rows]
+        # Di memori disimpan float32 agar perkalian matriks memakai BLAS
+        self.chunks = [stored[:rows * dim].reshape(rows, dim).astype(np.float32)]
+        self.matrix = None
+        self.keys = {m["key"]: i for i, m in enumerate(self.meta)}
+        if rows * dim != len(stored) or rows != lines:
+            self._rewrite()
+        try:
+            with open(self.threshold_path, "r", encoding="utf-8") as f:
+                self.threshold = float(json.load(f)["threshold"])
+        except (FileNotFoundError, ValueError, KeyError):
+            self.threshold = DUPLICATE_THRESHOLD
+
+    def __len__(self):
+        return len(self.meta)
+
+    def _read_info(self):
+        try:
+            with open(self.info_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    # Menulis ulang file agar vectors.f16 dan meta.jsonl kembali sejajar setelah crash
+    def _rewrite(self):
+        self._matrix().astype(np.float16).tofile(self.vectors_path)
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            for m in self.meta:
+                f.write(json.dumps(m, ensure_ascii=False) + "\n")
+
+    def _matrix(self):
+        if self.matrix is None:
+            self.matrix = np.concatenate(self.chunks) if len(self.chunks) > 1 else self.chunks[0]
+            self.chunks = [self.matrix]
+        return self.matrix
+
+    # Menambah vektor baru (key yang sudah ada dilewati); hanya data baru yang ditulis ke disk.
+    # Jika folder indeks sudah dibuka ulang untuk model lain, objek ini tidak menulis apa pun.
+    def add(self, keys, labels, paths, vectors):
+        with self.lock:
+            rows = [i for i, key in enumerate(keys) if key not in self.keys]
+            if not rows:
+                return 0
+            if self._read_info() != {"fingerprint": self.fingerprint, "dim": self.dim}:
+                return 0
+            vectors = np.asarray(vectors, dtype=np.float32)[rows]
+            with open(self.vectors_path, "ab") as f:
+                vectors.astype(np.float16).tofile(f)
+            with open(self.meta_path, "a", encoding="utf-8") as f:
+                for i in rows:
+                    m = {"key": keys[i], "label": labels[i], "path": paths[i]}
+                    self.keys[keys[i]] = len(self.meta)
+                    self.meta.append(m)
+                    f.write(json.dumps(m, ensure_ascii=False) + "\n")
+            self.chunks.append(vectors)
+            self.matrix = None
+            return len(rows)
+
+    # Pencarian top-k untuk banyak query sekaligus (vektor ternormalisasi).
+    # Mengembalikan (indeks baris, kemiripan kosinus), masing-masing berbentuk (Q, k)
+    def search(self, queries, k=5):
+        with self.lock:
+            matrix = self._matrix()
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(matrix))
+        if k == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+        sims = queries @ matrix.T
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+
+    # Daftar tetangga terdekat untuk satu query: [(meta, kemiripan), ...]
+    def neighbours(self, query, k=5):
+        rows, sims = self.search(query, k)
+        return [(self.meta[r], float(s)) for r, s in zip(rows[0], sims[0])]
+
+    # Klasifikasi k-NN: suara tetangga dibobot kemiripan. Mengembalikan list (label, skor 0-1)
+    def classify(self, queries, k=5):
+        results = []
+        rows, sims = self.search(queries, k)
+        for row, sim in zip(rows, sims):
+            votes = {}
+            for r, s in zip(row, sim):
+                label = self.meta[r]["label"]
+                votes[label] = votes.get(label, 0.0) + max(float(s), 0.0)
+            if not votes:
+                results.append((None, 0.0))
+                continue
+            label = max(votes, key=votes.get)
+            results.append((label, votes[label] / (sum(votes.values()) or 1.0)))
+        return results
+
+    # Mencari foto yang hampir sama; (meta, kemiripan) atau None
+    def find_duplicate(self, vector, threshold=None):
+        found = self.neighbours(vector, k=1)
+        if found and found[0][1] >= (self.threshold if threshold is None else threshold):
+            return found[0]
+        return None
+
+    # Kalibrasi ambang dari gambar yang pasti berbeda: pasangan berlabel beda tidak mungkin
+    # foto yang sama, jadi ambang = kemiripan tertinggi antar label + CALIBRATION_MARGIN.
+    # Hasil disimpan di threshold.json; mengembalikan ringkasan statistik (dict).
+    def calibrate(self, chunk=1024):
+        with self.lock:
+            matrix = self._matrix()
+        labels = np.array([m["label"] for m in self.meta])
+        if len(set(labels)) < 2:
+            raise ValueError("Kalibrasi butuh gambar terindeks dari minimal dua kelas")
+        cross, same = [], []
+        for start in range(0, len(matrix), chunk):
+            sims = matrix[start:start + chunk] @ matrix.T
+            rows = np.arange(len(sims))
+            sims[rows, start + rows] = -1.0  # Abaikan kemiripan dengan diri sendiri
+            differs = labels[start:start + chunk, None] != labels[None, :]
+            cross.append(np.where(differs, sims, -1.0).max(axis=1))
+            same.append(np.where(differs, -1.0, sims).max(axis=1))
+        cross, same = np.concatenate(cross), np.concatenate(same)
+        threshold = min(0.9999, float(cross.max()) + CALIBRATION_MARGIN)
+        stats = {"threshold": round(threshold, 4), "images": len(matrix),
+                 "max_cross_label": round(float(cross.max()), 4),
+                 "p99_cross_label": round(float(np.percentile(cross, 99)), 4),
+                 "same_label_above": int(np.sum(same >= threshold))}
+        with open(self.threshold_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        self.threshold = threshold
+        return stats
+
+# Fungsi untuk membuka indeks milik file model tertentu (sidik jari isi file model).
+# Dimensi embedding = jumlah input lapisan Dense terakhir.
+def open_index(model, model_path=MODEL_PATH, root=INDEX_DIR):
+    if hasattr(model, "embedding_dim"):
+        dim = model.embedding_dim
+    else:
+        dim = int(model.layers[-1].get_weights()[0].shape[0])
+    return EmbeddingIndex(file_fingerprint(model_path), dim, root)
+
+# Fungsi untuk menyimpan gambar ke DATASET lewat SampleStore dan menambahkannya ke indeks.
+# Foto yang hampir sama dengan gambar terindeks hanya ditolak jika reject_similar=True
+# (opsional, sebaiknya setelah `calibrate`). `array` adalah input model yang sudah
+# di-decode dan `digest` hash isi file (keduanya opsional; jika tidak ada, gambar dibaca
+# seukuran `size` dan di-hash ulang). Mengembalikan (path, status): "baru", "sama" (isi
+# identik sudah ada, path = file lama), atau "mirip" (tidak disimpan, path = gambar yang mirip)
+def save_sample(store, file_path, label, confidence=None, index=None, embedder=None, array=None, size=None,
+                digest=None, reject_similar=False):
+    digest = digest or sample_hash(file_path)
+    if index is None or store.lookup(digest) is not None:
+        path, is_new = store.add(file_path, label, confidence, digest)
+        return path, "baru" if is_new else "sama"
+    vector = embed(embedder, [array if array is not None else load_input(file_path, size)])
+    if reject_similar:
+        duplicate = index.find_duplicate(vector)
+        if duplicate is not None:
+            return duplicate[0]["path"], "mirip"
+    path, is_new = store.add(file_path, label, confidence, digest)
+    index.add([digest], [label.lower()], [path], vector)
+    return path, "baru" if is_new else "sama"
+
+# Fungsi untuk mengindeks semua gambar DATASET/<Kelas> yang belum ada di indeks.
+# File yang path-nya sudah tercatat di meta.jsonl dilewati tanpa dibaca; hash file lain
+# diambil dari indeks SampleStore (jika diberikan) dan baru dihitung untuk file yang
+# tidak dikenal keduanya, sehingga waktu mulai tidak bertambah seiring ukuran dataset.
+# `stop` (threading.Event, opsional) menghentikan pengisian di tengah jalan.
+def build_index(index, embedder, size, dataset_dir="DATASET", batch_size=32, store=None, stop=None):
+    with index.lock:
+        indexed = {os.path.normpath(m["path"]) for m in index.meta}
+    known = store.hashes() if store is not None else {}
+    pending = []
+    for label in sorted(os.listdir(dataset_dir)):
+        folder = os.path.join(dataset_dir, label)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if stop is not None and stop.is_set():
+                return 0
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(folder, name)
+                if os.path.normpath(path) in indexed:
+                    continue
+                key = known.get(os.path.normpath(path)) or sample_hash(path)
+                if key not in index:
+                    pending.append((key, label.lower(), path))
+    added = 0
+    for start in range(0, len(pending), batch_size):
+        if stop is not None and stop.is_set():
+            break  # Dihentikan (mis. model dimuat ulang)
+        batch = pending[start:start + batch_size]
+        vectors = embed(embedder, [load_input(path, size) for _, _, path in batch])
+        added += index.add([b[0] for b in batch], [b[1] for b in batch], [b[2] for b in batch], vectors)
+    return added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indeks embedding untuk pencarian gambar mirip")
+    parser.add_argument("command", choices=["build", "search", "classify", "calibrate"])
+    parser.add_argument("images", nargs="*", help="Gambar query (search/classify)")
+    parser.add_argument("-k", type=int, default=5, help="Jumlah tetangga terdekat")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--dataset-dir", default="DATASET")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    embedder = build_embedder(model)
+    size = input_size(model)
+    index = open_index(model, args.model, args.index_dir)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        added = build_index(index, embedder, size, args.dataset_dir, store=SampleStore(args.dataset_dir))
+        print(f"{added} gambar ditambahkan ({len(index)} total) dalam {time.perf_counter() - start:.1f} detik")
+        sys.exit(0)
+    if args.command == "calibrate":
+        build_index(index, embedder, size, args.dataset_dir, store=SampleStore(args.dataset_dir))
+        stats = index.calibrate()
+        print(f"Kemiripan tertinggi antar kelas berbeda: {stats['max_cross_label']} "
+              f"(p99 {stats['p99_cross_label']}) dari {stats['images']} gambar")
+        print(f"Ambang foto hampir sama: {stats['threshold']} "
+              f"({stats['same_label_above']} gambar sekelas di atas ambang)")
+        sys.exit(0)
+
+    if not args.images:
+        parser.error("butuh minimal satu gambar query")
+    queries = embed(embedder, [load_input(path, size) for path in args.images])
+    start = time.perf_counter()
+    if args.command == "search":
+        rows, sims = index.search(queries, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for path, row, sim in zip(args.images, rows, sims):
+            print(f"{path}:")
+            for r, s in zip(row, sim):
+                print(f"  {s:.4f}  {index.meta[r]['label']:<12} {index.meta[r]['path']}")
+    else:
+        results = index.classify(queries, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for path, (label, score) in zip(args.images, results):
+            print(f"{path}: {str(label).upper()} ({score * 100:.1f}% dari {args.k} tetangga)")
+    print(f"Pencarian {len(args.images)} query di {len(index)} gambar: {elapsed:.2f} ms")
@@ -0,0 +1,83 @@
+# === Penyimpanan Riwayat Prediksi ===
+# Deskripsi: Riwayat prediksi disimpan di SQLite (mode WAL) dengan indeks, menggantikan
+# file teks hasil_prediksi/log_prediksi.txt. Isi file teks lama diimpor satu kali.
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+HISTORY_PATH = "hasil_prediksi/riwayat_prediksi.sqlite"
+LEGACY_LOG_PATH = "hasil_prediksi/log_prediksi.txt"
+
+# Kelas penyimpanan riwayat; aman dipakai dari thread worker dan thread UI
+class HistoryStore:
+    def __init__(self, path=HISTORY_PATH, legacy_log=LEGACY_LOG_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT,
+                file_name TEXT NOT NULL,
+                predicted_class TEXT NOT NULL,
+                confidence REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_predictions_class
+                ON predictions (predicted_class, confidence);
+            CREATE INDEX IF NOT EXISTS idx_predictions_created ON predictions (created_at);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.db.commit()
+        self.import_legacy_log(legacy_log)
+
+    # Impor satu kali isi log teks lama (format: nama_file;kelas;persen%)
+    def import_legacy_log(self, legacy_log):
+        with self.lock:
+            done = self.db.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+            if done or not os.path.exists(legacy_log):
+                return
+            rows = []
+            with open(legacy_log, "r", encoding="utf-8") as f:
+                for line in f:
+                    # rsplit agar nama file yang mengandung ';' tetap terbaca utuh
+                    parts = line.rstrip("\n").rsplit(";", 2)
+                    if len(parts) == 3:
+                        try:
+                            rows.append((parts[0], parts[1], float(parts[2].rstrip("%"))))
+                        except ValueError:
+                            continue
+            with self.db:
+                self.db.executemany("INSERT INTO predictions (file_name, predicted_class, confidence) "
+                                    "VALUES (?, ?, ?)", rows)
+                self.db.execute("INSERT INTO meta VALUES ('legacy_imported', ?)", (str(len(rows)),))
+
+    # Mencatat satu hasil prediksi
+    def log(self, file_name, predicted_class, confidence):
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO predictions (created_at, file_name, predicted_class, confidence) "
+                            "VALUES (?, ?, ?, ?)",
+                            (datetime.now().isoformat(timespec="seconds"), file_name,
+                             predicted_class, float(confidence)))
+
+    # Jumlah seluruh baris riwayat
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    # Mengambil satu halaman riwayat (urut dari yang paling lama)
+    def page(self, page_index, page_size=100):
+        with self.lock:
+            return self.db.execute(
+                "SELECT id, file_name, predicted_class, confidence FROM predictions "
+                "ORDER BY id LIMIT ? OFFSET ?", (page_size, page_index * page_size)).fetchall()
+
+    # Statistik per kelas (jumlah, rata-rata/min/maks kepercayaan) dari indeks kelas
+    def class_stats(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT predicted_class, COUNT(*), AVG(confidence), MIN(confidence), MAX(confidence) "
+                "FROM predictions GROUP BY predicted_class ORDER BY predicted_class").fetchall()
+        return {cls: {"count": n, "avg": avg, "min": lo, "max": hi} for cls, n, avg, lo, hi in rows}
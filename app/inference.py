@@ -0,0 +1,240 @@
+# === Inferensi Model Klasifikasi Gaya Belajar ===
+# Deskripsi: Logika prediksi bersama untuk aplikasi GUI, testing/test_model.py,
+# dan server inferensi. TensorFlow baru diimpor saat model dimuat.
+
+import io
+import os
+import sys
+import threading
+import numpy as np
+from PIL import Image
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.prediction_cache import content_hash, file_fingerprint
+from model.profiles import load_model_info
+from utils import tracing
+
+MODEL_PATH = "model/model_palmistry.h5"
+IMG_SIZE = (224, 224)
+
+# Backend inferensi: model Keras asli atau hasil ekspor TFLite (model/export_tflite.py)
+BACKENDS = {
+    "keras": MODEL_PATH,
+    "tflite-fp16": "model/model_palmistry_fp16.tflite",
+    "tflite-int8": "model/model_palmistry_int8.tflite",
+}
+
+# Artefak siap-inferensi hasil training (model/export_compiled.py) dipakai load_model()
+# selama sidik jarinya cocok dengan file .h5; VAK_COMPILED=0 memaksa memuat .h5
+PREFER_COMPILED = os.environ.get("VAK_COMPILED", "1") != "0"
+
+# Daftar nama kelas yang sesuai urutan output model
+class_names = ['auditori', 'kinestetik', 'visual']
+
+# Fungsi untuk path artefak siap-inferensi (model_palmistry.h5 -> model_palmistry_compiled.tflite)
+def compiled_path(model_path):
+    return os.path.splitext(model_path)[0] + "_compiled.tflite"
+
+# Fungsi untuk memuat model dari file .h5. Jika artefak siap-inferensi ada dan dibuat dari
+# .h5 yang sama, artefak itu yang dimuat (tanpa membangun ulang graf Keras)
+def load_model(path=MODEL_PATH, prefer_compiled=PREFER_COMPILED):
+    if prefer_compiled:
+        compiled = load_compiled(path)
+        if compiled is not None:
+            return compiled
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+# Fungsi untuk memuat artefak siap-inferensi milik model_path; None jika belum ada atau
+# sudah usang (model dilatih ulang setelah artefak dibuat)
+def load_compiled(model_path):
+    path = compiled_path(model_path)
+    info = load_model_info(path)
+    if info is None or not os.path.exists(path) or not os.path.exists(model_path):
+        return None
+    if info.get("fingerprint") != file_fingerprint(model_path):
+        print(f"Artefak {path} tidak cocok dengan {model_path}; memuat model .h5")
+        return None
+    return CompiledModel(path, info)
+
+# Fungsi untuk memilih kelas Interpreter TFLite: ai_edge_litert / tflite_runtime jika
+# terpasang (lebih ringan dan cepat diimpor), jika tidak tf.lite
+def interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+# Pembungkus interpreter TFLite dengan antarmuka predict_on_batch seperti model Keras
+class TFLiteModel:
+    def __init__(self, path, num_threads=None):
+        self.interpreter = interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        # Bentuk input seperti model Keras: (None, tinggi, lebar, kanal)
+        self.input_shape = (None,) + tuple(int(d) for d in self.input["shape"][1:])
+
+    def predict_on_batch(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        if tuple(x.shape) != tuple(self.input["shape"]):
+            self.interpreter.resize_tensor_input(self.input["index"], x.shape)
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+        # Kuantisasi input jika model memakai input int8/uint8
+        if self.input["dtype"] != np.float32:
+            scale, zero_point = self.input["quantization"]
+            info = np.iinfo(self.input["dtype"])
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input["index"], x.astype(self.input["dtype"]))
+        self.interpreter.invoke()
+        y = self.interpreter.get_tensor(self.output["index"])
+        if self.output["dtype"] != np.float32:
+            scale, zero_point = self.output["quantization"]
+            y = (y.astype(np.float32) - zero_point) * scale
+        return y
+
+# Pembungkus artefak siap-inferensi: TFLite float32 dengan dua output (probabilitas dan
+# embedding backbone), sehingga indeks embedding tidak perlu model Keras. Interpreter
+# tidak aman dipakai bersamaan dari beberapa thread, jadi setiap pemanggilan dikunci.
+class CompiledModel:
+    def __init__(self, path, info, num_threads=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.interpreter = interpreter_class()(model_path=path, num_threads=num_threads)
+        self.runner = self.interpreter.get_signature_runner()
+        size = info["input_size"]
+        self.input_shape = (None, size[0], size[1], 3)
+        self.output_shape = (None, info["num_classes"])
+        self.embedding_dim = info["embedding_dim"]
+
+    def run(self, x):
+        with self.lock:
+            return self.runner(inputs=np.asarray(x, dtype=np.float32))
+
+    def predict_on_batch(self, x):
+        return self.run(x)["probs"]
+
+    # Objek dengan predict_on_batch yang mengembalikan embedding (dipakai embedding_index)
+    def embedder(self):
+        return CompiledEmbedder(self)
+
+class CompiledEmbedder:
+    def __init__(self, model):
+        self.model = model
+
+    def predict_on_batch(self, x):
+        return self.model.run(x)["embedding"]
+
+# Fungsi untuk memuat model sesuai nama backend ("keras", "tflite-fp16", "tflite-int8")
+def load_backend(backend="keras"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+    if backend == "keras":
+        return load_model(BACKENDS[backend])
+    return TFLiteModel(BACKENDS[backend])
+
+# Fungsi untuk membaca ukuran input (tinggi, lebar) dari model yang dimuat (Keras atau
+# TFLite), sehingga profil resolusi kecil (mis. 160x160) otomatis dipakai saat prediksi
+def input_size(model):
+    return tuple(int(d) for d in model.input_shape[1:3])
+
+# Fungsi untuk meminta decode JPEG tereduksi (DCT scaling): draft() memilih skala 1/2,
+# 1/4, atau 1/8 terkecil yang hasilnya masih >= ukuran (tinggi, lebar) yang diminta, sehingga
+# foto scanner 1600x1200 cukup di-decode menjadi 400x300. Format selain JPEG tidak berubah.
+# Hanya untuk tampilan: input model selalu dari decode penuh seperti data training.
+def reduce_decode(img, min_size):
+    img.draft("RGB", (min_size[1], min_size[0]))
+    return img
+
+# Fungsi untuk mengubah gambar PIL menjadi array input model (RGB, skala 0-1)
+def to_input(img, target_size=IMG_SIZE):
+    img = img.convert("RGB").resize((target_size[1], target_size[0]), Image.NEAREST)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+# Fungsi untuk membaca gambar (path atau file-like) menjadi array input model.
+# Seperti image.load_img(target_size=(224, 224)) + img_to_array / 255.0: resize nearest
+# dari resolusi penuh, sama dengan decode_image() pada pipeline training
+@tracing.traced("decode_input")
+def load_input(source, target_size=IMG_SIZE):
+    with Image.open(source) as img:
+        return to_input(img, target_size)
+
+# Kelas hasil satu kali baca + decode gambar unggahan: hash isi, info gambar asli (dimensi,
+# mode, format), array input model, dan thumbnail, semuanya dari satu decode penuh (input
+# model harus dari resolusi penuh agar sama dengan data training). Pratinjau besar dibuat
+# saat pertama diminta (decode tereduksi) lalu disimpan untuk tampilan berikutnya.
+class DecodedImage:
+    def __init__(self, path, target_size=IMG_SIZE, thumbnail_size=(200, 200)):
+        self.path = path
+        with open(path, "rb") as f:
+            data = f.read()
+        self.digest = content_hash(data)
+        self.file_size = len(data)
+        with tracing.span("decode_upload"):
+            with Image.open(io.BytesIO(data)) as img:
+                self.width, self.height = img.size
+                self.mode, self.format = img.mode, img.format
+                img.load()
+                self.input = to_input(img, target_size)
+                thumbnail = img.copy()
+        thumbnail.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+        self.thumbnail = thumbnail
+        self.previews = {}
+
+    # Pratinjau yang muat dalam max_size (lebar, tinggi), di-decode tereduksi seperlunya
+    def preview(self, max_size):
+        if max_size not in self.previews:
+            with Image.open(self.path) as img:
+                reduce_decode(img, (max_size[1], max_size[0]))
+                img = img.copy()
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            self.previews[max_size] = img
+        return self.previews[max_size]
+
+# Fungsi untuk memprediksi satu batch array (N, tinggi, lebar, 3); mengembalikan probabilitas
+def predict_batch(model, arrays):
+    tracing.counter("images_predicted", len(arrays))
+    with tracing.span("model_predict", batch_size=len(arrays)):
+        return np.asarray(model.predict_on_batch(np.stack(arrays)))
+
+# Fungsi untuk mengubah probabilitas menjadi (nama kelas, kepercayaan dalam persen)
+def top_class(probs):
+    return class_names[int(np.argmax(probs))], float(np.max(probs)) * 100
+
+# Fungsi prediksi dengan cache (PredictionCache, opsional): probabilitas dicari dulu
+# berdasarkan hash isi gambar; make_input() baru dipanggil jika cache tidak berisi hasilnya
+def predict_cached(model, digest, make_input, cache=None):
+    if cache is not None:
+        probs = cache.get(digest)
+        if probs is not None:
+            tracing.counter("cache_hits")
+            return np.asarray(probs, dtype=np.float32)
+        tracing.counter("cache_misses")
+    probs = predict_batch(model, [make_input()])[0]
+    if cache is not None:
+        cache.put(digest, probs)
+    return probs
+
+# Fungsi prediksi dari isi file gambar (bytes)
+def predict_bytes(model, data, cache=None):
+    digest = content_hash(data) if cache is not None else None
+    return predict_cached(model, digest, lambda: load_input(io.BytesIO(data), input_size(model)), cache)
+
+# Fungsi prediksi dari gambar yang sudah di-decode (DecodedImage)
+def predict_decoded(model, decoded, cache=None):
+    return top_class(predict_cached(model, decoded.digest, lambda: decoded.input, cache))
+
+# Fungsi prediksi satu gambar
+def predict_path(model, img_path, cache=None):
+    if cache is None:
+        return top_class(predict_batch(model, [load_input(img_path, input_size(model))])[0])
+    with open(img_path, "rb") as f:
+        return top_class(predict_bytes(model, f.read(), cache))
@@ -0,0 +1,92 @@
+# === Job Runner Proses Latar ===
+# Deskripsi: Menjalankan preprocessing dan training sebagai proses terpisah tanpa
+# membekukan GUI. Keluaran proses dibaca per baris oleh thread pembaca; baris progres
+# (utils/progress.py) dan baris keluaran biasa dikirim lewat antrean event yang
+# dibaca thread Tk dengan after(). Job dapat dibatalkan kapan saja (training yang
+# dibatalkan dapat dilanjutkan dari checkpoint terakhir).
+
+import os
+import sys
+import queue
+import signal
+import threading
+import subprocess
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import progress
+
+# Kelas satu job: proses Python (interpreter yang sama dengan aplikasi) beserta event-nya.
+# Event di self.events: ("progress", dict), ("output", baris), ("done", kode keluar)
+class Job:
+    def __init__(self, name, script, args=()):
+        self.name = name
+        self.events = queue.Queue()
+        self.cancelled = False
+        self.returncode = None
+        env = dict(os.environ, VAK_PROGRESS="1", PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+        # Grup proses sendiri agar pembatalan ikut menghentikan worker preprocessing
+        group = ({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt"
+                 else {"start_new_session": True})
+        self.process = subprocess.Popen([sys.executable, "-u", script, *args], stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, env=env,
+                                        text=True, encoding="utf-8", errors="replace", bufsize=1, **group)
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            line = line.rstrip("\n")
+            fields = progress.parse(line)
+            if fields is not None:
+                self.events.put(("progress", fields))
+            elif line.strip():
+                self.events.put(("output", line))
+        self.returncode = self.process.wait()
+        self.events.put(("done", self.returncode))
+
+    def running(self):
+        return self.process.poll() is None
+
+    # Membatalkan job: kirim sinyal berhenti ke seluruh grup proses, lalu paksa jika
+    # belum berhenti dalam `timeout` detik (ditunggu di thread terpisah)
+    def cancel(self, timeout=5.0):
+        if not self.running():
+            return
+        self.cancelled = True
+        try:
+            if os.name == "nt":
+                self.process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(self.process.pid, signal.SIGTERM)
+        except (ProcessLookupError, OSError):
+            return
+
+        def force_kill():
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                if os.name == "nt":
+                    self.process.kill()
+                else:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+        threading.Thread(target=force_kill, daemon=True).start()
+
+# Fungsi untuk mengubah event progres menjadi (teks status, persen 0-100 atau None)
+def describe_progress(fields):
+    stage = fields.get("stage")
+    if stage == "preprocess":
+        done, total = fields["done"], fields["total"]
+        return f"Preprocessing: {done}/{total} gambar", 100.0 * done / max(total, 1)
+    if stage in ("train_batch", "epoch"):
+        epoch, epochs = fields["epoch"], fields.get("epochs") or fields["epoch"]
+        if stage == "epoch":
+            metrics = ", ".join(f"{k} {v:.4f}" for k, v in fields.items()
+                                if k not in ("stage", "epoch", "epochs") and isinstance(v, (int, float)))
+            return f"Epoch {epoch}/{epochs} selesai: {metrics}", 100.0 * epoch / max(epochs, 1)
+        steps = fields.get("steps")
+        if steps:
+            return (f"Epoch {epoch}/{epochs}: batch {fields['batch']}/{steps}",
+                    100.0 * ((epoch - 1) + fields["batch"] / steps) / max(epochs, 1))
+        return f"Epoch {epoch}/{epochs}: batch {fields['batch']}", None
+    return str(fields), None
@@ -1,20 +1,130 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, Toplevel, Scrollbar, Text, ttk
-from PIL import Image, ImageTk
-import tensorflow as tf
-import numpy as np
-from tensorflow.keras.preprocessing import image
+from PIL import ImageTk
 import os
-import shutil
+import sys
+import time
+import queue
+import atexit
+import threading
 import subprocess
+import numpy as np
 
-# Load model dan class
-try:
-    model = tf.keras.models.load_model("model/model_palmistry.h5")
-    class_names = ['auditori', 'kinestetik', 'visual']
-except:
-    model = None
-    class_names = ['auditori', 'kinestetik', 'visual']
+# Waktu mulai proses, untuk mengukur waktu sampai jendela tampil dan prediksi pertama
+APP_START = time.perf_counter()
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import BACKENDS, DecodedImage, input_size, load_backend, predict_batch, predict_decoded
+from app.prediction_cache import PredictionCache
+from app.history_store import HistoryStore
+from app.sample_store import SampleStore
+from app.embedding_index import build_embedder, build_index, open_index, save_sample
+from app.job_runner import Job, describe_progress
+from utils import tracing
+
+# Backend inferensi: "keras" (default), "tflite-fp16", atau "tflite-int8"
+MODEL_BACKEND = os.environ.get("VAK_BACKEND", "keras")
+
+# Model dimuat di thread latar setelah jendela tampil (lihat load_model_background)
+model = None
+prediction_cache = None
+# Indeks embedding (hanya backend keras) untuk deteksi foto yang hampir sama
+embedding_index = None
+embedder = None
+# Thread pengisi indeks yang sedang berjalan dan event untuk menghentikannya: (thread, event)
+index_builder = None
+first_prediction_done = False
+model_events = queue.Queue()
+
+# Fungsi (thread latar) untuk memuat model dan pemanasan dengan batch dummy seukuran input model.
+# Tidak menyentuh widget Tk; progres dikirim lewat model_events.
+def load_model_background():
+    try:
+        if MODEL_BACKEND == "keras":
+            model_events.put(("progress", "⏳ Memuat TensorFlow..."))
+            with tracing.span("import_tensorflow"):
+                import tensorflow  # noqa: F401 (diimpor terpisah agar progres terlihat)
+        model_events.put(("progress", "⏳ Memuat model..."))
+        with tracing.span("load_model", backend=MODEL_BACKEND):
+            loaded = load_backend(MODEL_BACKEND)
+        model_events.put(("progress", "⏳ Pemanasan model..."))
+        with tracing.span("warmup"):
+            predict_batch(loaded, [np.zeros(input_size(loaded) + (3,), dtype=np.float32)])
+        open_prediction_cache()
+        open_embedding_index(loaded)
+        model_events.put(("ready", loaded))
+    except Exception as e:
+        model_events.put(("error", e))
+
+# Fungsi untuk membuka cache prediksi (hash gambar + sidik jari model);
+# jika gagal, aplikasi tetap jalan tanpa cache
+def open_prediction_cache():
+    global prediction_cache
+    if prediction_cache is not None:
+        return  # Saat model dimuat ulang, cache lama tetap dipakai (sidik jari model ikut berubah)
+    try:
+        prediction_cache = PredictionCache(BACKENDS[MODEL_BACKEND])
+        atexit.register(lambda: print(f"Statistik cache prediksi: {prediction_cache.stats()}"))
+    except Exception as e:
+        print(f"Cache prediksi tidak tersedia: {e}")
+
+# Fungsi untuk membuka indeks embedding milik model yang baru dimuat (backend keras saja).
+# Gambar DATASET yang belum terindeks ditambahkan di thread latar; jika gagal, gambar
+# tetap disimpan tanpa cek foto yang hampir sama
+def open_embedding_index(loaded):
+    global embedding_index, embedder, index_builder
+    if MODEL_BACKEND != "keras":
+        return
+    # Saat model dimuat ulang, pengisi indeks model lama dihentikan dulu agar tidak menulis
+    # vektor model lama ke file indeks yang dibuka ulang untuk model baru
+    embedding_index = embedder = None
+    if index_builder is not None:
+        thread, stop = index_builder
+        stop.set()
+        thread.join()
+        index_builder = None
+    try:
+        with tracing.span("open_embedding_index"):
+            index_embedder = build_embedder(loaded)
+            index = open_index(loaded, BACKENDS[MODEL_BACKEND])
+        stop, size = threading.Event(), input_size(loaded)
+        thread = threading.Thread(target=lambda: build_index(index, index_embedder, size, store=get_sample_store(),
+                                                             stop=stop), daemon=True)
+        thread.start()
+        index_builder = (thread, stop)
+        embedding_index, embedder = index, index_embedder
+    except Exception as e:
+        embedder = embedding_index = None
+        print(f"Indeks embedding tidak tersedia: {e}")
+
+# Fungsi (thread utama) untuk memantau progres pemuatan model lewat after()
+def check_model_events():
+    global model
+    try:
+        while True:
+            kind, payload = model_events.get_nowait()
+            if kind == "progress":
+                status_label.config(text=payload)
+            elif kind == "ready":
+                model = payload
+                upload_btn.config(state="normal")
+                status_label.config(text="✅ Siap untuk klasifikasi")
+                print(f"⏱️ Model siap dalam {time.perf_counter() - APP_START:.2f} detik")
+                return
+            elif model is not None:
+                status_label.config(text=f"❌ Gagal memuat model baru, model lama tetap dipakai: {payload}")
+                return
+            else:
+                status_label.config(text=f"❌ Model tidak tersedia: {payload}")
+                return
+    except queue.Empty:
+        pass
+    window.after(100, check_model_events)
+
+# Fungsi untuk mencatat waktu sampai jendela pertama kali tampil
+def report_first_window():
+    print(f"⏱️ Jendela tampil dalam {time.perf_counter() - APP_START:.2f} detik")
 
 # Fungsi untuk membuat gradien background
 def create_gradient(parent, width, height, color1, color2):
@@ -28,24 +138,27 @@ def create_gradient(parent, width, height, color1, color2):
         gradient.create_line(0, i, width, i, fill=color)
     return gradient
 
-# Fungsi prediksi gambar
-def predict(img_path):
+# Fungsi prediksi gambar yang sudah di-decode (DecodedImage)
+def predict(decoded):
     if model is None:
         return "Model tidak tersedia", 0.0
     
     try:
-        img = image.load_img(img_path, target_size=(224, 224))
-        img_array = image.img_to_array(img)/255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        prediction = model.predict(img_array)
-        predicted_class = class_names[np.argmax(prediction)]
-        confidence = np.max(prediction) * 100
-        return predicted_class, confidence
+        return predict_decoded(model, decoded, prediction_cache)
     except Exception as e:
         return "Error dalam prediksi", 0.0
 
-# Global variable untuk menyimpan path gambar
+# Global variable untuk menyimpan path gambar dan hasil decode-nya (dipakai ulang oleh
+# pratinjau dan info gambar tanpa membuka file lagi)
 current_image_path = None
+current_decoded = None
+
+# Fungsi untuk mengambil hasil decode gambar saat ini (decode ulang jika belum tersedia)
+def get_current_decoded():
+    global current_decoded
+    if current_decoded is None or current_decoded.path != current_image_path:
+        current_decoded = DecodedImage(current_image_path, input_size(model) if model is not None else (224, 224))
+    return current_decoded
 
 # Fungsi untuk menampilkan gambar dalam ukuran penuh
 def show_full_image():
@@ -56,14 +169,12 @@ def show_full_image():
         image_window.resizable(True, True)
         
         try:
-            img = Image.open(current_image_path)
-            
             screen_width = image_window.winfo_screenwidth()
             screen_height = image_window.winfo_screenheight()
             max_width = min(600, screen_width - 100)
             max_height = min(500, screen_height - 100)
             
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            img = get_current_decoded().preview((max_width, max_height))
             img_tk = ImageTk.PhotoImage(img)
             
             window_width = img.width + 40
@@ -96,96 +207,165 @@ def show_full_image():
     else:
         messagebox.showinfo("Info", "Belum ada gambar yang dipilih!")
 
-# Fungsi upload & klasifikasi
+# Antrean permintaan klasifikasi (thread utama -> worker) dan hasilnya (worker -> thread utama)
+prediction_requests = queue.Queue()
+prediction_results = queue.Queue()
+# Nomor permintaan terbaru; permintaan dengan nomor lebih kecil dianggap basi (dibatalkan)
+latest_request_id = 0
+
+# Fungsi (thread worker) untuk memproses permintaan klasifikasi satu per satu:
+# satu decode tereduksi (thumbnail + input model), prediksi, simpan ke dataset, dan log.
+# Tidak menyentuh widget Tk.
+def prediction_worker():
+    while True:
+        request_id, file_path = prediction_requests.get()
+        if request_id != latest_request_id:
+            continue  # Sudah ada gambar yang lebih baru, lewati
+        try:
+            decoded = DecodedImage(file_path, input_size(model))
+            prediction_results.put(("thumbnail", request_id, decoded))
+
+            with tracing.span("predict"):
+                result, prob = predict(decoded)
+            if request_id != latest_request_id:
+                continue
+
+            # Simpan ke dataset
+            with tracing.span("save_to_dataset"):
+                save_to_dataset(file_path, result, prob, decoded)
+
+            # Log prediksi
+            with tracing.span("log_prediction"):
+                log_prediction(os.path.basename(file_path), result, prob)
+            prediction_results.put(("result", request_id, (result, prob)))
+        except Exception as e:
+            prediction_results.put(("error", request_id, e))
+
+# Fungsi (thread utama) untuk menampilkan hasil dari worker, dipanggil berkala lewat after()
+def check_prediction_results():
+    global current_decoded
+    try:
+        while True:
+            kind, request_id, payload = prediction_results.get_nowait()
+            if request_id != latest_request_id:
+                continue  # Hasil permintaan basi diabaikan
+            if kind == "thumbnail":
+                current_decoded = payload
+                img_tk = ImageTk.PhotoImage(payload.thumbnail)
+                label_img.configure(image=img_tk)
+                label_img.image = img_tk
+                label_img.configure(text="")
+            elif kind == "result":
+                show_prediction(*payload)
+            else:
+                messagebox.showerror("Error", f"Gagal memproses gambar: {str(payload)}")
+                status_label.config(text="❌ Gagal memproses gambar")
+    except queue.Empty:
+        pass
+    window.after(50, check_prediction_results)
+
+# Fungsi untuk menampilkan hasil prediksi di UI
+def show_prediction(result, prob):
+    report_first_prediction()
+
+    icons = {'auditori': '🎧', 'kinestetik': '🤸', 'visual': '👁️'}
+    icon = icons.get(result, '🧠')
+    result_label.config(
+        text=f"{icon} Gaya Belajar: {result.upper()}\nTingkat Kepercayaan: {prob:.1f}%\n\n💡 Klik gambar untuk melihat ukuran penuh",
+        fg="#2E7D32"
+    )
+
+    # Update status
+    status_label.config(text=f"✅ Prediksi selesai: {result.upper()} ({prob:.1f}%)")
+    animate_success()
+
+# Fungsi upload & klasifikasi; pekerjaan berat dikirim ke worker agar UI tetap responsif
 def open_image():
-    global current_image_path
+    global current_image_path, latest_request_id
     file_path = filedialog.askopenfilename(
         title="Pilih Gambar Telapak Tangan",
         filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.gif")]
     )
     if file_path:
-        try:
-            current_image_path = file_path 
-            
-            img = Image.open(file_path)
-            img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-            img_tk = ImageTk.PhotoImage(img)
-            label_img.configure(image=img_tk)
-            label_img.image = img_tk
-            
-            label_img.configure(text="") 
-            
-            file_name = os.path.basename(file_path)
-            status_label.config(text=f"📁 File dimuat: {file_name}")
-            
-            result_label.config(text="🔄 Menganalisis...", fg="#FF6B35")
-            window.update()
-            
-            result, prob = predict(file_path)
-            
-            icons = {'auditori': '🎧', 'kinestetik': '🤸', 'visual': '👁️'}
-            icon = icons.get(result, '🧠')
-            result_label.config(
-                text=f"{icon} Gaya Belajar: {result.upper()}\nTingkat Kepercayaan: {prob:.1f}%\n\n💡 Klik gambar untuk melihat ukuran penuh",
-                fg="#2E7D32"
-            )
-            
-            # Simpan ke dataset
-            save_to_dataset(file_path, result)
-            
-            # Log prediksi
-            log_prediction(os.path.basename(file_path), result, prob)
-            
-            # Update status
-            status_label.config(text=f"✅ Prediksi selesai: {result.upper()} ({prob:.1f}%)")
-            animate_success()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal memproses gambar: {str(e)}")
-            status_label.config(text="❌ Gagal memproses gambar")
-
-def save_to_dataset(file_path, result):
+        current_image_path = file_path
+
+        file_name = os.path.basename(file_path)
+        status_label.config(text=f"📁 File dimuat: {file_name}")
+        result_label.config(text="🔄 Menganalisis...", fg="#FF6B35")
+
+        # Permintaan sebelumnya yang belum selesai otomatis menjadi basi
+        latest_request_id += 1
+        prediction_requests.put((latest_request_id, file_path))
+
+# Fungsi untuk mencatat waktu sampai prediksi pertama selesai
+def report_first_prediction():
+    global first_prediction_done
+    if not first_prediction_done:
+        first_prediction_done = True
+        print(f"⏱️ Prediksi pertama selesai {time.perf_counter() - APP_START:.2f} detik setelah aplikasi dibuka")
+
+# Penyimpanan sampel DATASET berbasis hash isi; dibuka saat pertama kali dibutuhkan
+sample_store = None
+sample_lock = threading.Lock()
+
+def get_sample_store():
+    global sample_store
+    with sample_lock:
+        if sample_store is None:
+            sample_store = SampleStore("DATASET")
+        return sample_store
+
+# Gambar disimpan ke DATASET dan indeks embedding; isi yang identik tidak disalin dua kali
+def save_to_dataset(file_path, result, prob=None, decoded=None):
     try:
-        nama_file = os.path.basename(file_path)
-        tujuan_folder = os.path.join("DATASET", result.capitalize())
-        os.makedirs(tujuan_folder, exist_ok=True)
-        tujuan_file = os.path.join(tujuan_folder, nama_file)
-
-        count = 1
-        while os.path.exists(tujuan_file):
-            nama_file_split = os.path.splitext(nama_file)
-            tujuan_file = os.path.join(tujuan_folder, f"{nama_file_split[0]}_{count}{nama_file_split[1]}")
-            count += 1
-
-        shutil.copy(file_path, tujuan_file)
+        tujuan_file, status = save_sample(get_sample_store(), file_path, result, prob,
+                                          embedding_index, embedder, size=input_size(model),
+                                          array=decoded.input if decoded is not None else None,
+                                          digest=decoded.digest if decoded is not None else None)
+        if status == "sama":
+            print(f"Gambar sudah ada di dataset: {tujuan_file}")
     except Exception as e:
         print(f"Error saving to dataset: {e}")
 
+# Penyimpanan riwayat prediksi (SQLite); dibuka saat pertama kali dibutuhkan
+history_store = None
+history_lock = threading.Lock()
+
+def get_history_store():
+    global history_store
+    with history_lock:
+        if history_store is None:
+            history_store = HistoryStore()
+        return history_store
+
 def log_prediction(nama_file, result, prob):
     try:
-        os.makedirs("hasil_prediksi", exist_ok=True)
-        with open("hasil_prediksi/log_prediksi.txt", "a", encoding='utf-8') as f:
-            f.write(f"{nama_file};{result};{prob:.2f}%\n")
+        get_history_store().log(nama_file, result, prob)
     except Exception as e:
         print(f"Error logging prediction: {e}")
 
-def animate_success():
-    original_color = result_label.cget("fg")
-    for i in range(3):
-        result_label.config(fg="#4CAF50")
-        window.update()
-        window.after(100)
+# Animasi kedip warna hasil tanpa memblokir event loop (dijadwalkan lewat after())
+animation_job = None
+
+def animate_success(step=0, original_color=None):
+    global animation_job
+    if step == 0:
+        if animation_job is not None:
+            window.after_cancel(animation_job)
+        original_color = "#2E7D32"
+    if step >= 6:
         result_label.config(fg=original_color)
-        window.update()
-        window.after(100)
+        animation_job = None
+        return
+    result_label.config(fg="#4CAF50" if step % 2 == 0 else original_color)
+    animation_job = window.after(100, animate_success, step + 1, original_color)
 
 # Untuk menampilkan informasi gambar
 def show_image_info():
     if current_image_path and os.path.exists(current_image_path):
         try:
-            img = Image.open(current_image_path)
-            file_size = os.path.getsize(current_image_path)
-            file_size_mb = file_size / (1024 * 1024)
+            img = get_current_decoded()
+            file_size_mb = img.file_size / (1024 * 1024)
             
             info_text = f"""
 📁 Nama File: {os.path.basename(current_image_path)}
@@ -215,9 +395,28 @@ def lihat_log():
     tk.Label(header_frame, text="📊 Riwayat Prediksi", 
              font=("Segoe UI", 16, "bold"), fg="white", bg="#1976D2").pack(pady=15)
     
+    try:
+        store = get_history_store()
+    except Exception as e:
+        messagebox.showerror("Error", f"Gagal membuka riwayat prediksi: {str(e)}")
+        log_window.destroy()
+        return
+    icons = {'auditori': '🎧', 'kinestetik': '🤸', 'visual': '👁️'}
+
+    # Ringkasan per kelas dari query berindeks (bukan membaca seluruh log)
+    stats = store.class_stats()
+    summary = "   ".join(f"{icons.get(gaya, '🧠')} {gaya.upper()}: {s['count']} (rata-rata {s['avg']:.1f}%)"
+                           for gaya, s in stats.items())
+    tk.Label(log_window, text=summary or "Belum ada data prediksi", font=("Segoe UI", 9),
+             bg="#F5F5F5", fg="#424242").pack(pady=(10, 0))
+
+    # Navigasi halaman
+    nav_frame = tk.Frame(log_window, bg="#F5F5F5")
+    nav_frame.pack(side="bottom", fill="x", padx=20, pady=(0, 15))
+
     # Frame untuk treeview
     tree_frame = tk.Frame(log_window, bg="#F5F5F5")
-    tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
+    tree_frame.pack(fill="both", expand=True, padx=20, pady=(10, 10))
     
     # Treeview untuk menampilkan data dalam tabel
     columns = ("No", "Nama File", "Gaya Belajar", "Kepercayaan")
@@ -242,21 +441,31 @@ def lihat_log():
     tree.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
     
-    # Load data
-    try:
-        with open("hasil_prediksi/log_prediksi.txt", "r", encoding='utf-8') as f:
-            lines = f.readlines()
-            if lines:
-                for i, line in enumerate(lines, 1):
-                    parts = line.strip().split(";")
-                    if len(parts) >= 3:
-                        nama, gaya, persen = parts[0], parts[1], parts[2]
-                        icon = {'auditori': '🎧', 'kinestetik': '🤸', 'visual': '👁️'}.get(gaya, '🧠')
-                        tree.insert("", "end", values=(i, nama, f"{icon} {gaya.upper()}", persen))
-            else:
-                tree.insert("", "end", values=("", "Belum ada data prediksi", "", ""))
-    except FileNotFoundError:
-        tree.insert("", "end", values=("", "File log belum tersedia", "", ""))
+    # Load data per halaman agar jendela tetap cepat walau riwayat sangat banyak
+    page_size = 100
+    total = store.count()
+    page_count = max(1, (total + page_size - 1) // page_size)
+    current_page = {"index": page_count - 1}  # Mulai dari halaman terbaru
+    page_label = tk.Label(nav_frame, bg="#F5F5F5", font=("Segoe UI", 9))
+
+    def show_page(index):
+        current_page["index"] = max(0, min(index, page_count - 1))
+        tree.delete(*tree.get_children())
+        rows = store.page(current_page["index"], page_size)
+        if not rows:
+            tree.insert("", "end", values=("", "Belum ada data prediksi", "", ""))
+        for no, nama, gaya, persen in rows:
+            tree.insert("", "end", values=(no, nama, f"{icons.get(gaya, '🧠')} {gaya.upper()}", f"{persen:.2f}%"))
+        page_label.config(text=f"Halaman {current_page['index'] + 1} / {page_count}  ({total} data)")
+
+    nav_style = {"bg": "#1976D2", "fg": "white", "font": ("Segoe UI", 9, "bold"),
+                 "relief": "flat", "cursor": "hand2", "width": 12}
+    tk.Button(nav_frame, text="⬅️ Sebelumnya", command=lambda: show_page(current_page["index"] - 1),
+              **nav_style).pack(side="left")
+    tk.Button(nav_frame, text="Berikutnya ➡️", command=lambda: show_page(current_page["index"] + 1),
+              **nav_style).pack(side="right")
+    page_label.pack(side="top", pady=5)
+    show_page(current_page["index"])
 
 def buka_dataset():
     try:
@@ -267,21 +476,138 @@ def buka_dataset():
     except:
         messagebox.showinfo("Info", "Folder DATASET akan dibuat saat pertama kali melakukan prediksi")
 
-def jalankan_preprocessing():
-    if messagebox.askyesno("Konfirmasi", "Jalankan preprocessing data?\nProses ini mungkin membutuhkan waktu beberapa menit."):
+# Job latar yang sedang berjalan (preprocessing/training) dan jendela progresnya;
+# hanya satu job pada satu waktu
+current_job = None
+job_window = None
+
+# Fungsi untuk menjalankan skrip sebagai job latar dengan jendela progres (keluaran,
+# progress bar, tombol batal). on_done(kode keluar) dipanggil di thread Tk setelah
+# proses selesai, kecuali jika job dibatalkan.
+def start_job(title, script, on_done):
+    global current_job, job_window
+    if current_job is not None and current_job.running():
+        messagebox.showinfo("Info", f"Masih ada proses berjalan: {current_job.name}")
+        job_window.deiconify()
+        job_window.lift()
+        return
+    try:
+        job = Job(title, script)
+    except Exception as e:
+        messagebox.showerror("Error", f"Gagal menjalankan {title}: {str(e)}")
+        return
+    current_job = job
+
+    if job_window is not None and job_window.winfo_exists():
+        job_window.destroy()
+    job_window = Toplevel(window)
+    job_window.title(f"⚙️ {title}")
+    job_window.geometry("700x450")
+    job_window.configure(bg="white")
+    # Menutup jendela hanya menyembunyikannya; job tetap berjalan
+    job_window.protocol("WM_DELETE_WINDOW", job_window.withdraw)
+
+    job_status = tk.Label(job_window, text=f"⏳ Memulai {title}...", font=("Segoe UI", 10, "bold"),
+                          bg="white", fg="#1976D2", anchor="w")
+    job_status.pack(fill="x", padx=10, pady=(10, 5))
+    bar = ttk.Progressbar(job_window, mode="indeterminate")
+    bar.pack(fill="x", padx=10, pady=5)
+    bar.start(15)
+
+    output_frame = tk.Frame(job_window)
+    output_frame.pack(fill="both", expand=True, padx=10, pady=5)
+    scrollbar = Scrollbar(output_frame)
+    scrollbar.pack(side="right", fill="y")
+    output = Text(output_frame, font=("Consolas", 9), wrap="none", yscrollcommand=scrollbar.set)
+    output.pack(side="left", fill="both", expand=True)
+    scrollbar.config(command=output.yview)
+
+    action_btn = tk.Button(job_window, text="⛔ Batalkan", bg="#F44336", fg="white",
+                           font=("Segoe UI", 10, "bold"), relief="flat", cursor="hand2", width=15,
+                           command=job.cancel)
+    action_btn.pack(pady=10)
+    status_label.config(text=f"⏳ {title} berjalan...")
+
+    def set_status(text):
+        job_status.config(text=text)
+        status_label.config(text=f"⏳ {text}")
+
+    # Membaca event job setiap 100 ms (thread Tk); widget dicek karena jendela bisa dibuat ulang
+    def poll():
         try:
-            subprocess.run(["python", "preprocessing/preprocess.py"])
-            messagebox.showinfo("Berhasil", "Preprocessing selesai!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal menjalankan preprocessing: {str(e)}")
+            while True:
+                kind, payload = job.events.get_nowait()
+                if not job_status.winfo_exists():
+                    continue
+                if kind == "progress":
+                    text, percent = describe_progress(payload)
+                    set_status(text)
+                    if percent is not None:
+                        bar.stop()
+                        bar.config(mode="determinate", value=percent)
+                elif kind == "output":
+                    output.insert("end", payload + "\n")
+                    if int(output.index("end-1c").split(".")[0]) > 1000:
+                        output.delete("1.0", "2.0")
+                    output.see("end")
+                else:
+                    bar.stop()
+                    action_btn.config(text="✅ Tutup", bg="#4CAF50", command=job_window.destroy)
+                    if job.cancelled:
+                        job_status.config(text=f"⛔ {title} dibatalkan")
+                        status_label.config(text=f"⛔ {title} dibatalkan")
+                    else:
+                        bar.config(mode="determinate", value=100 if payload == 0 else bar["value"])
+                        job_status.config(text=f"{'✅' if payload == 0 else '❌'} {title} selesai (kode keluar {payload})")
+                        status_label.config(text="✅ Siap untuk klasifikasi")
+                        on_done(payload)
+                    return
+        except queue.Empty:
+            pass
+        window.after(100, poll)
+    window.after(100, poll)
+
+def jalankan_preprocessing():
+    if messagebox.askyesno("Konfirmasi", "Jalankan preprocessing data?\nProses berjalan di latar belakang; aplikasi tetap bisa dipakai."):
+        def selesai(kode):
+            if kode == 0:
+                messagebox.showinfo("Berhasil", "Preprocessing selesai!")
+            else:
+                messagebox.showerror("Error", f"Gagal menjalankan preprocessing (kode keluar {kode})")
+        start_job("Preprocessing", "preprocessing/preprocess.py", selesai)
 
 def latih_ulang_model():
-    if messagebox.askyesno("Konfirmasi", "Latih ulang model CNN?\nProses ini membutuhkan waktu lama dan resource yang cukup."):
-        try:
-            subprocess.run(["python", "model/train_model.py"])
-            messagebox.showinfo("Berhasil", "Training model selesai!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal melatih model: {str(e)}")
+    pilihan = messagebox.askyesnocancel(
+        "Konfirmasi",
+        "Latih ulang model CNN?\n\n"
+        "Ya = update cepat: fine-tuning model saat ini dengan sampel baru saja\n"
+        "Tidak = training penuh dari awal (membutuhkan waktu lama dan resource yang cukup)\n\n"
+        "Proses berjalan di latar belakang; model baru langsung dipakai setelah selesai.")
+    if pilihan is None:
+        return
+
+    def selesai(kode):
+        if kode == 3:
+            messagebox.showwarning("Update Dibatalkan",
+                                   "Akurasi model baru lebih rendah pada data uji; model lama tetap dipakai.")
+        elif kode != 0:
+            messagebox.showerror("Error", f"Gagal melatih model (kode keluar {kode})")
+        else:
+            reload_model()
+            messagebox.showinfo("Berhasil", "Training model selesai! Model baru sedang dimuat.")
+    if pilihan:
+        start_job("Update Model Inkremental", "model/incremental_update.py", selesai)
+    else:
+        start_job("Training Model", "model/train_model.py", selesai)
+
+# Fungsi untuk memuat ulang model dari file setelah training (di thread latar seperti saat start).
+# Model lama tetap melayani prediksi sampai model baru selesai dimuat dan dipanaskan.
+def reload_model():
+    if model is None:
+        upload_btn.config(state="disabled")
+    status_label.config(text="⏳ Memuat model baru...")
+    threading.Thread(target=load_model_background, daemon=True).start()
+    window.after(100, check_model_events)
 
 def show_about():
     about_window = Toplevel(window)
@@ -405,7 +731,8 @@ tk.Label(upload_frame, text="📤 Upload & Analisis",
 
 upload_btn = tk.Button(upload_frame, text="🖼️ Pilih Gambar Telapak Tangan", 
                       bg="#2196F3", fg="white", font=("Segoe UI", 11, "bold"),
-                      relief="flat", cursor="hand2", command=open_image)
+                      relief="flat", cursor="hand2", command=open_image,
+                      state="disabled")  # Aktif setelah model selesai dimuat
 upload_btn.pack(pady=(5, 15))
 
 def on_enter(e):
@@ -477,7 +804,7 @@ status_bar = tk.Frame(main_container, bg="#ECEFF1", height=35)  # Height ditamba
 status_bar.pack(fill="x", side="bottom")
 status_bar.pack_propagate(False)
 
-status_label = tk.Label(status_bar, text="✅ Siap untuk klasifikasi", 
+status_label = tk.Label(status_bar, text="⏳ Memuat model...", 
                        font=("Segoe UI", 9), bg="#ECEFF1", fg="#546E7A")
 status_label.pack(side="left", padx=15, pady=8)
 
@@ -488,5 +815,12 @@ x = (window.winfo_screenwidth() // 2) - (window.winfo_width() // 2)
 y = (window.winfo_screenheight() // 2) - (window.winfo_height() // 2)
 window.geometry(f"+{x}+{y}")
 
+# Muat model di latar belakang agar jendela langsung tampil
+threading.Thread(target=load_model_background, daemon=True).start()
+window.after(100, check_model_events)
+threading.Thread(target=prediction_worker, daemon=True).start()
+window.after(50, check_prediction_results)
+window.after_idle(report_first_window)
+
 # Start application
 window.mainloop()
\ No newline at end of file
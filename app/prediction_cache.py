@@ -0,0 +1,134 @@
+# === Cache Hasil Prediksi ===
+# Deskripsi: Cache LRU di memori yang juga disimpan ke disk (SQLite). Kunci cache adalah
+# hash isi gambar + sidik jari (fingerprint) file model, sehingga cache otomatis tidak
+# berlaku lagi ketika model_palmistry.h5 dilatih ulang. Satu file cache dipakai bersama
+# oleh beberapa model (GUI Keras, backend TFLite, model kandidat di evaluate.py); entri
+# model lain tidak dihapus, file dibatasi jumlah baris dengan membuang entri yang paling
+# lama tidak dipakai.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_PATH = "hasil_prediksi/prediction_cache.sqlite"
+# Jumlah baris maksimum di disk (semua model); dipangkas setiap PRUNE_EVERY penulisan
+MAX_ROWS = 200000
+PRUNE_EVERY = 256
+
+# Fungsi untuk menghitung hash SHA-256 dari isi gambar (bytes)
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+# Fungsi untuk menghitung sidik jari file model (hash isi file)
+def file_fingerprint(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+# Kelas cache prediksi; aman dipakai dari beberapa thread
+class PredictionCache:
+    def __init__(self, model_path, path=CACHE_PATH, capacity=4096, max_rows=MAX_ROWS):
+        self.model_path = model_path
+        self.capacity = capacity
+        self.max_rows = max_rows
+        self.writes = 0
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._stat = None
+        self._fingerprint = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS predictions (
+            fingerprint TEXT NOT NULL, image_hash TEXT NOT NULL, probs TEXT NOT NULL,
+            PRIMARY KEY (fingerprint, image_hash))""")
+        # File cache lama belum punya kolom waktu pakai terakhir
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(predictions)")]
+        if "used_at" not in columns:
+            self.db.execute("ALTER TABLE predictions ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS predictions_used_at ON predictions (used_at)")
+        self.db.commit()
+        self.prune()
+
+    # Sidik jari model; file model hanya di-hash ulang jika ukuran/mtime berubah.
+    # Saat model berganti, cache memori dikosongkan; entri di disk dibiarkan (dipangkas LRU).
+    def fingerprint(self):
+        stat = os.stat(self.model_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if key != self._stat:
+            fingerprint = file_fingerprint(self.model_path)
+            with self.lock:
+                if fingerprint != self._fingerprint:
+                    self.memory.clear()
+                self._stat, self._fingerprint = key, fingerprint
+        return self._fingerprint
+
+    # Mengambil probabilitas dari cache (memori dulu, lalu disk); None jika tidak ada
+    def get(self, image_hash):
+        key = (self.fingerprint(), image_hash)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+            row = self.db.execute("SELECT probs FROM predictions WHERE fingerprint = ? AND image_hash = ?",
+                                  key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.db.execute("UPDATE predictions SET used_at = ? WHERE fingerprint = ? AND image_hash = ?",
+                            (time.time(),) + key)
+            self.db.commit()
+            probs = json.loads(row[0])
+            self._remember(key, probs)
+            return probs
+
+    # Menyimpan probabilitas hasil prediksi ke memori dan disk
+    def put(self, image_hash, probs):
+        key = (self.fingerprint(), image_hash)
+        probs = [float(p) for p in probs]
+        with self.lock:
+            self._remember(key, probs)
+            self.db.execute("INSERT OR REPLACE INTO predictions (fingerprint, image_hash, probs, used_at) "
+                            "VALUES (?, ?, ?, ?)", key + (json.dumps(probs), time.time()))
+            self.db.commit()
+            self.writes += 1
+        if self.writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    # Membuang entri disk yang paling lama tidak dipakai jika melebihi max_rows
+    def prune(self):
+        with self.lock:
+            excess = self.db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] - self.max_rows
+            if excess > 0:
+                self.db.execute("DELETE FROM predictions WHERE rowid IN "
+                                "(SELECT rowid FROM predictions ORDER BY used_at LIMIT ?)", (excess,))
+                self.db.commit()
+
+    def _remember(self, key, probs):
+        self.memory[key] = probs
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    # Statistik hit/miss cache
+    def stats(self):
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,144 @@
+# === Penyimpanan Sampel Dataset Berbasis Hash Isi ===
+# Deskripsi: Gambar yang diprediksi disimpan ke DATASET/<Kelas>/<hash><ext>. Indeks SQLite
+# (DATASET/.sample_index.sqlite) memetakan hash isi -> file, sehingga duplikat terdeteksi
+# dengan satu lookup dan gambar yang sama tidak disalin dua kali. Salinan memakai reflink
+# (copy-on-write) jika didukung sistem file, jika tidak disalin biasa. Hardlink hanya
+# dipakai untuk file yang sudah berada di dalam DATASET; file unggahan/scanner dari luar
+# bisa ditimpa di tempat oleh pemiliknya, dan hardlink akan ikut mengubah dataset.
+
+import os
+import shutil
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+DATASET_DIR = "DATASET"
+INDEX_NAME = ".sample_index.sqlite"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif")
+
+try:
+    import fcntl
+    FICLONE = 0x40049409  # ioctl reflink Linux (btrfs, xfs, ...)
+except ImportError:
+    fcntl = None
+
+# Fungsi untuk menghitung hash SHA-256 isi file gambar
+def sample_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# Fungsi untuk menyalin file dengan cara termurah: reflink, hardlink (jika diizinkan),
+# lalu salin biasa. Mengembalikan metode yang dipakai.
+def link_or_copy(src, dst, allow_hardlink=True):
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return "reflink"
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+# Kelas penyimpanan sampel; aman dipakai dari thread worker
+class SampleStore:
+    def __init__(self, root=DATASET_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, INDEX_NAME), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS samples (
+                hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                label TEXT NOT NULL,
+                original_name TEXT,
+                confidence REAL,
+                created_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_samples_label ON samples (label);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.db.commit()
+        self.index_existing()
+
+    # Mengindeks satu kali gambar yang sudah ada di DATASET sebelum indeks dibuat,
+    # agar unggahan ulang foto lama juga terdeteksi sebagai duplikat
+    def index_existing(self):
+        with self.lock:
+            if self.db.execute("SELECT value FROM meta WHERE key = 'indexed'").fetchone():
+                return
+            rows = []
+            for label in sorted(os.listdir(self.root)):
+                folder = os.path.join(self.root, label)
+                if not os.path.isdir(folder):
+                    continue
+                for name in sorted(os.listdir(folder)):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(label, name)
+                        rows.append((sample_hash(os.path.join(self.root, path)), path, label.lower(), name))
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO samples (hash, path, label, original_name) "
+                                    "VALUES (?, ?, ?, ?)", rows)
+                self.db.execute("INSERT INTO meta VALUES ('indexed', ?)", (str(len(rows)),))
+
+    # Apakah path berada di dalam folder DATASET (file yang dikelola store ini)
+    def contains(self, path):
+        root = os.path.realpath(self.root)
+        try:
+            return os.path.commonpath([root, os.path.realpath(path)]) == root
+        except ValueError:
+            return False  # Drive berbeda (Windows)
+
+    # Mencari sampel berdasarkan hash; None jika belum ada (atau filenya sudah dihapus)
+    def lookup(self, digest):
+        with self.lock:
+            row = self.db.execute("SELECT path, label FROM samples WHERE hash = ?", (digest,)).fetchone()
+        if row is None or not os.path.exists(os.path.join(self.root, row[0])):
+            return None
+        return row
+
+    # Menyimpan gambar ke DATASET/<Kelas>/<hash><ext>.
+    # Mengembalikan (path, baru); baru=False jika isi yang sama sudah tersimpan.
+    def add(self, file_path, label, confidence=None, digest=None):
+        digest = digest or sample_hash(file_path)
+        existing = self.lookup(digest)
+        if existing is not None:
+            return os.path.join(self.root, existing[0]), False
+        ext = os.path.splitext(file_path)[1].lower() or ".jpg"
+        rel_path = os.path.join(label.capitalize(), digest + ext)
+        target = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            link_or_copy(file_path, target, allow_hardlink=self.contains(file_path))
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?)",
+                            (digest, rel_path, label, os.path.basename(file_path),
+                             None if confidence is None else float(confidence),
+                             datetime.now().isoformat(timespec="seconds")))
+        return target, True
+
+    # Peta path file (relatif terhadap folder kerja, dinormalisasi) -> hash isi, dari indeks
+    # tanpa membaca ulang isi file
+    def hashes(self):
+        with self.lock:
+            rows = self.db.execute("SELECT path, hash FROM samples").fetchall()
+        return {os.path.normpath(os.path.join(self.root, path)): digest for path, digest in rows}
+
+    # Jumlah sampel per kelas menurut indeks
+    def counts(self):
+        with self.lock:
+            return dict(self.db.execute("SELECT label, COUNT(*) FROM samples GROUP BY label ORDER BY label"))
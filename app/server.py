@@ -0,0 +1,199 @@
+# === Server Inferensi Lokal ===
+# Deskripsi: Layanan HTTP yang memuat model sekali dan menggabungkan request yang
+# datang bersamaan menjadi micro-batch (dibatasi ukuran batch maksimum dan waktu
+# tunggu maksimum), sehingga beberapa kiosk bisa memakai satu model yang sudah "hangat".
+#
+# Endpoint:
+#   POST /predict  body = byte gambar (JPEG/PNG), atau JSON {"path": "..."}
+#   GET  /metrics  latensi (p50/p95/p99), kedalaman antrean, distribusi ukuran batch
+#   GET  /health   status server
+
+import io
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import deque, Counter
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import BACKENDS, input_size, load_backend, load_input, predict_batch, class_names
+from app.prediction_cache import PredictionCache, content_hash
+
+# Kelas penggabung request menjadi micro-batch yang dijalankan oleh satu thread model
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=16, max_wait_ms=10.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=10000)
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # Mengirim satu array input; hasil (probabilitas) didapat lewat Future
+    def submit(self, array):
+        future = Future()
+        self.queue.put((array, future, time.perf_counter()))
+        return future
+
+    # Loop thread model: tunggu request pertama, lalu kumpulkan request lain
+    # sampai batch penuh atau batas waktu tunggu habis
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        try:
+            predictions = predict_batch(self.model, [array for array, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            with self.lock:
+                self.errors += len(batch)
+            return
+        now = time.perf_counter()
+        with self.lock:
+            self.batch_sizes[len(batch)] += 1
+            self.requests += len(batch)
+            for _, _, submitted in batch:
+                self.latencies.append(now - submitted)
+        for (_, future, _), probs in zip(batch, predictions):
+            future.set_result(probs)
+
+    # Ringkasan metrik untuk endpoint /metrics
+    def metrics(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+            requests, errors = self.requests, self.errors
+        summary = {
+            "requests": requests,
+            "errors": errors,
+            "queue_depth": self.queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_sizes": batch_sizes,
+        }
+        if len(latencies):
+            summary["latency_ms"] = {
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "p99": round(float(np.percentile(latencies, 99)), 2),
+                "mean": round(float(latencies.mean()), 2),
+            }
+        return summary
+
+# Handler HTTP; setiap request berjalan di thread sendiri, decode gambar dilakukan
+# di sini agar paralel, sedangkan model hanya dijalankan oleh MicroBatcher
+class PredictionHandler(BaseHTTPRequestHandler):
+    batcher = None
+    cache = None
+    image_size = (224, 224)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            metrics = self.batcher.metrics()
+            if self.cache is not None:
+                metrics["cache"] = self.cache.stats()
+            self._send_json(200, metrics)
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Endpoint tidak ditemukan"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Endpoint tidak ditemukan"})
+            return
+        start = time.perf_counter()
+        try:
+            data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                with open(json.loads(data)["path"], "rb") as f:
+                    data = f.read()
+            digest = content_hash(data) if self.cache is not None else None
+            probs = self.cache.get(digest) if self.cache is not None else None
+            array = load_input(io.BytesIO(data), self.image_size) if probs is None else None
+        except Exception as e:
+            self._send_json(400, {"error": f"Gagal membaca gambar: {e}"})
+            return
+        if probs is None:
+            try:
+                probs = self.batcher.submit(array).result()
+            except Exception as e:
+                self._send_json(500, {"error": f"Error dalam prediksi: {e}"})
+                return
+            if self.cache is not None:
+                self.cache.put(digest, probs)
+        self._send_json(200, {
+            "prediksi": class_names[int(np.argmax(probs))],
+            "kepercayaan": round(float(np.max(probs)) * 100, 2),
+            "probabilitas": {name: round(float(p), 6) for name, p in zip(class_names, probs)},
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        })
+
+    # Log akses per request dimatikan agar tidak membanjiri terminal
+    def log_message(self, format, *args):
+        pass
+
+# Server HTTP multi-thread dengan antrean koneksi lebih panjang dari default (5)
+# agar lonjakan request dari beberapa kiosk tidak ditolak
+class InferenceServer(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server inferensi lokal dengan micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backend", choices=list(BACKENDS), default=os.environ.get("VAK_BACKEND", "keras"),
+                        help="Backend inferensi (model Keras atau TFLite hasil ekspor)")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0,
+                        help="Waktu tunggu maksimum untuk mengisi batch")
+    parser.add_argument("--no-cache", action="store_true", help="Jangan pakai cache prediksi")
+    args = parser.parse_args()
+
+    model = load_backend(args.backend)
+    # Pemanasan: jalankan satu batch dummy agar request pertama tidak menanggung tracing
+    PredictionHandler.image_size = input_size(model)
+    predict_batch(model, [np.zeros(PredictionHandler.image_size + (3,), dtype=np.float32)])
+    PredictionHandler.batcher = MicroBatcher(model, args.max_batch_size, args.max_wait_ms)
+    if not args.no_cache:
+        PredictionHandler.cache = PredictionCache(BACKENDS[args.backend])
+
+    server = InferenceServer((args.host, args.port), PredictionHandler)
+    print(f"Server inferensi berjalan di http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,285 @@
+# === Mode Pantau Folder (Watch Folder) ===
+# Deskripsi: Memantau folder tempat scanner menaruh foto telapak tangan dan
+# mengklasifikasikan setiap file baru tanpa GUI. File yang masih ditulis ditunda
+# (debounce: ukuran/mtime harus sama pada dua polling berturut-turut dan cukup lama
+# tidak berubah), file siap dimasukkan ke antrean terbatas (backpressure: pemindaian
+# berhenti sementara saat antrean penuh), lalu worker model memproses file per batch.
+# Hasil diperlakukan sama seperti aplikasi: cache prediksi, simpan ke DATASET (isi
+# identik tidak disalin ulang; foto hampir sama dilewati dengan --skip-similar), dan
+# riwayat prediksi. File yang sudah diproses dicatat
+# di cursor SQLite sehingga setelah restart tidak ada file yang diklasifikasikan dua kali.
+#
+# Pemakaian:
+#   python app/watch_folder.py /mnt/scanner
+#   python app/watch_folder.py /mnt/scanner --once      # proses file yang ada lalu berhenti
+
+import io
+import os
+import sys
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import BACKENDS, input_size, load_backend, load_input, predict_batch, top_class
+from app.prediction_cache import PredictionCache, content_hash
+from app.history_store import HistoryStore
+from app.sample_store import IMAGE_EXTENSIONS, SampleStore
+from app.embedding_index import build_embedder, build_index, open_index, save_sample
+from utils import tracing
+
+CURSOR_PATH = "hasil_prediksi/watch_cursor.sqlite"
+# Jumlah percobaan untuk file yang gagal diproses (mis. masih dikunci scanner) sebelum
+# dicatat di cursor sebagai gagal; percobaan ulang menunggu file stabil lagi
+MAX_ATTEMPTS = 3
+
+# Kelas cursor file yang sudah diproses: path + (ukuran, mtime). File yang ditimpa
+# dengan isi baru (ukuran/mtime berbeda) dianggap file baru.
+class WatchCursor:
+    def __init__(self, path=CURSOR_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS processed (
+            path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+            result TEXT, confidence REAL, processed_at TEXT NOT NULL)""")
+        self.db.commit()
+        self.done = {path: (size, mtime_ns) for path, size, mtime_ns in
+                     self.db.execute("SELECT path, size, mtime_ns FROM processed")}
+
+    def is_done(self, path, key):
+        return self.done.get(path) == key
+
+    # Mencatat satu batch file yang selesai: [(path, (ukuran, mtime), hasil, kepercayaan), ...]
+    def mark(self, rows):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?)",
+                                [(path, key[0], key[1], result, confidence, now)
+                                 for path, key, result, confidence in rows])
+            self.db.commit()
+            for path, key, _, _ in rows:
+                self.done[path] = key
+
+    def __len__(self):
+        return len(self.done)
+
+# Kelas pemindai folder: mendeteksi file baru, menunda file yang masih ditulis,
+# dan memasukkan file siap ke antrean terbatas
+class FolderWatcher:
+    def __init__(self, folder, cursor, settle=2.0, queue_size=64):
+        self.folder = folder
+        self.cursor = cursor
+        self.settle = settle
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.seen = {}  # path -> (ukuran, mtime) pada polling sebelumnya, untuk file yang belum siap
+        self.pending = set()  # File di antrean atau sedang diproses worker
+
+    # Satu kali pemindaian; mengembalikan jumlah file yang masih menunggu stabil.
+    # queue.put() memblokir saat antrean penuh sehingga pemindaian ikut menunggu worker.
+    def scan(self):
+        now = time.time()
+        current = {}
+        for root, dirs, files in os.walk(self.folder):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name.startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Dipindahkan/dihapus saat pemindaian
+                key = (stat.st_size, stat.st_mtime_ns)
+                with self.lock:
+                    if path in self.pending or self.cursor.is_done(path, key):
+                        continue
+                if key != self.seen.get(path) or stat.st_size == 0 or now - stat.st_mtime < self.settle:
+                    current[path] = key
+                    continue
+                with self.lock:
+                    self.pending.add(path)
+                tracing.gauge("watch_queue_depth", self.queue.qsize())
+                self.queue.put((path, key))
+        self.seen = current
+        return len(current)
+
+    # Dipanggil worker setelah file selesai diproses (berhasil atau gagal)
+    def finish(self, paths):
+        with self.lock:
+            self.pending.difference_update(paths)
+
+# Kelas worker model: mengambil file dari antrean dan memproses per batch
+# (batch penuh atau batas waktu tunggu habis, seperti MicroBatcher di server.py)
+class BatchWorker:
+    def __init__(self, watcher, model, cache=None, sample_store=None, history=None,
+                 embedding_index=None, embedder=None, batch_size=16, max_wait_ms=500.0,
+                 skip_similar=False):
+        self.watcher = watcher
+        self.model = model
+        self.cache = cache
+        self.sample_store = sample_store
+        self.history = history
+        self.embedding_index = embedding_index
+        self.embedder = embedder
+        self.skip_similar = skip_similar
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.processed = 0
+        self.errors = 0
+        self.attempts = {}  # (path, (ukuran, mtime)) -> jumlah percobaan yang gagal
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # Menghentikan worker setelah antrean habis diproses
+    def stop(self):
+        self.watcher.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.watcher.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.watcher.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                with tracing.span("watch_batch", batch_size=len(batch)):
+                    self._process(batch)
+            finally:
+                self.watcher.finish([path for path, _ in batch])
+
+    # Decode, prediksi (cache dulu), simpan ke dataset, log, lalu catat di cursor
+    def _process(self, batch):
+        size = input_size(self.model)
+        entries = []  # (path, key, array, digest, probs atau None, error)
+        for path, key in batch:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = content_hash(data)
+                probs = self.cache.get(digest) if self.cache is not None else None
+                array = load_input(io.BytesIO(data), size)
+                entries.append([path, key, array, digest, probs, None])
+            except Exception as e:
+                entries.append([path, key, None, None, None, e])
+
+        todo = [e for e in entries if e[5] is None and e[4] is None]
+        if todo:
+            try:
+                predictions = predict_batch(self.model, [e[2] for e in todo])
+                for entry, probs in zip(todo, predictions):
+                    entry[4] = probs
+                    if self.cache is not None:
+                        self.cache.put(entry[3], probs)
+            except Exception as e:
+                for entry in todo:
+                    entry[5] = e
+
+        done = []
+        for path, key, array, digest, probs, error in entries:
+            if error is not None:
+                self.errors += 1
+                attempts = self.attempts.get((path, key), 0) + 1
+                if attempts < MAX_ATTEMPTS:
+                    self.attempts[(path, key)] = attempts
+                    print(f"Gagal memproses {path} (percobaan {attempts}/{MAX_ATTEMPTS}), dicoba lagi: {error}")
+                    continue
+                self.attempts.pop((path, key), None)
+                print(f"Gagal memproses {path} setelah {attempts} percobaan: {error}")
+                done.append((path, key, None, None))  # Tidak dicoba lagi kecuali file berubah
+                continue
+            self.attempts.pop((path, key), None)
+            result, prob = top_class(probs)
+            if self.sample_store is not None:
+                try:
+                    tujuan, status = save_sample(self.sample_store, path, result, prob,
+                                                 self.embedding_index, self.embedder, array, digest=digest,
+                                                 reject_similar=self.skip_similar)
+                    if status == "mirip":
+                        print(f"Gambar hampir sama dengan {tujuan}; tidak disimpan")
+                except Exception as e:
+                    print(f"Error saving to dataset: {e}")
+            if self.history is not None:
+                try:
+                    self.history.log(os.path.basename(path), result, prob)
+                except Exception as e:
+                    print(f"Error logging prediction: {e}")
+            print(f"{path}: {result.upper()} ({prob:.2f}%)")
+            done.append((path, key, result, prob))
+            self.processed += 1
+        self.watcher.cursor.mark(done)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Klasifikasi otomatis file baru di folder yang dipantau")
+    parser.add_argument("folder", help="Folder yang dipantau (termasuk subfolder)")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=os.environ.get("VAK_BACKEND", "keras"))
+    parser.add_argument("--interval", type=float, default=1.0, help="Jeda antar pemindaian (detik)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="File dianggap selesai ditulis jika tidak berubah selama ini (detik)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=500.0,
+                        help="Waktu tunggu maksimum untuk melengkapi satu batch")
+    parser.add_argument("--queue-size", type=int, default=64, help="Kapasitas antrean file siap proses")
+    parser.add_argument("--cursor", default=CURSOR_PATH, help="File SQLite daftar file yang sudah diproses")
+    parser.add_argument("--no-save", action="store_true", help="Jangan simpan gambar ke DATASET")
+    parser.add_argument("--no-cache", action="store_true", help="Matikan cache prediksi")
+    parser.add_argument("--skip-similar", action="store_true",
+                        help="Jangan simpan foto yang hampir sama dengan gambar di DATASET "
+                             "(ambang dari `embedding_index.py calibrate`)")
+    parser.add_argument("--once", action="store_true", help="Proses file yang ada lalu berhenti")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        parser.error(f"folder tidak ditemukan: {args.folder}")
+
+    model = load_backend(args.backend)
+    predict_batch(model, [np.zeros(input_size(model) + (3,), dtype=np.float32)])  # Pemanasan
+    cache = None if args.no_cache else PredictionCache(BACKENDS[args.backend])
+    sample_store = embedding_index = embedder = None
+    if not args.no_save:
+        sample_store = SampleStore()
+        if args.backend == "keras":
+            embedder = build_embedder(model)
+            embedding_index = open_index(model, BACKENDS[args.backend])
+            threading.Thread(target=build_index, args=(embedding_index, embedder, input_size(model)),
+                             kwargs={"store": sample_store}, daemon=True).start()
+
+    cursor = WatchCursor(args.cursor)
+    watcher = FolderWatcher(args.folder, cursor, args.settle, args.queue_size)
+    worker = BatchWorker(watcher, model, cache, sample_store, HistoryStore(), embedding_index, embedder,
+                         args.batch_size, args.max_wait_ms, args.skip_similar)
+    print(f"Memantau {args.folder} ({len(cursor)} file sudah diproses sebelumnya). Ctrl+C untuk berhenti.")
+
+    start = time.perf_counter()
+    try:
+        while True:
+            waiting = watcher.scan()
+            if args.once and waiting == 0:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Berhenti; menyelesaikan file di antrean...")
+    worker.stop()
+    print(f"Selesai: {worker.processed} file diklasifikasikan, {worker.errors} gagal "
+          f"dalam {time.perf_counter() - start:.1f} detik")
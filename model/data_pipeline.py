@@ -0,0 +1,195 @@
+# === Pipeline Input tf.data untuk Training ===
+# Deskripsi: Pengganti ImageDataGenerator.flow_from_directory dengan decode paralel,
+# augmentasi rotasi/zoom per batch, cache, dan prefetch. Pembagian 80/20 dan urutan
+# kelas dibuat sama persis dengan flow_from_directory.
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing.compact_dataset import open_compact_dataset, source_digest
+from preprocessing.preprocess import load_manifest
+
+IMG_SIZE = (224, 224)
+BATCH_SIZE = 16
+VALIDATION_SPLIT = 0.2
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Ekstensi file yang dibaca, sama dengan daftar pada flow_from_directory
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+
+# Fungsi untuk membagi daftar sampel satu kelas seperti flow_from_directory:
+# 20% pertama (urut nama) untuk validasi, sisanya untuk training
+def split_members(members, subset, validation_split=VALIDATION_SPLIT):
+    if not validation_split:
+        return members
+    cut = int(validation_split * len(members))
+    return members[:cut] if subset == 'validation' else members[cut:]
+
+# Fungsi untuk mendaftar file gambar per kelas (kelas = subfolder, urut abjad)
+def list_image_files(dataset_dir, subset='training', validation_split=VALIDATION_SPLIT):
+    class_names = sorted(d for d in os.listdir(dataset_dir)
+                         if os.path.isdir(os.path.join(dataset_dir, d)))
+    paths, labels = [], []
+    for label, class_name in enumerate(class_names):
+        class_dir = os.path.join(dataset_dir, class_name)
+        members = []
+        for root, _, files in sorted(os.walk(class_dir), key=lambda x: x[0]):
+            for fname in sorted(files):
+                if fname.lower().endswith(IMAGE_EXTENSIONS):
+                    members.append(os.path.join(root, fname))
+        members = split_members(members, subset, validation_split)
+        paths.extend(members)
+        labels.extend([label] * len(members))
+    return paths, labels, class_names
+
+# Lapisan augmentasi yang dijalankan per batch (setara rotation_range=20, zoom_range=0.2)
+def build_augmenter():
+    return tf.keras.Sequential([
+        tf.keras.layers.RandomRotation(20 / 360, fill_mode='nearest'),
+        tf.keras.layers.RandomZoom((-0.2, 0.2), fill_mode='nearest'),
+    ])
+
+# Fungsi untuk membaca dan mengubah ukuran satu file gambar (tetap uint8 agar cache hemat)
+def decode_image(path, image_size=IMG_SIZE):
+    data = tf.io.read_file(path)
+    # JPEG di-decode dengan IDCT akurat (ISLOW libjpeg) seperti PIL pada flow_from_directory;
+    # IDCT bawaan TensorFlow menggeser piksel hingga beberapa level
+    img = tf.cond(tf.io.is_jpeg(data),
+                  lambda: tf.io.decode_jpeg(data, channels=3, dct_method='INTEGER_ACCURATE'),
+                  lambda: tf.io.decode_image(data, channels=3, expand_animations=False))
+    # Interpolasi nearest sama seperti image.load_img pada flow_from_directory dan prediksi
+    img = tf.image.resize(img, image_size, method='nearest')
+    return tf.cast(img, tf.uint8)
+
+# Fungsi untuk menyelesaikan pipeline: cache, shuffle, batch, augmentasi, rescale, prefetch
+def finalize_dataset(ds, num_classes, batch_size, training, cache, augment=True):
+    ds = ds.cache(cache if isinstance(cache, str) else '') if cache else ds
+    if training:
+        ds = ds.shuffle(2048, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    augmenter = build_augmenter() if training and augment else None
+
+    def to_model_input(x, y):
+        x = tf.cast(x, tf.float32)
+        if augmenter is not None:
+            x = augmenter(x, training=True)
+        return x / 255.0, tf.one_hot(y, num_classes)
+
+    ds = ds.map(to_model_input, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    return ds.prefetch(AUTOTUNE)
+
+# Fungsi untuk membuat tf.data.Dataset dari daftar path gambar dan label
+def dataset_from_paths(paths, labels, num_classes, batch_size=BATCH_SIZE, image_size=IMG_SIZE,
+                       training=False, cache=True, augment=True):
+    # dtype eksplisit: daftar kosong (mis. split validasi dari kelas kecil) tidak boleh jadi float32
+    ds = tf.data.Dataset.from_tensor_slices((tf.constant(list(paths), dtype=tf.string),
+                                             tf.constant(list(labels), dtype=tf.int64)))
+    ds = ds.map(lambda p, y: (decode_image(p, image_size), y),
+                num_parallel_calls=AUTOTUNE, deterministic=not training)
+    return finalize_dataset(ds, num_classes, batch_size, training, cache, augment)
+
+# Fungsi untuk membuat tf.data.Dataset dari folder gambar
+def dataset_from_directory(dataset_dir, subset, batch_size=BATCH_SIZE, image_size=IMG_SIZE,
+                           cache=True, augment=True):
+    paths, labels, class_names = list_image_files(dataset_dir, subset)
+    ds = dataset_from_paths(paths, labels, len(class_names), batch_size, image_size,
+                            subset == 'training', cache, augment)
+    return ds, class_names, len(paths)
+
+# Fungsi untuk membuat tf.data.Dataset dari dataset ringkas (memory-map, tanpa decode)
+def dataset_from_compact(compact, subset, batch_size=BATCH_SIZE, cache=True, augment=True):
+    indices = []
+    for label in range(len(compact.class_names)):
+        members = sorted(np.flatnonzero(compact.labels == label), key=lambda i: compact.keys[i])
+        indices.extend(split_members(members, subset))
+    indices = np.array(indices, dtype=np.int64)
+    height, width = compact.image_size
+
+    def read_rows(idx):
+        return compact.take(idx), compact.labels[idx]
+
+    def load(idx):
+        x, y = tf.numpy_function(read_rows, [idx], (tf.uint8, tf.int64))
+        x.set_shape((None, height, width, 3))
+        y.set_shape((None,))
+        return x, y
+
+    # Baris dibaca per blok dari memory-map lalu dipecah kembali per sampel
+    ds = tf.data.Dataset.from_tensor_slices(indices).batch(256).map(load).unbatch()
+    ds = finalize_dataset(ds, len(compact.class_names), batch_size, subset == 'training', cache, augment)
+    return ds, compact.class_names, len(indices)
+
+# Fungsi untuk membuka dataset ringkas hanya jika isinya masih sesuai manifest folder
+# gambar (gambar sumber dan parameter preprocessing sama) dan resolusinya cocok
+def open_current_compact(compact_dir, dataset_dir, image_size):
+    compact = open_compact_dataset(compact_dir) if compact_dir else None
+    if compact is None:
+        return None
+    manifest = load_manifest(dataset_dir)
+    if compact.source != source_digest(manifest["files"], manifest["params"], manifest.get("version")):
+        print(f"Dataset ringkas {compact_dir} tidak sesuai dengan {dataset_dir} "
+              f"(preprocessing terakhir tanpa --format both); memakai file gambar")
+        return None
+    if compact.image_size != tuple(image_size):
+        return None
+    return compact
+
+# Fungsi utama untuk training: pakai dataset ringkas jika masih sesuai, jika tidak folder gambar
+def make_datasets(dataset_dir, compact_dir=None, batch_size=BATCH_SIZE, image_size=IMG_SIZE):
+    compact = open_current_compact(compact_dir, dataset_dir, image_size)
+    if compact is not None:
+        print(f"Memakai dataset ringkas {compact_dir} ({len(compact)} gambar)")
+        train = dataset_from_compact(compact, 'training', batch_size)
+        val = dataset_from_compact(compact, 'validation', batch_size)
+    else:
+        train = dataset_from_directory(dataset_dir, 'training', batch_size, image_size)
+        val = dataset_from_directory(dataset_dir, 'validation', batch_size, image_size)
+    (train_ds, class_names, n_train), (val_ds, _, n_val) = train, val
+    print(f"Found {n_train} training images and {n_val} validation images "
+          f"belonging to {len(class_names)} classes.")
+    return train_ds, val_ds, class_names
+
+# Fungsi untuk mengukur throughput (gambar/detik) sebuah iterator batch
+def measure_throughput(batches, num_batches):
+    iterator = iter(batches)
+    next(iterator)  # Batch pertama tidak dihitung (inisialisasi/tracing)
+    images = 0
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        x, _ = next(iterator)
+        images += len(x)
+    return images / (time.perf_counter() - start)
+
+# Benchmark: ImageDataGenerator lama vs pipeline tf.data (epoch pertama dan setelah cache)
+def benchmark(dataset_dir, num_batches=50, batch_size=BATCH_SIZE):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    datagen = ImageDataGenerator(rescale=1./255, rotation_range=20, zoom_range=0.2,
+                                 validation_split=VALIDATION_SPLIT)
+    generator = datagen.flow_from_directory(dataset_dir, target_size=IMG_SIZE, batch_size=batch_size,
+                                            class_mode='categorical', subset='training')
+    results = {"ImageDataGenerator": measure_throughput(generator, num_batches)}
+
+    ds, _, _ = dataset_from_directory(dataset_dir, 'training', batch_size, cache=True)
+    results["tf.data"] = measure_throughput(ds.repeat(), num_batches)
+    # Satu epoch penuh agar cache terisi, lalu ukur ulang
+    for _ in ds:
+        pass
+    results["tf.data (cache hangat)"] = measure_throughput(ds.repeat(), num_batches)
+
+    for name, rate in results.items():
+        print(f"{name:<26} {rate:8.1f} gambar/detik")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline input training")
+    parser.add_argument("--dataset-dir", default="dataset_processed")
+    parser.add_argument("--batches", type=int, default=50, help="Jumlah batch yang diukur")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    benchmark(args.dataset_dir, args.batches, args.batch_size)
@@ -0,0 +1,77 @@
+# === Artefak Model Siap-Inferensi (Compiled) ===
+# Deskripsi: Memuat model_palmistry.h5 berarti mengimpor Keras, membangun ulang graf
+# MobileNetV2 lapis demi lapis, lalu menyusun fungsi prediksi saat gambar pertama masuk.
+# Setelah training, model yang sama diekspor sekali menjadi TFLite float32 (tanpa
+# kuantisasi, hasil identik dengan Keras) berisi dua output: "probs" dan "embedding"
+# (untuk indeks embedding). File sidecar <artefak>.json mencatat sidik jari .h5 sumbernya;
+# app/inference.py:load_model() memakai artefak ini hanya jika sidik jarinya masih cocok.
+#
+# Pemakaian (otomatis dipanggil oleh train_model.py dan incremental_update.py):
+#   python model/export_compiled.py                 # ekspor + bandingkan waktu startup
+#   python model/export_compiled.py --no-measure
+
+import os
+import sys
+import json
+import argparse
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import MODEL_PATH, compiled_path
+from app.prediction_cache import file_fingerprint
+from model.profiles import info_path
+
+# Fungsi untuk membangun model dua output dari model klasifikasi Sequential
+# (backbone -> GlobalAveragePooling2D -> Dropout -> Dense); lapisan dipakai bersama
+def build_dual_model(model):
+    import tensorflow as tf
+    inputs = tf.keras.Input(shape=tuple(model.input_shape[1:]), name="inputs")
+    pooled = model.layers[1](model.layers[0](inputs))
+    x = pooled
+    for layer in model.layers[2:]:
+        x = layer(x)
+    return tf.keras.Model(inputs, {"probs": x, "embedding": pooled})
+
+# Fungsi untuk mengekspor artefak siap-inferensi milik model_path (file .h5 yang sudah
+# disimpan). File ditulis ke file sementara lalu diganti secara atomik; sidecar ditulis
+# terakhir sehingga artefak tanpa sidecar yang cocok tidak pernah dipakai.
+def export_compiled(model, model_path=MODEL_PATH):
+    import tensorflow as tf
+    path = compiled_path(model_path)
+    data = tf.lite.TFLiteConverter.from_keras_model(build_dual_model(model)).convert()
+    tmp_path = os.path.join(os.path.dirname(path) or ".", ".tmp_" + os.path.basename(path))
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    info = {"source": os.path.basename(model_path), "fingerprint": file_fingerprint(model_path),
+            "input_size": [int(d) for d in model.input_shape[1:3]],
+            "num_classes": int(model.output_shape[-1]),
+            "embedding_dim": int(model.layers[-1].get_weights()[0].shape[0])}
+    with open(info_path(path), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    print(f"Artefak siap-inferensi disimpan: {path} ({len(data) / 1e6:.1f} MB)")
+    return path
+
+# Fungsi pembungkus untuk skrip training: kegagalan ekspor tidak menggagalkan training
+# (load_model() tetap memakai .h5 jika artefak tidak ada atau usang)
+def try_export_compiled(model, model_path=MODEL_PATH):
+    try:
+        return export_compiled(model, model_path)
+    except Exception as e:
+        print(f"Gagal membuat artefak siap-inferensi, aplikasi akan memuat .h5: {e}")
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ekspor artefak siap-inferensi dari model .h5")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--no-measure", action="store_true",
+                        help="Jangan bandingkan waktu proses-mulai-sampai-prediksi-pertama")
+    parser.add_argument("--repeats", type=int, default=3, help="Jumlah proses per pengukuran startup")
+    args = parser.parse_args()
+
+    from app.inference import load_model
+    export_compiled(load_model(args.model, prefer_compiled=False), args.model)
+    if not args.no_measure:
+        from testing.benchmark import bench_startup
+        for name, seconds in bench_startup(args.model, args.repeats).items():
+            print(f"{name}: {seconds:.2f} detik sampai prediksi pertama")
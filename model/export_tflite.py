@@ -0,0 +1,97 @@
+# === Ekspor Model ke TensorFlow Lite ===
+# Deskripsi: Setelah train_model.py, ubah model_palmistry.h5 menjadi model TFLite float16
+# dan int8 (post-training quantization dengan data kalibrasi dari dataset_processed),
+# lalu laporkan kesesuaian top-1 terhadap model Keras dan perbandingan latensi CPU.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import numpy as np
+import tensorflow as tf
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import BACKENDS, MODEL_PATH, TFLiteModel, input_size, load_input, load_model, predict_batch
+from model.data_pipeline import list_image_files
+
+DATASET_DIR = "dataset_processed"
+REPORT_PATH = "model/tflite_report.json"
+
+# Fungsi untuk mengonversi model Keras ke TFLite float16
+def convert_fp16(model):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+# Fungsi untuk mengonversi model Keras ke TFLite int8 dengan data kalibrasi.
+# Input/output tetap float32 agar pemanggil tidak perlu tahu parameter kuantisasi.
+def convert_int8(model, calibration_paths):
+    def representative_dataset():
+        for path in calibration_paths:
+            yield [load_input(path, input_size(model))[None]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+# Fungsi untuk mengukur latensi rata-rata (ms) prediksi satu gambar
+def measure_latency(model, inputs, repeats):
+    predict_batch(model, [inputs[0]])  # Pemanasan
+    start = time.perf_counter()
+    for i in range(repeats):
+        predict_batch(model, [inputs[i % len(inputs)]])
+    return (time.perf_counter() - start) / repeats * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ekspor model ke TFLite float16 dan int8")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--calibration-size", type=int, default=100,
+                        help="Jumlah gambar kalibrasi int8 (diambil acak dari data training)")
+    parser.add_argument("--eval-size", type=int, default=200,
+                        help="Jumlah gambar validasi untuk cek kesesuaian top-1")
+    parser.add_argument("--repeats", type=int, default=50, help="Jumlah prediksi untuk ukur latensi")
+    args = parser.parse_args()
+
+    model = load_model(args.model, prefer_compiled=False)
+    train_paths, _, _ = list_image_files(args.dataset_dir, 'training')
+    val_paths, _, _ = list_image_files(args.dataset_dir, 'validation')
+    rng = random.Random(0)
+    calibration = rng.sample(train_paths, min(args.calibration_size, len(train_paths)))
+    eval_paths = rng.sample(val_paths, min(args.eval_size, len(val_paths)))
+
+    outputs = {
+        "tflite-fp16": convert_fp16(model),
+        "tflite-int8": convert_int8(model, calibration),
+    }
+    for backend, data in outputs.items():
+        with open(BACKENDS[backend], "wb") as f:
+            f.write(data)
+
+    # Bandingkan prediksi dan latensi terhadap model Keras
+    inputs = [load_input(p, input_size(model)) for p in eval_paths]
+    reference = np.concatenate([predict_batch(model, inputs[i:i + 32]) for i in range(0, len(inputs), 32)])
+    keras_ms = measure_latency(model, inputs, args.repeats)
+    report = {"eval_images": len(inputs), "keras": {"latency_ms": round(keras_ms, 2),
+              "size_mb": round(os.path.getsize(args.model) / 2**20, 2)}}
+    print(f"{'backend':<12} {'top-1 sama':>10} {'latensi':>10} {'speedup':>8} {'ukuran':>9}")
+    print(f"{'keras':<12} {'-':>10} {keras_ms:>8.2f}ms {'1.00x':>8} {report['keras']['size_mb']:>7.2f}MB")
+    for backend in outputs:
+        lite = TFLiteModel(BACKENDS[backend])
+        predictions = np.concatenate([predict_batch(lite, inputs[i:i + 32]) for i in range(0, len(inputs), 32)])
+        agreement = float(np.mean(predictions.argmax(1) == reference.argmax(1))) if len(inputs) else 0.0
+        latency = measure_latency(lite, inputs, args.repeats)
+        size_mb = os.path.getsize(BACKENDS[backend]) / 2**20
+        report[backend] = {"top1_agreement": round(agreement, 4), "latency_ms": round(latency, 2),
+                           "speedup": round(keras_ms / latency, 2), "size_mb": round(size_mb, 2)}
+        print(f"{backend:<12} {agreement * 100:>9.1f}% {latency:>8.2f}ms {keras_ms / latency:>7.2f}x {size_mb:>7.2f}MB")
+
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Model TFLite disimpan, laporan: {REPORT_PATH}")
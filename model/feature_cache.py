@@ -0,0 +1,130 @@
+# === Cache Fitur Backbone (Embedding) ===
+# Deskripsi: Karena MobileNetV2 dibekukan (trainable=False), keluarannya untuk satu gambar
+# selalu sama. Fitur hasil GlobalAveragePooling2D dihitung sekali per gambar dan varian
+# augmentasi, disimpan ke disk (kunci: hash isi gambar + nomor varian), lalu head
+# Dropout/Dense cukup dilatih di atas fitur tersebut.
+
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+import tensorflow as tf
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.data_pipeline import IMG_SIZE, build_augmenter, decode_image
+
+FEATURE_CACHE_DIR = "model/feature_cache"
+
+# Fungsi untuk menghitung hash SHA-256 isi file gambar
+def image_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# Kelas penyimpanan fitur: satu file .npy (float16) per (hash gambar, varian).
+# Hash isi gambar diingat per path bersama ukuran/mtime (hashes.json, seperti manifest
+# preprocessing), sehingga run yang seluruhnya dari cache tidak membaca ulang semua gambar.
+class FeatureCache:
+    def __init__(self, backbone_id, cache_dir=FEATURE_CACHE_DIR):
+        self.root = os.path.join(cache_dir, backbone_id)
+        self.hits = 0
+        self.misses = 0
+        self.hashes_path = os.path.join(cache_dir, "hashes.json")
+        self.known_hashes = None
+
+    # Hash isi untuk daftar path; hanya file baru/berubah (ukuran/mtime) yang di-hash ulang
+    def image_hashes(self, paths):
+        if self.known_hashes is None:
+            try:
+                with open(self.hashes_path, "r", encoding="utf-8") as f:
+                    self.known_hashes = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self.known_hashes = {}
+        digests, changed = [], False
+        for path in paths:
+            key = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = self.known_hashes.get(key)
+            if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+                entry = [stat.st_size, stat.st_mtime_ns, image_hash(path)]
+                self.known_hashes[key] = entry
+                changed = True
+            digests.append(entry[2])
+        if changed:
+            os.makedirs(os.path.dirname(self.hashes_path) or ".", exist_ok=True)
+            tmp_path = self.hashes_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.known_hashes, f)
+            os.replace(tmp_path, self.hashes_path)
+        return digests
+
+    def _path(self, digest, variant):
+        return os.path.join(self.root, digest[:2], f"{digest}_v{variant}.npy")
+
+    def get(self, digest, variant):
+        try:
+            features = np.load(self._path(digest, variant))
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return features
+
+    def put(self, digest, variant, features):
+        path = self._path(digest, variant)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, features.astype(np.float16))
+        os.replace(tmp_path, path)
+
+# Fungsi untuk membuat ekstraktor fitur: backbone + GlobalAveragePooling2D
+def build_extractor(base_model):
+    return tf.keras.Sequential([base_model, tf.keras.layers.GlobalAveragePooling2D()])
+
+# Fungsi untuk mengambil fitur semua gambar untuk varian 0 (asli) s.d. `variants`
+# (augmentasi rotasi/zoom acak). Hanya pasangan yang belum ada di cache yang dihitung.
+# Mengembalikan array (jumlah gambar, variants + 1, dimensi fitur)
+def extract_features(paths, extractor, cache, variants=4, batch_size=32, image_size=IMG_SIZE):
+    digests = cache.image_hashes(paths)
+    augmenter = build_augmenter()
+    results = {}
+    missing = []
+    for i, digest in enumerate(digests):
+        for v in range(variants + 1):
+            features = cache.get(digest, v)
+            if features is None:
+                missing.append((i, v))
+            else:
+                results[(i, v)] = features
+
+    if missing:
+        print(f"Menghitung {len(missing)} fitur baru ({len(results)} diambil dari cache)")
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        images = tf.cast(tf.stack([decode_image(paths[i], image_size) for i, _ in chunk]), tf.float32)
+        augment = tf.constant([[v > 0] for _, v in chunk])[:, :, None, None]
+        images = tf.where(augment, augmenter(images, training=True), images) / 255.0
+        batch_features = extractor(images, training=False).numpy()
+        for (i, v), features in zip(chunk, batch_features):
+            cache.put(digests[i], v, features)
+            results[(i, v)] = features
+
+    return np.stack([np.stack([results[(i, v)] for v in range(variants + 1)])
+                     for i in range(len(paths))]).astype(np.float32)
+
+# Fungsi untuk membuat tf.data dari fitur: training memilih satu varian acak per sampel
+# setiap epoch (pengganti augmentasi), validasi selalu memakai varian 0
+def features_dataset(features, labels, num_classes, batch_size, training):
+    ds = tf.data.Dataset.from_tensor_slices((features, labels))
+    if training:
+        n_variants = features.shape[1]
+        ds = ds.shuffle(len(labels), reshuffle_each_iteration=True)
+        ds = ds.map(lambda f, y: (tf.gather(f, tf.random.uniform((), 0, n_variants, tf.int32)), y))
+    else:
+        ds = ds.map(lambda f, y: (f[0], y))
+    ds = ds.map(lambda f, y: (f, tf.one_hot(y, num_classes)))
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,161 @@
+# === Update Model Inkremental ===
+# Deskripsi: Fine-tuning singkat model_palmistry.h5 yang sudah ada memakai sampel baru
+# (gambar yang masuk ke DATASET setelah update terakhir) ditambah sampel "replay" acak
+# dari data lama, sebagai pengganti training penuh dari bobot ImageNet. Model baru hanya
+# dipasang jika akurasinya pada data held-out tidak turun, dan penggantian file dilakukan
+# secara atomik (os.replace) sehingga aplikasi tidak pernah membaca file setengah jadi.
+#
+# Kode keluar: 0 = model diperbarui / tidak ada sampel baru, 3 = ditolak karena regresi
+
+import os
+import sys
+import json
+import random
+import sqlite3
+import argparse
+from datetime import datetime
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing.preprocess import process_folder, load_manifest
+from model.data_pipeline import list_image_files, dataset_from_paths
+from utils import tracing, progress
+
+SOURCE_DIR = "DATASET"
+DATASET_DIR = "dataset_processed"
+MODEL_PATH = "model/model_palmistry.h5"
+# Daftar gambar sumber yang sudah pernah dipakai melatih model saat ini
+STATE_PATH = "model/incremental_state.json"
+SAMPLE_INDEX = os.path.join(SOURCE_DIR, ".sample_index.sqlite")
+EXIT_REJECTED = 3
+
+# Fungsi untuk membaca daftar sumber yang sudah dilatih. Jika belum ada (update pertama) atau
+# model sudah dilatih ulang penuh sejak update terakhir, semua sumber dianggap sudah dilatih
+# kecuali yang disimpan aplikasi (indeks sampel DATASET) setelah file model dibuat.
+def load_trained_sources(sources, model_path, state_path=STATE_PATH, sample_index=SAMPLE_INDEX):
+    # Status lebih tua dari file model berarti model sudah dilatih penuh setelahnya
+    if os.path.exists(state_path) and os.path.getmtime(state_path) >= os.path.getmtime(model_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            return set(json.load(f)["trained"])
+    added_after_model = set()
+    if os.path.exists(sample_index):
+        model_time = datetime.fromtimestamp(os.path.getmtime(model_path)).isoformat(timespec="seconds")
+        db = sqlite3.connect(sample_index)
+        try:
+            rows = db.execute("SELECT path FROM samples WHERE created_at > ?", (model_time,)).fetchall()
+        finally:
+            db.close()
+        added_after_model = {path.replace(os.sep, "/") for path, in rows}
+    return {rel for rel in sources if rel not in added_after_model}
+
+# Fungsi untuk menyimpan daftar sumber yang sudah dilatih (atomik)
+def save_trained_sources(trained, state_path=STATE_PATH):
+    tmp = state_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": datetime.now().isoformat(timespec="seconds"), "trained": sorted(trained)}, f)
+    os.replace(tmp, state_path)
+
+# Fungsi untuk mengukur akurasi model pada daftar gambar
+def evaluate(model, paths, labels, num_classes, batch_size, image_size):
+    if not paths:
+        return None
+    ds = dataset_from_paths(paths, labels, num_classes, batch_size, image_size, cache=False)
+    return float(model.evaluate(ds, verbose=0, return_dict=True)["accuracy"])
+
+# Fungsi utama update inkremental; mengembalikan ringkasan hasil (dict)
+def incremental_update(source_dir=SOURCE_DIR, dataset_dir=DATASET_DIR, model_path=MODEL_PATH,
+                       epochs=3, learning_rate=1e-4, batch_size=16, replay_ratio=2.0,
+                       tolerance=0.01, workers=1, seed=0):
+    import tensorflow as tf
+    from model.train_model import progress_callbacks
+    from model.export_compiled import try_export_compiled
+
+    # Preprocessing inkremental: hanya gambar baru/berubah yang diproses (lihat manifest)
+    manifest = load_manifest(dataset_dir)
+    with tracing.span("preprocess"):
+        summary = process_folder(source_dir, dataset_dir, workers, params=manifest["params"])
+    manifest = load_manifest(dataset_dir)
+    print(f"Preprocessing: {summary['processed']} gambar diproses, {summary['skipped']} tidak berubah")
+
+    # Peta file output -> gambar sumber
+    source_of = {}
+    for rel, entry in manifest["files"].items():
+        for out in entry["outputs"]:
+            source_of[os.path.normpath(os.path.join(dataset_dir, out))] = rel
+    trained = load_trained_sources(manifest["files"], model_path,
+                                   sample_index=os.path.join(source_dir, ".sample_index.sqlite"))
+    new_sources = set(manifest["files"]) - trained
+    if not new_sources:
+        print("Tidak ada sampel baru sejak update terakhir; model tidak diubah.")
+        return {"status": "unchanged", "new": 0}
+
+    train_paths, train_labels, class_names = list_image_files(dataset_dir, 'training')
+    val_paths, val_labels, _ = list_image_files(dataset_dir, 'validation')
+    label_of = dict(zip(train_paths + val_paths, train_labels + val_labels))
+
+    # Data held-out: split validasi dari sumber lama (tidak pernah ikut fine-tuning)
+    holdout = [p for p in val_paths if source_of.get(os.path.normpath(p)) in trained]
+    # Sampel baru (semua output augmentasinya) + replay acak dari data training lama
+    new_paths = [p for p in train_paths + val_paths if source_of.get(os.path.normpath(p)) in new_sources]
+    old_paths = [p for p in train_paths if source_of.get(os.path.normpath(p)) in trained]
+    rng = random.Random(seed)
+    replay = rng.sample(old_paths, min(len(old_paths), int(len(new_paths) * replay_ratio)))
+    print(f"{len(new_sources)} gambar sumber baru ({len(new_paths)} file), {len(replay)} sampel replay, "
+          f"{len(holdout)} gambar held-out")
+
+    model = tf.keras.models.load_model(model_path)
+    if model.output_shape[-1] != len(class_names):
+        raise ValueError(f"Model punya {model.output_shape[-1]} kelas, dataset {len(class_names)} kelas; "
+                         f"jalankan training penuh")
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate),
+                  loss='categorical_crossentropy', metrics=['accuracy'])
+    # Resolusi input mengikuti model yang sedang dipakai (profil, lihat model/profiles.py)
+    image_size = tuple(int(d) for d in model.input_shape[1:3])
+    holdout_labels = [label_of[p] for p in holdout]
+    with tracing.span("evaluate", model="lama"):
+        before = evaluate(model, holdout, holdout_labels, len(class_names), batch_size, image_size)
+
+    fit_paths = new_paths + replay
+    with tracing.span("fine_tune"):
+        model.fit(dataset_from_paths(fit_paths, [label_of[p] for p in fit_paths], len(class_names),
+                                     batch_size, image_size, training=True), epochs=epochs,
+                  callbacks=progress_callbacks(), verbose=2 if progress.ENABLED else "auto")
+    with tracing.span("evaluate", model="baru"):
+        after = evaluate(model, holdout, holdout_labels, len(class_names), batch_size, image_size)
+    print(f"Akurasi held-out: sebelum {before}, sesudah {after}")
+
+    if before is not None and after < before - tolerance:
+        print(f"Model baru ditolak: akurasi held-out turun lebih dari {tolerance:.2%}; model lama dipertahankan.")
+        return {"status": "rejected", "new": len(new_sources), "before": before, "after": after}
+
+    # Simpan di folder yang sama lalu ganti secara atomik
+    tmp_path = os.path.join(os.path.dirname(model_path) or ".", ".tmp_" + os.path.basename(model_path))
+    with tracing.span("save_model"):
+        model.save(tmp_path)
+    os.replace(tmp_path, model_path)
+    with tracing.span("export_compiled"):
+        try_export_compiled(model, model_path)
+    save_trained_sources(trained | new_sources)
+    print(f"Model diperbarui: {model_path}")
+    return {"status": "updated", "new": len(new_sources), "before": before, "after": after}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update model inkremental dari sampel baru")
+    parser.add_argument("--source-dir", default=SOURCE_DIR, help="Folder dataset sumber")
+    parser.add_argument("--dataset-dir", default=DATASET_DIR, help="Folder hasil preprocessing")
+    parser.add_argument("--model", default=MODEL_PATH, help="File model yang diperbarui")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--replay-ratio", type=float, default=2.0,
+                        help="Jumlah sampel lama per sampel baru yang ikut dilatih ulang")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Penurunan akurasi held-out maksimum yang masih diterima")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker preprocessing")
+    args = parser.parse_args()
+
+    result = incremental_update(args.source_dir, args.dataset_dir, args.model, args.epochs,
+                                args.learning_rate, args.batch_size, args.replay_ratio,
+                                args.tolerance, args.workers)
+    if result["status"] == "rejected":
+        sys.exit(EXIT_REJECTED)
@@ -0,0 +1,129 @@
+# === Profil Model (Backbone dan Resolusi Input) ===
+# Deskripsi: Profil bernama untuk ukuran backbone MobileNetV2 (alpha) dan resolusi input.
+# Profil kecil (mis. mobilenetv2_0.35_160) jauh lebih cepat di komputer kiosk yang lemah.
+# Ukuran input tersimpan di model itu sendiri (input_shape) dan dicatat bersama nama
+# profil di file sidecar <model>.json, sehingga inferensi tidak perlu menebak 224x224.
+#
+# Laporan perbandingan akurasi, jumlah parameter, dan latensi CPU antar profil:
+#   python model/profiles.py --profiles mobilenetv2_1.0_224 mobilenetv2_0.35_160
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Kombinasi alpha/resolusi yang punya bobot ImageNet resmi untuk MobileNetV2
+PROFILES = {
+    "mobilenetv2_1.0_224": {"alpha": 1.0, "image_size": 224},
+    "mobilenetv2_0.75_192": {"alpha": 0.75, "image_size": 192},
+    "mobilenetv2_0.5_160": {"alpha": 0.5, "image_size": 160},
+    "mobilenetv2_0.35_160": {"alpha": 0.35, "image_size": 160},
+    "mobilenetv2_0.35_128": {"alpha": 0.35, "image_size": 128},
+}
+DEFAULT_PROFILE = "mobilenetv2_1.0_224"
+REPORT_PATH = "model/profile_report.json"
+
+# Fungsi untuk mengambil profil: dict berisi name, alpha, dan image_size (tinggi, lebar)
+def get_profile(name=DEFAULT_PROFILE):
+    if name not in PROFILES:
+        raise ValueError(f"Profil tidak dikenal: {name} (pilihan: {', '.join(PROFILES)})")
+    size = PROFILES[name]["image_size"]
+    return {"name": name, "alpha": PROFILES[name]["alpha"], "image_size": (size, size)}
+
+# Fungsi untuk path file sidecar info model (model_palmistry.h5 -> model_palmistry.json)
+def info_path(model_path):
+    return os.path.splitext(model_path)[0] + ".json"
+
+# Fungsi untuk mencatat profil, ukuran input, dan nama kelas di samping file model
+def save_model_info(model_path, profile, class_names):
+    spec = get_profile(profile)
+    with open(info_path(model_path), "w", encoding="utf-8") as f:
+        json.dump({"profile": profile, "alpha": spec["alpha"], "image_size": list(spec["image_size"]),
+                   "class_names": list(class_names)}, f, indent=2)
+
+# Fungsi untuk membaca info model; None jika sidecar belum ada (model lama = profil default)
+def load_model_info(model_path):
+    try:
+        with open(info_path(model_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+# Fungsi untuk mengukur latensi CPU satu gambar (p50/p99 ms) dan throughput batch 16
+def measure_latency(model, image, repeats):
+    from app.inference import predict_batch
+    predict_batch(model, [image])  # Pemanasan
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_batch(model, [image])
+        samples.append(time.perf_counter() - start)
+    batch = [image] * 16
+    predict_batch(model, batch)
+    start = time.perf_counter()
+    predict_batch(model, batch)
+    throughput = 16 / (time.perf_counter() - start)
+    ms = np.array(samples) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99)), throughput
+
+# Fungsi untuk mengevaluasi satu profil: head dilatih di atas fitur backbone yang di-cache
+# (seperti `train_model.py --cached-features`), lalu akurasi validasi, jumlah parameter,
+# dan latensi model penuh diukur
+def evaluate_profile(name, dataset_dir, epochs, variants, batch_size, repeats, weights):
+    from model.data_pipeline import list_image_files, decode_image
+    from model.feature_cache import FeatureCache, build_extractor, extract_features, features_dataset
+    from model.train_model import build_model, build_head
+
+    spec = get_profile(name)
+    train_paths, train_labels, class_names = list_image_files(dataset_dir, 'training')
+    val_paths, val_labels, _ = list_image_files(dataset_dir, 'validation')
+    model, base_model = build_model(len(class_names), weights=weights, profile=name)
+    extractor = build_extractor(base_model)
+    cache = FeatureCache(f"{name}_{weights or 'acak'}")
+    train_features = extract_features(train_paths, extractor, cache, variants, image_size=spec["image_size"])
+    val_features = extract_features(val_paths, extractor, cache, variants=0, image_size=spec["image_size"])
+
+    head = build_head(train_features.shape[-1], len(class_names))
+    head.fit(features_dataset(train_features, np.array(train_labels), len(class_names), batch_size, training=True),
+             epochs=epochs, verbose=0)
+    val_ds = features_dataset(val_features, np.array(val_labels), len(class_names), batch_size, training=False)
+    accuracy = float(head.evaluate(val_ds, verbose=0, return_dict=True)["accuracy"]) if val_paths else None
+    model.layers[-1].set_weights(head.layers[-1].get_weights())
+
+    image = decode_image((val_paths or train_paths)[0], spec["image_size"]).numpy().astype(np.float32) / 255.0
+    p50, p99, throughput = measure_latency(model, image, repeats)
+    return {"profile": name, "alpha": spec["alpha"], "image_size": spec["image_size"][0],
+            "val_accuracy": accuracy, "params": int(model.count_params()),
+            "latency_p50_ms": round(p50, 2), "latency_p99_ms": round(p99, 2),
+            "throughput_batch16": round(throughput, 1)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laporan akurasi, parameter, dan latensi antar profil model")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--dataset-dir", default="dataset_processed")
+    parser.add_argument("--epochs", type=int, default=10, help="Epoch training head per profil")
+    parser.add_argument("--variants", type=int, default=2, help="Varian augmentasi fitur per gambar")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=30, help="Jumlah prediksi untuk ukur latensi")
+    parser.add_argument("--weights", default="imagenet",
+                        help="Bobot awal backbone ('imagenet', atau 'none' untuk bobot acak tanpa unduhan)")
+    parser.add_argument("--output", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    weights = None if args.weights.lower() == "none" else args.weights
+    rows = [evaluate_profile(name, args.dataset_dir, args.epochs, args.variants, args.batch_size,
+                             args.repeats, weights) for name in args.profiles]
+
+    print(f"\n{'Profil':<22} {'Akurasi':>8} {'Parameter':>11} {'p50 ms':>8} {'p99 ms':>8} {'gbr/dtk':>8}")
+    for row in rows:
+        accuracy = "-" if row["val_accuracy"] is None else f"{row['val_accuracy'] * 100:.1f}%"
+        print(f"{row['profile']:<22} {accuracy:>8} {row['params']:>11,} {row['latency_p50_ms']:>8.2f} "
+              f"{row['latency_p99_ms']:>8.2f} {row['throughput_batch16']:>8.1f}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"dataset_dir": args.dataset_dir, "weights": args.weights, "profiles": rows}, f, indent=2)
+    print(f"Laporan disimpan ke {args.output}")
@@ -2,63 +2,254 @@
 # Deskripsi: Bangun model MobileNetV2 dan latih dengan dataset citra telapak tangan
 
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import MobileNetV2
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import GlobalAveragePooling2D, Dropout, Dense
+import numpy as np
+import argparse
 import os
+import sys
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.data_pipeline import make_datasets, list_image_files
+from model.feature_cache import FeatureCache, build_extractor, extract_features, features_dataset
+from model.training_run import (CHECKPOINT_DIR, RunState, RunStateCallback, ResumableEarlyStopping,
+                                dataset_fingerprint)
+from model.profiles import DEFAULT_PROFILE, PROFILES, get_profile, save_model_info
+from model.export_compiled import try_export_compiled
+from utils import tracing, progress
 
 # Direktori dataset hasil preprocessing
 DATASET_DIR = "dataset_processed"
-IMG_SIZE = (224, 224)
+# Dataset ringkas (shard array) hasil `preprocess.py --format both`; dipakai jika masih sesuai manifest
+COMPACT_DIR = "dataset_compact"
 BATCH_SIZE = 16
 EPOCHS = 20
+LEARNING_RATE = 1e-3
+# Jumlah epoch tanpa kenaikan val_accuracy sebelum training dihentikan
+PATIENCE = 5
+MODEL_PATH = "model/model_palmistry.h5"
+
+# Bangun model MobileNetV2 sesuai profil (alpha dan resolusi input, lihat model/profiles.py)
+def build_model(num_classes=3, weights='imagenet', learning_rate=LEARNING_RATE, profile=DEFAULT_PROFILE):
+    spec = get_profile(profile)
+    base_model = MobileNetV2(include_top=False, weights=weights, alpha=spec["alpha"],
+                             input_shape=spec["image_size"] + (3,))
+    base_model.trainable = False
+
+    model = Sequential([
+        base_model,
+        GlobalAveragePooling2D(),
+        Dropout(0.2),
+        Dense(num_classes, activation='softmax')
+    ])
+
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate),
+                  loss='categorical_crossentropy', metrics=['accuracy'])
+    return model, base_model
+
+# Bangun head Dropout + Dense (arsitektur sama dengan lapisan atas model penuh)
+# untuk dilatih di atas fitur backbone yang di-cache
+def build_head(feature_dim, num_classes, learning_rate=LEARNING_RATE):
+    head = Sequential([
+        tf.keras.Input(shape=(feature_dim,)),
+        Dropout(0.2),
+        Dense(num_classes, activation='softmax')
+    ])
+    head.compile(optimizer=tf.keras.optimizers.Adam(learning_rate),
+                 loss='categorical_crossentropy', metrics=['accuracy'])
+    return head
+
+# Callback Keras untuk mencatat span per epoch dan per batch training (jika VAK_TRACE aktif).
+# Span batch mencakup waktu menunggu pipeline input, sehingga decode yang lambat terlihat.
+class TraceCallback(tf.keras.callbacks.Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = tracing.now_us()
+
+    def on_epoch_end(self, epoch, logs=None):
+        tracing.record("epoch", self.epoch_start, epoch=epoch + 1)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.batch_start = tracing.now_us()
+
+    def on_train_batch_end(self, batch, logs=None):
+        tracing.record("train_batch", self.batch_start)
+        tracing.counter("train_batches")
+
+    def on_test_begin(self, logs=None):
+        self.test_start = tracing.now_us()
+
+    def on_test_end(self, logs=None):
+        tracing.record("validation", self.test_start)
+
+# Daftar callback tracing; kosong jika tracing tidak aktif
+def trace_callbacks():
+    return [TraceCallback()] if tracing.ENABLED else []
+
+# Callback Keras untuk melaporkan progres batch dan metrik per epoch (jika VAK_PROGRESS aktif)
+class ProgressCallback(tf.keras.callbacks.Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch + 1
+
+    def on_train_batch_end(self, batch, logs=None):
+        progress.report("train_batch", force=False, epoch=self.epoch, epochs=self.params.get("epochs"),
+                        batch=batch + 1, steps=self.params.get("steps"))
+
+    def on_epoch_end(self, epoch, logs=None):
+        progress.report("epoch", epoch=epoch + 1, epochs=self.params.get("epochs"),
+                        **{k: round(float(v), 4) for k, v in (logs or {}).items()})
+
+# Daftar callback progres; kosong jika tidak dijalankan oleh job runner
+def progress_callbacks():
+    return [ProgressCallback()] if progress.ENABLED else []
+
+# Fungsi untuk mengatur jumlah thread CPU TensorFlow (harus sebelum operasi TF pertama);
+# 0 = biarkan TensorFlow memilih otomatis
+def configure_threads(intra_op=0, inter_op=0):
+    if intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+# Fungsi untuk menjalankan model.fit dengan checkpoint tiap epoch, EarlyStopping pada
+# val_accuracy, dan lanjut (resume) dari checkpoint terakhir run yang sama.
+# Mengembalikan model dengan bobot terbaik.
+def fit_resumable(model, train_ds, val_ds, options, state):
+    initial_epoch = 0
+    if state.can_resume():
+        # Checkpoint berisi model lengkap termasuk state optimizer
+        model = tf.keras.models.load_model(state.last_checkpoint)
+        initial_epoch = state.data["epoch"]
+        print(f"Melanjutkan training dari epoch {initial_epoch} ({state.dir})")
+    model.jit_compile = options.xla
+
+    early_stopping = ResumableEarlyStopping(
+        initial_best=state.data["early_stopping_best"], initial_wait=state.data["wait"],
+        monitor="val_accuracy", mode="max", patience=options.patience, min_delta=options.min_delta, verbose=1)
+    callbacks = [
+        tf.keras.callbacks.ModelCheckpoint(state.last_checkpoint),
+        tf.keras.callbacks.ModelCheckpoint(state.best_weights, monitor="val_accuracy", mode="max",
+                                           save_best_only=True, save_weights_only=True,
+                                           initial_value_threshold=state.data["best_val_accuracy"]),
+        early_stopping,
+        RunStateCallback(state, early_stopping),
+    ] + trace_callbacks() + progress_callbacks()
+    model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=options.epochs,
+        initial_epoch=initial_epoch,
+        callbacks=callbacks,
+        # Di bawah job runner progres tampil di UI; cukup satu baris ringkasan per epoch
+        verbose=2 if progress.ENABLED else "auto"
+    )
+    state.data["stopped_early"] = early_stopping.stopped_epoch > 0
+    if os.path.exists(state.best_weights):
+        model.load_weights(state.best_weights)
+    return model
+
+# Training penuh: setiap epoch menjalankan MobileNetV2 pada semua gambar
+def train_full(options, state):
+    # Pipeline input tf.data (decode paralel, augmentasi per batch, cache, prefetch)
+    with tracing.span("make_datasets"):
+        train_generator, val_generator, class_names = make_datasets(
+            options.dataset_dir, options.compact_dir, options.batch_size, get_profile(options.profile)["image_size"])
+
+    with tracing.span("build_model"):
+        model, _ = build_model(len(class_names), learning_rate=options.learning_rate, profile=options.profile)
+    model.summary()
+
+    # Latih model
+    return fit_resumable(model, train_generator, val_generator, options, state), class_names
+
+# Training cepat: fitur backbone beku dihitung sekali (di-cache di disk),
+# lalu hanya head Dropout + Dense yang dilatih di atas fitur tersebut
+def train_cached_features(options, state):
+    train_paths, train_labels, class_names = list_image_files(options.dataset_dir, 'training')
+    val_paths, val_labels, _ = list_image_files(options.dataset_dir, 'validation')
+
+    image_size = get_profile(options.profile)["image_size"]
+    model, base_model = build_model(len(class_names), profile=options.profile)
+    extractor = build_extractor(base_model)
+    cache = FeatureCache(f"{options.profile}_imagenet")
+    with tracing.span("extract_features", subset="training"):
+        train_features = extract_features(train_paths, extractor, cache, options.variants, image_size=image_size)
+    with tracing.span("extract_features", subset="validation"):
+        val_features = extract_features(val_paths, extractor, cache, variants=0, image_size=image_size)
+    print(f"Cache fitur: {cache.hits} hit, {cache.misses} miss")
+
+    # Head dengan arsitektur sama seperti lapisan atas model penuh
+    head = build_head(train_features.shape[-1], len(class_names), options.learning_rate)
+    head = fit_resumable(
+        head,
+        features_dataset(train_features, np.array(train_labels), len(class_names), options.batch_size, training=True),
+        features_dataset(val_features, np.array(val_labels), len(class_names), options.batch_size, training=False),
+        options, state
+    )
+
+    # Salin bobot head ke model penuh agar file .h5 tetap bisa dipakai untuk prediksi
+    model.layers[-1].set_weights(head.layers[-1].get_weights())
+    return model, class_names
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training model CNN klasifikasi gaya belajar")
+    parser.add_argument("--dataset-dir", default=DATASET_DIR, help="Folder dataset hasil preprocessing")
+    parser.add_argument("--compact-dir", default=COMPACT_DIR, help="Folder dataset ringkas (jika ada)")
+    parser.add_argument("--output", default=MODEL_PATH, help="File model hasil training")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help="Profil backbone/resolusi input (lihat model/profiles.py)")
+    parser.add_argument("--epochs", type=int, default=EPOCHS, help="Jumlah epoch maksimum")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--patience", type=int, default=PATIENCE,
+                        help="Berhenti jika val_accuracy tidak membaik selama N epoch")
+    parser.add_argument("--min-delta", type=float, default=0.0,
+                        help="Kenaikan val_accuracy minimum yang dianggap membaik")
+    parser.add_argument("--intra-op-threads", type=int, default=0,
+                        help="Thread per operasi TensorFlow (0 = otomatis)")
+    parser.add_argument("--inter-op-threads", type=int, default=0,
+                        help="Jumlah operasi TensorFlow yang berjalan paralel (0 = otomatis)")
+    parser.add_argument("--xla", action="store_true", help="Kompilasi langkah training dengan XLA (jit_compile)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="Folder checkpoint dan status run")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Abaikan checkpoint/status run sebelumnya dan latih dari awal")
+    parser.add_argument("--cached-features", action="store_true",
+                        help="Latih head saja di atas fitur MobileNetV2 yang di-cache")
+    parser.add_argument("--variants", type=int, default=4,
+                        help="Jumlah varian augmentasi per gambar untuk mode --cached-features")
+    args = parser.parse_args()
+
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+
+    # Konfigurasi yang memengaruhi hasil training menentukan id run
+    config = {
+        "mode": "cached-features" if args.cached_features else "full",
+        "dataset": dataset_fingerprint(args.dataset_dir, None if args.cached_features else args.compact_dir),
+        "profile": args.profile,
+        "batch_size": args.batch_size,
+        "learning_rate": args.learning_rate,
+    }
+    if args.cached_features:
+        config["variants"] = args.variants
+    state = RunState(config, args.checkpoint_dir)
+    if args.fresh:
+        state.reset()
+    elif state.is_complete(args.epochs) and state.output_matches(args.output):
+        best = state.data["best_val_accuracy"]
+        print(f"Run {os.path.basename(state.dir)} sudah selesai ({state.data['epoch']} epoch, "
+              f"val_accuracy terbaik {best if best is None else round(best, 4)}); training dilewati. "
+              f"Pakai --fresh untuk melatih ulang.")
+        sys.exit(0)
+
+    model, class_names = train_cached_features(args, state) if args.cached_features else train_full(args, state)
 
-# Preprocessing dan augmentasi
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    zoom_range=0.2,
-    validation_split=0.2
-)
-
-train_generator = train_datagen.flow_from_directory(
-    DATASET_DIR,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-val_generator = train_datagen.flow_from_directory(
-    DATASET_DIR,
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
-
-# Bangun model MobileNetV2
-base_model = MobileNetV2(include_top=False, weights='imagenet', input_shape=(224, 224, 3))
-base_model.trainable = False
-
-model = Sequential([
-    base_model,
-    GlobalAveragePooling2D(),
-    Dropout(0.2),
-    Dense(3, activation='softmax')
-])
-
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-model.summary()
-
-# Latih model
-history = model.fit(
-    train_generator,
-    validation_data=val_generator,
-    epochs=EPOCHS
-)
-
-# Simpan model
-model.save("model/model_palmistry.h5")
-print("Model selesai dilatih dan disimpan!")
+    # Simpan model
+    with tracing.span("save_model"):
+        model.save(args.output)
+    save_model_info(args.output, args.profile, class_names)
+    state.complete(args.output, state.data["stopped_early"])
+    # Artefak siap-inferensi agar aplikasi tidak perlu membangun ulang graf Keras saat mulai
+    with tracing.span("export_compiled"):
+        try_export_compiled(model, args.output)
+    print("Model selesai dilatih dan disimpan!")
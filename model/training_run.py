@@ -0,0 +1,123 @@
+# === Status Run Training (Checkpoint dan Resume) ===
+# Deskripsi: Setiap konfigurasi training mendapat folder run sendiri di model/checkpoints/<id>
+# berisi state.json, checkpoint epoch terakhir (model + optimizer), dan bobot terbaik
+# menurut val_accuracy. Run yang terputus dilanjutkan dari epoch terakhir, dan run yang
+# sudah selesai tidak diulang.
+
+import os
+import json
+import hashlib
+import tensorflow as tf
+
+CHECKPOINT_DIR = "model/checkpoints"
+STATE_NAME = "state.json"
+LAST_CHECKPOINT = "last.keras"
+BEST_WEIGHTS = "best.weights.h5"
+
+# Fungsi untuk sidik jari dataset dari daftar file (path relatif, ukuran, mtime) di setiap
+# folder yang ada, tanpa membaca isi file; berubah jika gambar ditambah, dihapus, atau diubah
+def dataset_fingerprint(*folders):
+    h = hashlib.sha256()
+    for folder in folders:
+        if not folder or not os.path.isdir(folder):
+            continue
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                rel = os.path.relpath(os.path.join(root, name), folder)
+                h.update(f"{folder}|{rel}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+# Fungsi untuk id run dari konfigurasi yang memengaruhi hasil training.
+# Jumlah epoch, patience, thread, dan XLA tidak ikut, sehingga menaikkan --epochs
+# melanjutkan run yang sama alih-alih mengulang dari awal.
+def run_id(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+# Kelas status run yang disimpan sebagai JSON (ditulis atomik tiap akhir epoch)
+class RunState:
+    def __init__(self, config, root=CHECKPOINT_DIR):
+        self.dir = os.path.join(root, run_id(config))
+        self.path = os.path.join(self.dir, STATE_NAME)
+        self.last_checkpoint = os.path.join(self.dir, LAST_CHECKPOINT)
+        self.best_weights = os.path.join(self.dir, BEST_WEIGHTS)
+        os.makedirs(self.dir, exist_ok=True)
+        self.data = {"config": config, "status": "new", "epoch": 0, "best_val_accuracy": None,
+                     "early_stopping_best": None, "wait": 0, "stopped_early": False, "history": []}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    # Run dianggap selesai jika berhenti lebih awal atau sudah mencapai jumlah epoch
+    def is_complete(self, epochs):
+        return self.data["status"] == "completed" and (self.data["stopped_early"] or self.data["epoch"] >= epochs)
+
+    # Checkpoint epoch terakhir bisa dipakai untuk melanjutkan training
+    def can_resume(self):
+        return self.data["epoch"] > 0 and os.path.exists(self.last_checkpoint)
+
+    # File model hasil run ini masih ada dan belum ditimpa run lain
+    def output_matches(self, path):
+        output = self.data.get("output")
+        if not output or output["path"] != path or not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        return output["size"] == stat.st_size and output["mtime_ns"] == stat.st_mtime_ns
+
+    # Menandai run selesai dan mencatat file model yang disimpan
+    def complete(self, output_path, stopped_early):
+        stat = os.stat(output_path)
+        self.data.update(status="completed", stopped_early=stopped_early,
+                         output={"path": output_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+        self.save()
+
+    # Menghapus checkpoint dan status agar run dimulai dari awal
+    def reset(self):
+        for path in (self.path, self.last_checkpoint, self.best_weights):
+            if os.path.exists(path):
+                os.remove(path)
+        self.data.update(status="new", epoch=0, best_val_accuracy=None, early_stopping_best=None,
+                         wait=0, stopped_early=False, history=[])
+        self.data.pop("output", None)
+
+# EarlyStopping yang bisa melanjutkan hitungan patience dari run sebelumnya
+class ResumableEarlyStopping(tf.keras.callbacks.EarlyStopping):
+    def __init__(self, initial_best=None, initial_wait=0, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_best = initial_best
+        self.initial_wait = initial_wait
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.initial_best is not None:
+            self.best = self.initial_best
+            self.wait = self.initial_wait
+
+# Callback yang mencatat progres ke state.json setiap akhir epoch (setelah checkpoint
+# dan EarlyStopping), sehingga crash kapan pun hanya kehilangan epoch yang sedang berjalan
+class RunStateCallback(tf.keras.callbacks.Callback):
+    def __init__(self, state, early_stopping):
+        super().__init__()
+        self.state = state
+        self.early_stopping = early_stopping
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = {k: float(v) for k, v in (logs or {}).items()}
+        data = self.state.data
+        data["status"] = "running"
+        data["epoch"] = epoch + 1
+        data["history"].append(dict(logs, epoch=epoch + 1))
+        val_accuracy = logs.get("val_accuracy")
+        if val_accuracy is not None and (data["best_val_accuracy"] is None or val_accuracy > data["best_val_accuracy"]):
+            data["best_val_accuracy"] = val_accuracy
+        if self.early_stopping.best is not None:
+            data["early_stopping_best"] = float(self.early_stopping.best)
+        data["wait"] = self.early_stopping.wait
+        self.state.save()
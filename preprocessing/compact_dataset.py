@@ -0,0 +1,137 @@
+# === Dataset Ringkas (Compact) untuk Training ===
+# Deskripsi: Menyimpan citra hasil preprocessing sebagai shard array uint8 berukuran tetap
+# (N, tinggi, lebar, 3) beserta indeks label, agar training bisa membukanya dengan
+# memory-map tanpa decode file gambar satu per satu. Indeks mencatat sidik jari manifest
+# preprocessing saat shard ditulis, sehingga shard yang tertinggal dari folder PNG
+# (preprocessing berikutnya dengan --format png) dapat dikenali dan tidak dipakai.
+
+import os
+import json
+import hashlib
+import shutil
+import numpy as np
+
+# Nama file indeks di dalam folder dataset ringkas
+INDEX_NAME = "index.json"
+
+# Jumlah gambar per shard (224x224x3 uint8 = ~150 KB per gambar, ~38 MB per shard)
+SHARD_SIZE = 256
+
+# Fungsi untuk sidik jari isi manifest preprocessing: hash setiap gambar sumber dan
+# parameter serta versi manifest yang memengaruhi isi gambar (format output tidak ikut)
+def source_digest(files, params, version=None):
+    params = {k: v for k, v in (params or {}).items() if k != "format"}
+    data = {"version": version, "params": params,
+            "files": {rel: entry["hash"] for rel, entry in files.items()}}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+# Kelas untuk menulis dataset ringkas ke folder sementara lalu menukarnya secara atomik
+class CompactWriter:
+    def __init__(self, path, image_size, class_names, shard_size=SHARD_SIZE, source=None):
+        self.path = path
+        self.source = source
+        self.tmp_path = path + ".tmp"
+        self.image_size = tuple(image_size)
+        self.class_names = list(class_names)
+        self.shard_size = shard_size
+        self.samples = []
+        self.shards = []
+        self._buffer = []
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+
+    # Menambahkan satu gambar RGB (tinggi, lebar, 3) uint8
+    def add(self, key, label, array, source_hash=None):
+        if array.shape != self.image_size + (3,) or array.dtype != np.uint8:
+            raise ValueError(f"Bentuk array tidak sesuai untuk {key}: {array.shape} {array.dtype}")
+        self.samples.append({
+            "key": key,
+            "label": self.class_names.index(label),
+            "hash": source_hash,
+            "shard": len(self.shards),
+            "row": len(self._buffer),
+        })
+        self._buffer.append(np.array(array))  # Salin agar tidak menahan memory-map lama
+        if len(self._buffer) == self.shard_size:
+            self._flush()
+
+    # Menulis isi buffer sebagai satu file shard .npy
+    def _flush(self):
+        if not self._buffer:
+            return
+        name = f"shard_{len(self.shards):05d}.npy"
+        np.save(os.path.join(self.tmp_path, name), np.stack(self._buffer))
+        self.shards.append({"file": name, "count": len(self._buffer)})
+        self._buffer = []
+
+    # Menutup writer: tulis indeks lalu ganti folder lama dengan yang baru
+    def close(self):
+        self._flush()
+        index = {
+            "version": 1,
+            "image_size": list(self.image_size),
+            "source": self.source,
+            "class_names": self.class_names,
+            "shards": self.shards,
+            "samples": self.samples,
+        }
+        with open(os.path.join(self.tmp_path, INDEX_NAME), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        old_path = self.path + ".old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(self.tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+# Kelas pembaca dataset ringkas; shard dibuka dengan mmap_mode="r"
+class CompactDataset:
+    def __init__(self, path):
+        with open(os.path.join(path, INDEX_NAME), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.path = path
+        self.image_size = tuple(index["image_size"])
+        self.source = index.get("source")
+        self.class_names = index["class_names"]
+        self.shards = [np.load(os.path.join(path, shard["file"]), mmap_mode="r")
+                       for shard in index["shards"]]
+        samples = index["samples"]
+        self.keys = [s["key"] for s in samples]
+        self.hashes = [s["hash"] for s in samples]
+        self.labels = np.array([s["label"] for s in samples], dtype=np.int64)
+        self._shard_of = np.array([s["shard"] for s in samples], dtype=np.int64)
+        self._row_of = np.array([s["row"] for s in samples], dtype=np.int64)
+        self._position = {key: i for i, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Mengambil satu gambar berdasarkan indeks sampel
+    def __getitem__(self, i):
+        return self.shards[self._shard_of[i]][self._row_of[i]]
+
+    # Mengambil beberapa gambar sekaligus sebagai satu batch uint8
+    def take(self, indices):
+        indices = np.asarray(indices)
+        batch = np.empty((len(indices),) + self.image_size + (3,), dtype=np.uint8)
+        for shard_id in np.unique(self._shard_of[indices]):
+            mask = self._shard_of[indices] == shard_id
+            batch[mask] = self.shards[shard_id][self._row_of[indices[mask]]]
+        return batch
+
+    # Mencari gambar berdasarkan key; None jika tidak ada atau hash sumber berbeda
+    def lookup(self, key, source_hash=None):
+        i = self._position.get(key)
+        if i is None or (source_hash is not None and self.hashes[i] != source_hash):
+            return None
+        return self[i]
+
+    # Melepaskan memory-map shard (diperlukan sebelum folder ditukar di Windows)
+    def close(self):
+        self.shards = []
+
+# Fungsi untuk membuka dataset ringkas; None jika belum dibuat
+def open_compact_dataset(path):
+    if not os.path.exists(os.path.join(path, INDEX_NAME)):
+        return None
+    return CompactDataset(path)
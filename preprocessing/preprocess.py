@@ -2,64 +2,370 @@
 # Deskripsi: Cropping, augmentasi, dan deteksi tepi (Canny)
 
 import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import cv2
 import numpy as np
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing.compact_dataset import CompactWriter, open_compact_dataset, source_digest
+from utils import tracing, progress
+
+# Flag decode OpenCV untuk membaca JPEG langsung pada skala 1/2, 1/4, atau 1/8
+# (skala DCT libjpeg, jauh lebih murah daripada decode penuh lalu resize)
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Fungsi untuk membaca gambar berwarna satu kali, opsional pada resolusi kecil.
+# work_size membatasi sisi terpanjang sebelum operasi berat (blur, Canny, warp).
+# Mengembalikan gambar dan faktor skala terhadap ukuran yang di-decode penuh.
+def load_image(image_path, decode_scale=1, work_size=None):
+    with tracing.span("imread"):
+        image = cv2.imread(image_path, DECODE_FLAGS[decode_scale])
+    if image is None:
+        raise ValueError(f"Gagal membaca gambar: {image_path}")
+    factor = 1.0 / decode_scale
+    rows, cols = image.shape[:2]
+    if work_size and max(rows, cols) > work_size:
+        ratio = work_size / max(rows, cols)
+        with tracing.span("resize_work"):
+            image = cv2.resize(image, (round(cols * ratio), round(rows * ratio)),
+                               interpolation=cv2.INTER_AREA)
+        factor *= ratio
+    return image, factor
+
+# Fungsi untuk mendeteksi tepi dari array grayscale
+def detect_edges(gray, low=20, high=60):
+    # Menghaluskan gambar untuk mengurangi noise
+    with tracing.span("gaussian_blur"):
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    # Menerapkan algoritma Canny untuk mendeteksi tepi
+    with tracing.span("canny"):
+        return cv2.Canny(blurred, low, high)
+
+# Fungsi untuk membuat variasi rotasi dan zoom dari array gambar
+def augment_arrays(image, angle=20, margin=30):
+    # --- Rotasi gambar sebesar `angle` derajat (default 20) ---
+    rows, cols = image.shape[:2]
+    # Matriks transformasi rotasi
+    M_rot = cv2.getRotationMatrix2D((cols / 2, rows / 2), angle, 1)
+    # Menerapkan rotasi pada gambar
+    with tracing.span("warp_affine"):
+        rotated = cv2.warpAffine(image, M_rot, (cols, rows))
+
+    # --- Zoom: crop bagian tengah lalu resize kembali ke ukuran asli ---
+    zoomed = image[margin:-margin, margin:-margin] if margin > 0 else image  # Crop bagian tengah gambar
+    with tracing.span("zoom_resize"):
+        zoomed = cv2.resize(zoomed, (cols, rows))  # Resize ke ukuran semula
+    return rotated, zoomed
 
 # Fungsi untuk menerapkan deteksi tepi menggunakan algoritma Canny
 def canny_edge(image_path, output_path, low=20, high=60):
     # Membaca gambar dalam format grayscale
-    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    # Menghaluskan gambar untuk mengurangi noise
-    blurred = cv2.GaussianBlur(image, (5, 5), 0)
-    # Menerapkan algoritma Canny untuk mendeteksi tepi
-    edges = cv2.Canny(blurred, low, high)
+    with tracing.span("imread"):
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"Gagal membaca gambar: {image_path}")
+    edges = detect_edges(image, low, high)
     # Menyimpan hasil gambar deteksi tepi
-    cv2.imwrite(output_path, edges)
+    with tracing.span("png_encode"):
+        cv2.imwrite(output_path, edges)
 
 # Fungsi untuk melakukan augmentasi gambar (rotasi dan zoom)
-def augment_image(image_path, output_folder):
+def augment_image(image_path, output_folder, angle=20, margin=30):
     # Membaca gambar berwarna
-    image = cv2.imread(image_path)
+    with tracing.span("imread"):
+        image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Gagal membaca gambar: {image_path}")
     basename = os.path.splitext(os.path.basename(image_path))[0]
 
-    # --- Rotasi gambar sebesar 20 derajat ---
-    rows, cols, _ = image.shape
-    # Matriks transformasi rotasi
-    M_rot = cv2.getRotationMatrix2D((cols / 2, rows / 2), 20, 1)
-    # Menerapkan rotasi pada gambar
-    rotated = cv2.warpAffine(image, M_rot, (cols, rows))
-    # Menyimpan hasil gambar rotasi
-    cv2.imwrite(os.path.join(output_folder, f"{basename}_rotated.png"), rotated)
+    rotated, zoomed = augment_arrays(image, angle, margin)
+    # Menyimpan hasil gambar rotasi dan zoom
+    with tracing.span("png_encode"):
+        cv2.imwrite(os.path.join(output_folder, f"{basename}_rotated.png"), rotated)
+        cv2.imwrite(os.path.join(output_folder, f"{basename}_zoomed.png"), zoomed)
 
-    # --- Zoom: crop bagian tengah lalu resize kembali ke ukuran asli ---
-    zoomed = image[30:-30, 30:-30]  # Crop bagian tengah gambar
-    zoomed = cv2.resize(zoomed, (cols, rows))  # Resize ke ukuran semula
-    # Menyimpan hasil gambar zoom
-    cv2.imwrite(os.path.join(output_folder, f"{basename}_zoomed.png"), zoomed)
+# Fungsi pipeline gabungan: decode sekali, lalu Canny, rotasi, dan zoom memakai buffer
+# yang sama. Input Canny diambil dari buffer berwarna dengan cvtColor (bukan decode
+# grayscale kedua seperti canny_edge()); pikselnya sedikit berbeda dari grayscale libjpeg
+# sehingga sebagian kecil piksel tepi bergeser, dan MANIFEST_VERSION dinaikkan agar output
+# lama dibuat ulang. Margin crop ikut diskalakan agar faktor zoom tetap.
+# Mengembalikan dict {nama file output: array gambar}
+def fused_pipeline(image_path, params):
+    image, factor = load_image(image_path, params["decode_scale"], params["work_size"])
+    img_name = os.path.basename(image_path)
 
-# Fungsi untuk memproses seluruh folder dataset (per label/kategori)
-def process_folder(input_folder, output_folder):
-    os.makedirs(output_folder, exist_ok=True)  # Membuat folder output jika belum ada
+    with tracing.span("to_gray"):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    edges = detect_edges(gray, params["low"], params["high"])
+
+    margin = max(1, round(params["margin"] * factor)) if params["margin"] > 0 else 0
+    rotated, zoomed = augment_arrays(image, params["angle"], margin)
+    return dict(zip(output_names(img_name), (edges, rotated, zoomed)))
+
+# Fungsi untuk mengubah output menjadi array RGB uint8 berukuran tetap (dataset ringkas)
+# Tepi Canny (grayscale) diulang ke 3 kanal seperti saat dibaca flow_from_directory
+def to_compact(array, size):
+    small = cv2.resize(array, (size, size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 2:
+        return cv2.cvtColor(small, cv2.COLOR_GRAY2RGB)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+# Nama file manifest yang disimpan di folder output
+MANIFEST_NAME = "manifest.json"
+# Versi isi output; dinaikkan jika hasil preprocessing berubah untuk parameter yang sama
+# agar output lama dibuat ulang (2: pipeline gabungan, grayscale Canny dari cvtColor)
+MANIFEST_VERSION = 2
 
+# Parameter default preprocessing (ikut dicatat di manifest)
+# decode_scale 1 dan work_size None = resolusi penuh seperti sebelumnya.
+# format: "png" (file gambar) atau "both" (file gambar + shard array ringkas). File PNG
+# selalu ditulis karena --cached-features dan update inkremental membacanya.
+DEFAULT_PARAMS = {"low": 20, "high": 60, "angle": 20, "margin": 30,
+                  "decode_scale": 1, "work_size": None,
+                  "format": "png", "compact_size": 224}
+
+# Folder default dataset ringkas
+COMPACT_DIR = "dataset_compact"
+
+# Fungsi untuk mendapatkan daftar file output dari satu gambar sumber
+def output_names(img_name):
+    basename = os.path.splitext(img_name)[0]
+    return [img_name, f"{basename}_rotated.png", f"{basename}_zoomed.png"]
+
+# Fungsi untuk memproses satu gambar (Canny + augmentasi)
+# Error ditangkap dan dikembalikan agar gambar lain tetap diproses.
+# Untuk format both, array kecil untuk dataset ringkas dikembalikan ke proses utama.
+def process_image(task):
+    img_in, output_path, params = task
+    compact = {}
+    try:
+        with tracing.span("process_image", file=os.path.basename(img_in)):
+            # Deteksi tepi (Canny) dan augmentasi (rotasi dan zoom) dengan satu kali decode
+            outputs = fused_pipeline(img_in, params)
+            for name, array in outputs.items():
+                with tracing.span("png_encode"):
+                    cv2.imwrite(os.path.join(output_path, name), array)
+                if params["format"] == "both":
+                    with tracing.span("to_compact"):
+                        compact[name] = to_compact(array, params["compact_size"])
+    except Exception as e:
+        tracing.counter("images_failed")
+        return img_in, str(e), None
+    tracing.counter("images_processed")
+    return img_in, None, compact
+
+# Versi process_image untuk worker: event trace ikut dikirim ke proses utama
+def _process_image_traced(task):
+    return process_image(task), tracing.drain()
+
+# Inisialisasi proses worker: OpenCV dibatasi 1 thread agar tidak berebut core
+def _init_worker():
+    cv2.setNumThreads(1)
+
+# Fungsi untuk menghitung hash SHA-256 isi file
+@tracing.traced("file_hash")
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# Fungsi untuk membaca manifest; manifest kosong jika belum ada atau rusak
+def load_manifest(output_folder):
+    try:
+        with open(os.path.join(output_folder, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": None, "params": None, "files": {}}
+
+# Fungsi untuk menyimpan manifest secara atomik (tulis file sementara lalu replace)
+def save_manifest(output_folder, manifest):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# Fungsi untuk mengumpulkan daftar label dan gambar sumber per label
+# Sumber berupa tuple (path relatif, path input, folder output)
+def collect_sources(input_folder, output_folder):
+    labels = []
+    sources = []
     # Iterasi setiap subfolder/label (misalnya: Visual, Auditory, Kinesthetic)
-    for label in os.listdir(input_folder):
+    for label in sorted(os.listdir(input_folder)):
         input_path = os.path.join(input_folder, label)
+        if not os.path.isdir(input_path):
+            continue
+        labels.append(label)
         output_path = os.path.join(output_folder, label)
         os.makedirs(output_path, exist_ok=True)  # Membuat folder untuk masing-masing label
 
         # Iterasi setiap gambar dalam folder label
-        for img_name in os.listdir(input_path):
-            img_in = os.path.join(input_path, img_name)
-            img_out = os.path.join(output_path, img_name)
+        for img_name in sorted(os.listdir(input_path)):
+            sources.append((f"{label}/{img_name}", os.path.join(input_path, img_name), output_path))
+    return labels, sources
+
+# Fungsi untuk mengecek apakah gambar sumber masih sama dengan catatan manifest
+# Ukuran + mtime dicek dulu agar hash hanya dihitung untuk file yang tersentuh
+def is_unchanged(entry, img_in, output_folder, stat):
+    if entry is None:
+        return False
+    if not all(os.path.exists(os.path.join(output_folder, out)) for out in entry["outputs"]):
+        return False
+    if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return entry["size"] == stat.st_size and entry["hash"] == file_hash(img_in)
 
-            # Deteksi tepi menggunakan Canny
-            canny_edge(img_in, img_out)
+# Fungsi untuk menyusun dataset ringkas dari array baru dan baris lama yang tidak berubah
+def write_compact(compact_dir, labels, files, fresh, old_compact, params):
+    size = params["compact_size"]
+    writer = CompactWriter(compact_dir, (size, size), labels,
+                           source=source_digest(files, params, MANIFEST_VERSION))
+    for rel in sorted(files):
+        label, img_name = rel.split("/", 1)
+        for name in output_names(img_name):
+            key = f"{label}/{name}"
+            array = fresh[rel][name] if rel in fresh else old_compact.lookup(key, files[rel]["hash"])
+            if array is None:
+                raise RuntimeError(f"Data ringkas untuk {key} tidak ditemukan, jalankan dengan --full")
+            writer.add(key, label, array, files[rel]["hash"])
+    # Lepaskan memory-map lama sebelum folder ditukar
+    if old_compact is not None:
+        old_compact.close()
+    writer.close()
 
-            # Augmentasi gambar (rotasi dan zoom)
-            augment_image(img_in, output_path)
+# Fungsi untuk memproses seluruh folder dataset (per label/kategori)
+# Hanya gambar baru/berubah yang diproses; output yatim (orphan) dihapus.
+# workers > 1 menjalankan process pool; hasilnya identik dengan mode serial
+def process_folder(input_folder, output_folder, workers=1, chunksize=None,
+                   params=None, full=False, compact_dir=COMPACT_DIR):
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    os.makedirs(output_folder, exist_ok=True)  # Membuat folder output jika belum ada
+
+    manifest = load_manifest(output_folder)
+    old_files = manifest["files"]
+    # Jika parameter berubah, semua gambar harus diproses ulang
+    reuse = not full and manifest.get("version") == MANIFEST_VERSION and manifest["params"] == params
+    use_compact = params["format"] == "both"
+    old_compact = open_compact_dataset(compact_dir) if use_compact and reuse else None
+    if use_compact and old_compact is None:
+        reuse = False
+
+    new_files = {}
+    todo = []
+    labels, sources = collect_sources(input_folder, output_folder)
+    for rel, img_in, output_path in sources:
+        stat = os.stat(img_in)
+        entry = old_files.get(rel) if reuse else None
+        if is_unchanged(entry, img_in, output_folder, stat):
+            new_files[rel] = dict(entry, mtime_ns=stat.st_mtime_ns)
+        else:
+            todo.append((rel, img_in, output_path, stat))
+
+    tasks = [(img_in, output_path, params) for _, img_in, output_path, _ in todo]
+    if workers > 1 and len(tasks) > 1:
+        # Tugas dikirim per potongan (chunk) untuk mengurangi overhead antar-proses
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = []
+            for result, events in executor.map(_process_image_traced, tasks, chunksize=chunksize):
+                tracing.add_events(events)
+                results.append(result)
+                progress.report("preprocess", force=len(results) == len(tasks), done=len(results), total=len(tasks))
+    else:
+        results = []
+        for task in tasks:
+            results.append(process_image(task))
+            progress.report("preprocess", force=len(results) == len(tasks), done=len(results), total=len(tasks))
+
+    # Kumpulkan gambar yang gagal diproses; yang berhasil dicatat ke manifest
+    failures = []
+    fresh = {}
+    for (rel, img_in, _, stat), (_, error, compact) in zip(todo, results):
+        if error is not None:
+            failures.append((img_in, error))
+            continue
+        label, img_name = rel.split("/", 1)
+        fresh[rel] = compact
+        new_files[rel] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": file_hash(img_in),
+            "outputs": [f"{label}/{name}" for name in output_names(img_name)],
+        }
+
+    # Tulis ulang dataset ringkas jika ada gambar baru, berubah, atau terhapus
+    if use_compact and (fresh or old_compact is None or set(old_files) != set(new_files)):
+        with tracing.span("write_compact"):
+            write_compact(compact_dir, labels, new_files, fresh, old_compact, params)
+
+    # Hapus output milik gambar sumber yang sudah tidak ada
+    kept = {out for entry in new_files.values() for out in entry["outputs"]}
+    removed = 0
+    for entry in old_files.values():
+        for out in entry["outputs"]:
+            out_path = os.path.join(output_folder, out)
+            if out not in kept and os.path.exists(out_path):
+                os.remove(out_path)
+                removed += 1
+
+    save_manifest(output_folder, {"version": MANIFEST_VERSION, "params": params, "files": new_files})
+    return {
+        "total": len(new_files) + len(failures),
+        "processed": len(tasks) - len(failures),
+        "skipped": len(new_files) - (len(tasks) - len(failures)),
+        "removed": removed,
+        "failures": failures,
+    }
 
 # Fungsi utama yang dipanggil saat program dijalankan
 if __name__ == "__main__":
-    process_folder("dataset", "dataset_processed")
-    print("Preprocessing selesai!")
+    parser = argparse.ArgumentParser(description="Preprocessing dataset citra telapak tangan")
+    parser.add_argument("--input", default="DATASET", help="Folder dataset sumber")
+    parser.add_argument("--output", default="dataset_processed", help="Folder hasil preprocessing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Jumlah proses worker (1 = serial)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Jumlah gambar per tugas yang dikirim ke worker")
+    parser.add_argument("--low", type=int, default=DEFAULT_PARAMS["low"], help="Threshold bawah Canny")
+    parser.add_argument("--high", type=int, default=DEFAULT_PARAMS["high"], help="Threshold atas Canny")
+    parser.add_argument("--angle", type=float, default=DEFAULT_PARAMS["angle"], help="Sudut rotasi augmentasi")
+    parser.add_argument("--margin", type=int, default=DEFAULT_PARAMS["margin"], help="Margin crop untuk zoom")
+    parser.add_argument("--decode-scale", type=int, choices=sorted(DECODE_FLAGS), default=1,
+                        help="Decode JPEG langsung pada skala 1/N")
+    parser.add_argument("--work-size", type=int, default=None,
+                        help="Batas sisi terpanjang gambar kerja sebelum blur/Canny/rotasi")
+    parser.add_argument("--format", choices=["png", "both"], default=DEFAULT_PARAMS["format"],
+                        help="Simpan sebagai file PNG saja, atau PNG + shard array ringkas untuk training")
+    parser.add_argument("--compact-size", type=int, default=DEFAULT_PARAMS["compact_size"],
+                        help="Resolusi (persegi) gambar di dataset ringkas")
+    parser.add_argument("--compact-dir", default=COMPACT_DIR, help="Folder dataset ringkas")
+    parser.add_argument("--full", action="store_true", help="Abaikan manifest dan proses ulang semua gambar")
+    args = parser.parse_args()
+
+    params = {"low": args.low, "high": args.high, "angle": args.angle, "margin": args.margin,
+              "decode_scale": args.decode_scale, "work_size": args.work_size,
+              "format": args.format, "compact_size": args.compact_size}
+    with tracing.span("process_folder"):
+        summary = process_folder(args.input, args.output, args.workers, args.chunksize,
+                                 params=params, full=args.full, compact_dir=args.compact_dir)
+    failures = summary["failures"]
+    print(f"Preprocessing selesai! {summary['processed']} diproses, {summary['skipped']} tidak berubah, "
+          f"{summary['removed']} output lama dihapus.")
+    if failures:
+        print(f"{len(failures)} gambar gagal diproses:")
+        for img_in, error in failures:
+            print(f"  - {img_in}: {error}")
+        sys.exit(1)
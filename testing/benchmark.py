@@ -0,0 +1,314 @@
+# === Benchmark End-to-End ===
+# Deskripsi: Mengukur jalur panas preprocessing (canny_edge, augment_image), training
+# (gambar/detik lewat model.fit), prediksi (latensi p50/p99 per ukuran batch), dan waktu
+# proses-mulai-sampai-prediksi-pertama (.h5 vs artefak siap-inferensi) di CPU
+# memakai gambar sintetis 1600x1200 mirip telapak tangan, sehingga tidak butuh data asli.
+#
+# Pemakaian:
+#   python testing/benchmark.py run --output hasil.json
+#   python testing/benchmark.py compare baseline.json hasil.json --threshold 10
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import cv2
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from preprocessing.preprocess import canny_edge, augment_image, fused_pipeline, process_folder, DEFAULT_PARAMS
+
+CLASS_NAMES = ['Auditori', 'Kinestetik', 'Visual']
+BATCH_SIZES = (1, 4, 8, 16)
+
+# Fungsi untuk membuat satu gambar sintetis mirip telapak tangan (BGR, 1600x1200)
+def synthetic_palm(rng, width=1600, height=1200):
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = rng.integers(190, 245, 3)
+    skin = tuple(int(c) for c in (rng.integers(110, 160), rng.integers(140, 185), rng.integers(185, 235)))
+    cx, cy = width // 2 + int(rng.integers(-120, 120)), height // 2 + 180
+    cv2.ellipse(img, (cx, cy), (360, 400), float(rng.uniform(-15, 15)), 0, 360, skin, -1)
+    # Jari
+    for i in range(4):
+        x = cx - 270 + i * 180
+        top = cy - 330 - int(rng.integers(280, 420))
+        cv2.line(img, (x, cy - 250), (x + int(rng.integers(-40, 40)), top), skin, 120)
+    cv2.line(img, (cx + 330, cy + 60), (cx + 560, cy - 200), skin, 130)  # Ibu jari
+    # Garis tangan: kurva Bezier kuadrat berwarna lebih gelap
+    crease = tuple(max(0, c - 70) for c in skin)
+    t = np.linspace(0, 1, 60)[:, None]
+    for _ in range(int(rng.integers(3, 7))):
+        p0, p1, p2 = (np.array([cx, cy]) + rng.integers(-330, 330, (3, 2)))
+        points = ((1 - t) ** 2 * p0 + 2 * (1 - t) * t * p1 + t ** 2 * p2).astype(np.int32)
+        cv2.polylines(img, [points], False, crease, int(rng.integers(3, 9)), cv2.LINE_AA)
+    noise = rng.normal(0, 6, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(img, (3, 3), 0)
+
+# Fungsi untuk menulis dataset sintetis dengan struktur DATASET/<Kelas>/*.jpg
+def make_dataset(folder, per_class, seed=0):
+    rng = np.random.default_rng(seed)
+    paths = []
+    for label in CLASS_NAMES:
+        os.makedirs(os.path.join(folder, label), exist_ok=True)
+        for i in range(per_class):
+            path = os.path.join(folder, label, f"sintetis_{i:04d}.jpg")
+            cv2.imwrite(path, synthetic_palm(rng), [cv2.IMWRITE_JPEG_QUALITY, 90])
+            paths.append(path)
+    return paths
+
+# Fungsi untuk meringkas daftar durasi (detik) menjadi p50/p99/rata-rata dalam milidetik
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    return {"p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99)), "mean": float(ms.mean())}
+
+# Fungsi untuk menjalankan fn berulang kali dan mencatat durasi setiap panggilan
+def time_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+# Fungsi untuk mencatat satu metrik; better = "lower" (latensi) atau "higher" (throughput)
+def add_metric(metrics, name, value, unit, better):
+    metrics[name] = {"value": round(float(value), 4), "unit": unit, "better": better}
+
+def add_latency(metrics, name, samples):
+    for stat, value in summarize(samples).items():
+        add_metric(metrics, f"{name}.{stat}", value, "ms", "lower")
+
+# Benchmark preprocessing: per gambar (fungsi lama & pipeline gabungan) dan satu folder penuh
+def bench_preprocess(paths, workdir, workers):
+    metrics = {}
+    out = os.path.join(workdir, "bench_preprocess")
+    os.makedirs(out, exist_ok=True)
+    add_latency(metrics, "preprocess.canny_edge",
+                time_calls(canny_edge, [(p, os.path.join(out, os.path.basename(p))) for p in paths]))
+    add_latency(metrics, "preprocess.augment_image", time_calls(augment_image, [(p, out) for p in paths]))
+    add_latency(metrics, "preprocess.fused_pipeline",
+                time_calls(fused_pipeline, [(p, DEFAULT_PARAMS) for p in paths]))
+
+    dataset_dir = os.path.dirname(os.path.dirname(paths[0]))
+    processed = os.path.join(workdir, "dataset_processed")
+    start = time.perf_counter()
+    summary = process_folder(dataset_dir, processed, workers=workers, full=True,
+                             compact_dir=os.path.join(workdir, "dataset_compact"))
+    elapsed = time.perf_counter() - start
+    add_metric(metrics, "preprocess.folder_throughput", summary["processed"] / elapsed, "gambar/detik", "higher")
+    return metrics, processed
+
+# Benchmark training: gambar/detik lewat model.fit (epoch pertama = pemanasan, tidak dihitung)
+def bench_train(processed, batch_size, steps, epochs):
+    import tensorflow as tf
+    from model.data_pipeline import dataset_from_directory
+    from model.train_model import build_model
+
+    train_ds, class_names, _ = dataset_from_directory(processed, 'training', batch_size)
+    model, _ = build_model(len(class_names), weights=None)
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            durations.append(time.perf_counter() - self.start)
+
+    durations = []
+    model.fit(train_ds.repeat(), steps_per_epoch=steps, epochs=epochs + 1, verbose=0, callbacks=[EpochTimer()])
+    metrics = {}
+    rate = steps * batch_size * epochs / sum(durations[1:])
+    add_metric(metrics, "train.fit_throughput", rate, "gambar/detik", "higher")
+    add_metric(metrics, "train.first_epoch", durations[0], "detik", "lower")
+    return metrics
+
+# Benchmark prediksi: latensi predict_batch per ukuran batch dan predict_path end-to-end
+def bench_predict(paths, model_path, repeats):
+    from app.inference import input_size, load_input, predict_batch, predict_path
+    if model_path:
+        from app.inference import load_model
+        model = load_model(model_path, prefer_compiled=False)
+    else:
+        from model.train_model import build_model
+        model, _ = build_model(weights=None)
+
+    arrays = [load_input(p, input_size(model)) for p in paths[:max(BATCH_SIZES)]]
+    while len(arrays) < max(BATCH_SIZES):
+        arrays += arrays
+    metrics = {}
+    for batch_size in BATCH_SIZES:
+        batch = arrays[:batch_size]
+        predict_batch(model, batch)  # Pemanasan (tracing untuk bentuk batch ini)
+        samples = time_calls(predict_batch, [(model, batch)] * repeats)
+        add_latency(metrics, f"predict.batch_{batch_size}", samples)
+        add_metric(metrics, f"predict.batch_{batch_size}.throughput",
+                   batch_size / np.median(samples), "gambar/detik", "higher")
+    add_latency(metrics, "predict.predict_path",
+                time_calls(predict_path, [(model, paths[i % len(paths)]) for i in range(repeats)]))
+    return metrics
+
+# Skrip proses anak untuk benchmark startup: muat model lewat load_model() seperti aplikasi,
+# prediksi satu gambar, lalu cetak jam dinding dan jenis model yang benar-benar dimuat
+STARTUP_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+import numpy as np
+from app.inference import input_size, load_model, predict_batch
+model = load_model(sys.argv[2])
+predict_batch(model, [np.zeros(input_size(model) + (3,), dtype=np.float32)])
+print(time.time(), type(model).__name__)
+"""
+
+# Benchmark startup: median waktu dari proses Python dimulai sampai prediksi pertama selesai,
+# untuk jalur .h5 (VAK_COMPILED=0) dan artefak siap-inferensi. Mengembalikan {jalur: detik}.
+def bench_startup(model_path, repeats=3):
+    results = {}
+    for name, flag in (("h5", "0"), ("compiled", "1")):
+        env = dict(os.environ, VAK_COMPILED=flag)
+        samples = []
+        for _ in range(repeats):
+            start = time.time()
+            out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, ROOT, model_path], env=env,
+                                 capture_output=True, text=True, check=True).stdout.split()
+            if name == "compiled" and out[-1] != "CompiledModel":
+                raise RuntimeError(f"Artefak siap-inferensi untuk {model_path} tidak ada atau usang")
+            samples.append(float(out[-2]) - start)
+        results[name] = float(np.median(samples))
+    return results
+
+# Benchmark startup pada salinan model di workdir (artefak dibuat di sana, bukan di folder model)
+def bench_startup_metrics(model_path, workdir, repeats):
+    from model.export_compiled import export_compiled
+    path = os.path.join(workdir, "model_startup.h5")
+    if model_path:
+        shutil.copyfile(model_path, path)
+        from app.inference import load_model
+        model = load_model(path, prefer_compiled=False)
+    else:
+        from model.train_model import build_model
+        model, _ = build_model(weights=None)
+        model.save(path)
+    export_compiled(model, path)
+    metrics = {}
+    for name, seconds in bench_startup(path, repeats).items():
+        add_metric(metrics, f"startup.{name}_first_prediction", seconds, "detik", "lower")
+    return metrics
+
+# Fungsi untuk mengumpulkan metadata mesin agar hasil dapat dibandingkan secara adil
+def machine_metadata():
+    metadata = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+    try:
+        import tensorflow as tf
+        metadata["tensorflow"] = tf.__version__
+    except ImportError:
+        pass
+    try:
+        metadata["git_commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        pass
+    return metadata
+
+# Perintah "run": jalankan tahap yang dipilih dan simpan hasil sebagai JSON
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="vak_bench_")
+    try:
+        paths = make_dataset(os.path.join(workdir, "DATASET"), args.images_per_class, args.seed)
+        metrics = {}
+        processed = None
+        if "preprocess" in args.stages or "train" in args.stages:
+            stage_metrics, processed = bench_preprocess(paths, workdir, args.workers)
+            if "preprocess" in args.stages:
+                metrics.update(stage_metrics)
+        if "train" in args.stages:
+            metrics.update(bench_train(processed, args.batch_size, args.train_steps, args.train_epochs))
+        if "predict" in args.stages:
+            metrics.update(bench_predict(paths, args.model, args.repeats))
+        if "startup" in args.stages:
+            metrics.update(bench_startup_metrics(args.model, workdir, args.startup_repeats))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {"metadata": machine_metadata(), "config": {k: v for k, v in vars(args).items() if k != "func"},
+              "metrics": metrics}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    for name, metric in metrics.items():
+        print(f"{name:<40} {metric['value']:>12.2f} {metric['unit']}")
+    print(f"Hasil benchmark disimpan ke {args.output}")
+
+# Perintah "compare": tandai metrik yang memburuk lebih dari threshold (%) dibanding baseline
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    for key in ("processor", "cpu_count"):
+        if baseline["metadata"].get(key) != current["metadata"].get(key):
+            print(f"⚠️ Mesin berbeda ({key}): {baseline['metadata'].get(key)} vs {current['metadata'].get(key)}")
+
+    regressions = []
+    print(f"{'Metrik':<40} {'Baseline':>12} {'Sekarang':>12} {'Perubahan':>10}")
+    for name, metric in current["metrics"].items():
+        if name not in baseline["metrics"]:
+            continue
+        old, new = baseline["metrics"][name]["value"], metric["value"]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = change > args.threshold if metric["better"] == "lower" else change < -args.threshold
+        flag = "  REGRESI" if worse else ""
+        print(f"{name:<40} {old:>12.2f} {new:>12.2f} {change:>+9.1f}%{flag}")
+        if worse:
+            regressions.append(name)
+    if regressions:
+        print(f"{len(regressions)} metrik memburuk lebih dari {args.threshold}%")
+        sys.exit(1)
+    print("Tidak ada regresi")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, training dan prediksi")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Jalankan benchmark")
+    run_parser.add_argument("--output", default="benchmark_hasil.json")
+    run_parser.add_argument("--stages", nargs="+", choices=["preprocess", "train", "predict", "startup"],
+                            default=["preprocess", "train", "predict", "startup"])
+    run_parser.add_argument("--images-per-class", type=int, default=8, help="Jumlah gambar sintetis per kelas")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Jumlah proses worker preprocessing folder")
+    run_parser.add_argument("--batch-size", type=int, default=16, help="Ukuran batch training")
+    run_parser.add_argument("--train-steps", type=int, default=5, help="Jumlah step per epoch training")
+    run_parser.add_argument("--train-epochs", type=int, default=2, help="Jumlah epoch yang diukur")
+    run_parser.add_argument("--repeats", type=int, default=30, help="Jumlah ulangan per ukuran batch prediksi")
+    run_parser.add_argument("--startup-repeats", type=int, default=3,
+                            help="Jumlah proses baru per jalur pada benchmark startup")
+    run_parser.add_argument("--model", default=None,
+                            help="File model .h5 untuk benchmark prediksi dan startup "
+                                 "(default: MobileNetV2 tanpa bobot)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Bandingkan hasil dengan baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Batas regresi dalam persen")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,378 @@
+# === Evaluasi Model (Stratified K-Fold dan Confusion Matrix) ===
+# Deskripsi: Mengukur kualitas model lebih andal daripada satu val_accuracy dari split 20%.
+#
+# Mode k-fold (default): gambar sumber dibagi ke K fold secara berstrata per kelas;
+# semua output augmentasi satu gambar sumber selalu berada di fold yang sama agar tidak
+# bocor ke data uji. Fitur MobileNetV2 (backbone beku) dihitung sekali lewat cache fitur,
+# lalu setiap fold melatih head di proses worker terpisah secara paralel dan memprediksi
+# gambar uji fold tersebut dalam satu batch.
+#
+# Mode --model: mengevaluasi file model yang sudah ada (Keras .h5 atau .tflite) dengan
+# inferensi per batch dan decode paralel.
+#
+# Prediksi di-cache per (model, hash gambar): fold yang data latih dan konfigurasinya tidak
+# berubah tidak dilatih ulang. Hasil: precision/recall/F1 per kelas, confusion matrix,
+# dan throughput, dicetak dan disimpan sebagai JSON.
+#
+# Pemakaian:
+#   python testing/evaluate.py --folds 5 --workers 4
+#   python testing/evaluate.py --model model/model_palmistry.h5 --subset validation
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing.preprocess import load_manifest
+from utils import tracing
+
+DATASET_DIR = "dataset_processed"
+REPORT_PATH = "hasil_prediksi/evaluasi.json"
+EVAL_CACHE_PATH = "hasil_prediksi/evaluation_cache.sqlite"
+
+# Kelas cache prediksi evaluasi: probabilitas per (kunci model, hash gambar). Berbeda dengan
+# PredictionCache aplikasi, entri banyak model (satu per fold) disimpan berdampingan.
+class EvaluationCache:
+    def __init__(self, path=EVAL_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS predictions (
+            model_key TEXT NOT NULL, image_hash TEXT NOT NULL, probs TEXT NOT NULL,
+            PRIMARY KEY (model_key, image_hash))""")
+        self.db.commit()
+
+    # Probabilitas yang tersimpan untuk daftar hash: {hash: array}
+    def get_many(self, model_key, hashes):
+        found = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT image_hash, probs FROM predictions WHERE model_key = ? AND image_hash IN "
+                f"({','.join('?' * len(chunk))})", [model_key] + chunk)
+            found.update((h, np.asarray(json.loads(p), dtype=np.float32)) for h, p in rows)
+        return found
+
+    def put_many(self, model_key, hashes, probs):
+        self.db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                            [(model_key, h, json.dumps([round(float(x), 6) for x in p]))
+                             for h, p in zip(hashes, probs)])
+        self.db.commit()
+
+# Fungsi untuk mengelompokkan file dataset per gambar sumber: {kunci: {"label", "paths", "original"}}.
+# Memakai manifest preprocessing; file di luar manifest dikelompokkan dari namanya
+# (<nama>_rotated.png / <nama>_zoomed.png milik <nama>). "original" = output tanpa augmentasi.
+def collect_groups(dataset_dir):
+    from model.data_pipeline import list_image_files
+    paths, labels, class_names = list_image_files(dataset_dir, validation_split=0)
+    source_of = {}
+    for rel, entry in load_manifest(dataset_dir)["files"].items():
+        for out in entry["outputs"]:
+            source_of[os.path.normpath(os.path.join(dataset_dir, out))] = rel
+    groups = {}
+    for path, label in zip(paths, labels):
+        base = os.path.splitext(path)[0]
+        augmented = base.endswith(("_rotated", "_zoomed"))
+        key = source_of.get(os.path.normpath(path))
+        if key is None:
+            key = base.rsplit("_", 1)[0] if augmented else base
+        group = groups.setdefault(key, {"label": label, "paths": [], "original": None})
+        group["paths"].append(path)
+        if not augmented and group["original"] is None:
+            group["original"] = path
+    for group in groups.values():
+        group["original"] = group["original"] or group["paths"][0]
+    return groups, class_names
+
+# Fungsi untuk membagi gambar sumber ke k fold, berstrata per kelas (acak dengan seed)
+def stratified_folds(groups, k, seed=0):
+    rng = random.Random(seed)
+    fold_of = {}
+    by_label = {}
+    for key in sorted(groups):
+        by_label.setdefault(groups[key]["label"], []).append(key)
+    offset = 0
+    for label in sorted(by_label):
+        keys = by_label[label]
+        rng.shuffle(keys)
+        # Offset bergeser antar kelas agar fold pertama tidak selalu mendapat sisa pembagian
+        for i, key in enumerate(keys):
+            fold_of[key] = (i + offset) % k
+        offset += len(keys)
+    return fold_of
+
+# Fungsi untuk menghitung confusion matrix (baris = kelas sebenarnya, kolom = prediksi)
+# serta precision, recall, F1, dan support per kelas
+def classification_metrics(y_true, y_pred, class_names):
+    n = len(class_names)
+    matrix = np.zeros((n, n), dtype=np.int64)
+    np.add.at(matrix, (np.asarray(y_true, dtype=np.int64), np.asarray(y_pred, dtype=np.int64)), 1)
+    per_class = {}
+    for i, name in enumerate(class_names):
+        tp = int(matrix[i, i])
+        predicted, actual = int(matrix[:, i].sum()), int(matrix[i].sum())
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[name] = {"precision": round(precision, 4), "recall": round(recall, 4),
+                           "f1": round(f1, 4), "support": actual}
+    total = int(matrix.sum())
+    return {
+        "accuracy": round(float(np.trace(matrix)) / total, 4) if total else None,
+        "macro_f1": round(float(np.mean([c["f1"] for c in per_class.values()])), 4) if per_class else None,
+        "per_class": per_class,
+        "confusion_matrix": matrix.tolist(),
+    }
+
+# Fungsi untuk mencetak metrik sebagai tabel
+def print_metrics(metrics, class_names):
+    width = max(10, max(len(name) for name in class_names) + 1)
+    print(f"\n{'Kelas':<{width}} {'Precision':>9} {'Recall':>8} {'F1':>8} {'Support':>8}")
+    for name, row in metrics["per_class"].items():
+        print(f"{name:<{width}} {row['precision']:>9.4f} {row['recall']:>8.4f} {row['f1']:>8.4f} {row['support']:>8}")
+    print(f"Akurasi: {metrics['accuracy']}, macro F1: {metrics['macro_f1']}")
+    print(f"\nConfusion matrix (baris = sebenarnya, kolom = prediksi):")
+    print(" " * width + "".join(f"{name[:width - 1]:>{width}}" for name in class_names))
+    for name, row in zip(class_names, metrics["confusion_matrix"]):
+        print(f"{name:<{width}}" + "".join(f"{v:>{width}}" for v in row))
+
+# Inisialisasi proses worker: batasi thread TensorFlow agar fold paralel tidak berebut CPU
+def _init_worker(threads):
+    from model.train_model import configure_threads
+    configure_threads(threads, 1)
+
+# Fungsi (proses worker) untuk melatih head satu fold di atas fitur yang di-cache dan
+# memprediksi gambar uji fold itu dalam satu batch. Fitur dibaca dari file .npy (memmap).
+def _train_fold(task):
+    import tensorflow as tf
+    from model.train_model import build_head
+    from model.feature_cache import features_dataset
+    features = np.load(task["features_path"], mmap_mode="r")
+    tf.keras.utils.set_random_seed(task["seed"])
+    head = build_head(features.shape[-1], task["num_classes"], task["learning_rate"])
+    start = time.perf_counter()
+    train_features = np.asarray(features[task["train_idx"]], dtype=np.float32)
+    head.fit(features_dataset(train_features, np.asarray(task["train_labels"]), task["num_classes"],
+                              task["batch_size"], training=True), epochs=task["epochs"], verbose=0)
+    train_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    probs = np.asarray(head.predict_on_batch(np.asarray(features[task["test_idx"], 0], dtype=np.float32)))
+    return probs, train_seconds, time.perf_counter() - start
+
+# Fungsi evaluasi stratified k-fold; mengembalikan laporan (dict)
+def evaluate_kfold(dataset_dir, folds=5, workers=1, epochs=10, batch_size=16, learning_rate=1e-3,
+                   variants=2, profile=None, weights="imagenet", seed=0, cache=None):
+    from model.feature_cache import FeatureCache, build_extractor, extract_features
+    from model.profiles import DEFAULT_PROFILE, get_profile
+    from model.train_model import build_model
+
+    profile = profile or DEFAULT_PROFILE
+    wall_start = time.perf_counter()
+    groups, class_names = collect_groups(dataset_dir)
+    fold_of = stratified_folds(groups, folds, seed)
+    smallest = min(sum(1 for g in groups.values() if g["label"] == i) for i in range(len(class_names)))
+    if smallest < folds:
+        print(f"Peringatan: kelas terkecil hanya punya {smallest} gambar sumber untuk {folds} fold")
+
+    all_paths = sorted({p for g in groups.values() for p in g["paths"]})
+    index_of = {p: i for i, p in enumerate(all_paths)}
+    label_of = {p: g["label"] for g in groups.values() for p in g["paths"]}
+
+    # Fitur backbone sekali untuk semua gambar (varian augmentasi dari cache fitur)
+    start = time.perf_counter()
+    with tracing.span("extract_features"):
+        _, base_model = build_model(len(class_names), weights=weights, profile=profile)
+        feature_cache = FeatureCache(f"{profile}_{weights or 'acak'}")
+        features = extract_features(all_paths, build_extractor(base_model), feature_cache, variants,
+                                    image_size=get_profile(profile)["image_size"])
+        # Hash isi dari cache fitur (sudah dihitung/diingat oleh extract_features)
+        hashes = feature_cache.image_hashes(all_paths)
+    extract_seconds = time.perf_counter() - start
+
+    config = {"profile": profile, "weights": weights, "epochs": epochs, "batch_size": batch_size,
+              "learning_rate": learning_rate, "variants": variants, "seed": seed}
+    tasks, fold_info = [], []
+    y_true, y_pred = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        features_path = os.path.join(tmp, "features.npy")
+        np.save(features_path, features)
+        for fold in range(folds):
+            train_idx = sorted(index_of[p] for key, g in groups.items() if fold_of[key] != fold for p in g["paths"])
+            test_paths = sorted(g["original"] for key, g in groups.items() if fold_of[key] == fold)
+            test_idx = [index_of[p] for p in test_paths]
+            # Kunci model fold: konfigurasi + isi data latih; sama -> prediksi lama dipakai ulang
+            model_key = hashlib.sha256(json.dumps(
+                dict(config, train=sorted(hashes[i] for i in train_idx)), sort_keys=True).encode()).hexdigest()[:16]
+            cached = cache.get_many(model_key, (hashes[i] for i in test_idx)) if cache is not None else {}
+            info = {"fold": fold, "train_images": len(train_idx), "test_images": len(test_idx),
+                    "model_key": model_key, "test_idx": test_idx, "cached": len(cached) == len(test_idx)}
+            fold_info.append(info)
+            if info["cached"]:
+                info["probs"] = np.stack([cached[hashes[i]] for i in test_idx]) if test_idx else None
+            elif test_idx:
+                tasks.append((info, {"features_path": features_path, "train_idx": train_idx,
+                                     "train_labels": [label_of[all_paths[i]] for i in train_idx],
+                                     "test_idx": test_idx, "num_classes": len(class_names), "epochs": epochs,
+                                     "batch_size": batch_size, "learning_rate": learning_rate,
+                                     "seed": seed + fold}))
+
+        print(f"{len(groups)} gambar sumber, {len(all_paths)} file, {folds} fold; "
+              f"{len(tasks)} fold dilatih, {folds - len(tasks)} dari cache")
+        start = time.perf_counter()
+        if workers > 1 and len(tasks) > 1:
+            # spawn: TensorFlow di proses induk tidak aman di-fork
+            threads = max(1, (os.cpu_count() or 1) // min(workers, len(tasks)))
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(threads,)) as executor:
+                results = list(executor.map(_train_fold, [task for _, task in tasks]))
+        else:
+            results = [_train_fold(task) for _, task in tasks]
+        folds_seconds = time.perf_counter() - start
+
+    for (info, _), (probs, train_seconds, predict_seconds) in zip(tasks, results):
+        info.update(probs=probs, train_seconds=round(train_seconds, 2),
+                    predict_images_per_second=round(len(info["test_idx"]) / max(predict_seconds, 1e-9), 1))
+        if cache is not None:
+            cache.put_many(info["model_key"], [hashes[i] for i in info["test_idx"]], probs)
+
+    for info in fold_info:
+        test_idx = info.pop("test_idx")
+        probs = info.pop("probs", None)
+        if probs is None or not test_idx:
+            continue
+        truth = [label_of[all_paths[i]] for i in test_idx]
+        predicted = np.argmax(probs, axis=1).tolist()
+        info["accuracy"] = round(float(np.mean(np.array(truth) == np.array(predicted))), 4)
+        y_true.extend(truth)
+        y_pred.extend(predicted)
+
+    accuracies = [info["accuracy"] for info in fold_info if "accuracy" in info]
+    wall = time.perf_counter() - wall_start
+    return {
+        "mode": "kfold",
+        "config": dict(config, folds=folds, workers=workers, dataset_dir=dataset_dir),
+        "class_names": class_names,
+        "metrics": classification_metrics(y_true, y_pred, class_names),
+        "fold_accuracy_mean": round(float(np.mean(accuracies)), 4) if accuracies else None,
+        "fold_accuracy_std": round(float(np.std(accuracies)), 4) if accuracies else None,
+        "folds": fold_info,
+        "timing": {"wall_seconds": round(wall, 2), "extract_features_seconds": round(extract_seconds, 2),
+                   "folds_seconds": round(folds_seconds, 2),
+                   "images_per_second": round(len(y_true) / wall, 1) if wall > 0 else None},
+    }
+
+# Fungsi evaluasi satu file model (Keras .h5 atau TFLite) pada gambar asli (tanpa
+# augmentasi) dari subset dataset; inferensi per batch dengan decode paralel di thread pool
+def evaluate_model(model_path, dataset_dir, subset="validation", batch_size=32, workers=4, use_cache=True):
+    from app.inference import TFLiteModel, input_size, load_input, load_model, predict_batch
+    from app.prediction_cache import PredictionCache, content_hash
+    from model.data_pipeline import list_image_files
+
+    wall_start = time.perf_counter()
+    groups, class_names = collect_groups(dataset_dir)
+    originals = sorted(g["original"] for g in groups.values())
+    if subset != "all":
+        chosen = set(list_image_files(dataset_dir, subset)[0])
+        originals = [p for p in originals if p in chosen]
+    label_of = {g["original"]: g["label"] for g in groups.values()}
+
+    model = TFLiteModel(model_path) if model_path.endswith(".tflite") else load_model(model_path)
+    num_classes = model.output_shape[-1] if hasattr(model, "output_shape") else None
+    if num_classes is not None and num_classes != len(class_names):
+        raise ValueError(f"Model punya {num_classes} kelas, dataset {len(class_names)} kelas")
+    size = input_size(model)
+    cache = PredictionCache(model_path) if use_cache else None
+
+    def load(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = content_hash(data)
+        cached = cache.get(digest) if cache is not None else None
+        return digest, cached, None if cached is not None else load_input(io.BytesIO(data), size)
+
+    y_true, y_pred = [], []
+    predict_seconds = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(originals), batch_size):
+            batch = originals[start:start + batch_size]
+            loaded = list(executor.map(load, batch))
+            todo = [i for i, (_, cached, _) in enumerate(loaded) if cached is None]
+            probs = [cached for _, cached, _ in loaded]
+            if todo:
+                t = time.perf_counter()
+                predictions = predict_batch(model, [loaded[i][2] for i in todo])
+                predict_seconds += time.perf_counter() - t
+                for i, p in zip(todo, predictions):
+                    probs[i] = p
+                    if cache is not None:
+                        cache.put(loaded[i][0], p)
+            y_true.extend(label_of[p] for p in batch)
+            y_pred.extend(int(np.argmax(p)) for p in probs)
+
+    wall = time.perf_counter() - wall_start
+    return {
+        "mode": "model",
+        "config": {"model": model_path, "dataset_dir": dataset_dir, "subset": subset, "batch_size": batch_size},
+        "class_names": class_names,
+        "metrics": classification_metrics(y_true, y_pred, class_names),
+        "cache": cache.stats() if cache is not None else None,
+        "timing": {"wall_seconds": round(wall, 2), "predict_seconds": round(predict_seconds, 2),
+                   "images_per_second": round(len(y_true) / wall, 1) if wall > 0 else None},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluasi model: stratified k-fold atau file model yang ada")
+    parser.add_argument("--dataset-dir", default=DATASET_DIR, help="Folder dataset hasil preprocessing")
+    parser.add_argument("--model", help="Evaluasi file model ini (.h5/.tflite) alih-alih k-fold")
+    parser.add_argument("--subset", choices=["validation", "training", "all"], default="validation",
+                        help="Subset dataset untuk mode --model")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Proses paralel untuk fold (mode k-fold) atau thread decode (mode --model)")
+    parser.add_argument("--epochs", type=int, default=10, help="Epoch training head per fold")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--variants", type=int, default=2, help="Varian augmentasi fitur per gambar")
+    parser.add_argument("--profile", default=None, help="Profil backbone (lihat model/profiles.py)")
+    parser.add_argument("--weights", default="imagenet",
+                        help="Bobot awal backbone ('imagenet', atau 'none' untuk bobot acak tanpa unduhan)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="Jangan pakai cache prediksi")
+    parser.add_argument("--output", default=REPORT_PATH, help="File laporan JSON")
+    args = parser.parse_args()
+
+    if args.model:
+        report = evaluate_model(args.model, args.dataset_dir, args.subset, args.batch_size * 2,
+                                args.workers, not args.no_cache)
+    else:
+        report = evaluate_kfold(args.dataset_dir, args.folds, args.workers, args.epochs, args.batch_size,
+                                args.learning_rate, args.variants, args.profile,
+                                None if args.weights.lower() == "none" else args.weights, args.seed,
+                                None if args.no_cache else EvaluationCache())
+        for info in report["folds"]:
+            status = "cache" if info["cached"] else f"{info.get('train_seconds', 0):.1f} dtk latih"
+            print(f"Fold {info['fold']}: akurasi {info.get('accuracy')} "
+                  f"({info['test_images']} gambar uji, {status})")
+
+    print_metrics(report["metrics"], report["class_names"])
+    timing = report["timing"]
+    print(f"\nWaktu total {timing['wall_seconds']} detik, {timing['images_per_second']} gambar/detik")
+    report["created_at"] = datetime.now().isoformat(timespec="seconds")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Laporan disimpan ke {args.output}")
@@ -1,33 +1,34 @@
 # === Testing dan Prediksi Gambar Baru ===
 # Deskripsi: Uji gambar baru dengan model hasil training dan tampilkan hasil klasifikasi
 
-import tensorflow as tf
 import numpy as np
-from tensorflow.keras.preprocessing import image
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import glob
+import json
+import csv
+import io
+import os
 import sys
+import time
 
-# Memuat model CNN yang sudah dilatih sebelumnya
-model = tf.keras.models.load_model("model/model_palmistry.h5")
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.inference import BACKENDS, input_size, load_backend, load_input, predict_batch, predict_path, class_names
+from app.prediction_cache import PredictionCache, content_hash
+from utils import tracing
 
-# Daftar nama kelas yang sesuai urutan output model
-class_names = ['auditori', 'kinestetik', 'visual']
+# Model CNN yang sudah dilatih sebelumnya; dimuat di bagian utama sesuai --backend
+model = None
+# Cache prediksi (hash gambar + sidik jari model); None jika dimatikan dengan --no-cache
+cache = None
 
 # Fungsi untuk memprediksi gambar tunggal
 def predict_image(img_path):
     try:
-        # Membaca gambar dan mengubah ukurannya ke 224x224 piksel (ukuran input model)
-        img = image.load_img(img_path, target_size=(224, 224))
-        # Mengubah gambar menjadi array dan melakukan normalisasi (skala 0-1)
-        img_array = image.img_to_array(img) / 255.0
-        # Menambahkan dimensi batch (karena model mengharapkan input dalam bentuk batch)
-        img_array = np.expand_dims(img_array, axis=0)
-        
-        # Melakukan prediksi
-        predictions = model.predict(img_array)
-        
-        # Menentukan kelas dengan probabilitas tertinggi
-        predicted_class = class_names[np.argmax(predictions)]
-        confidence = np.max(predictions) * 100
+        # Membaca gambar (seukuran input model, skala 0-1), melakukan prediksi (atau mengambil dari cache),
+        # dan menentukan kelas dengan probabilitas tertinggi
+        predicted_class, confidence = predict_path(model, img_path, cache)
         
         # Menampilkan hasil prediksi
         print(f"Gambar: {img_path}\nPrediksi: {predicted_class.upper()} ({confidence:.2f}%)")
@@ -36,11 +37,149 @@ def predict_image(img_path):
         # Menangani kesalahan jika ada masalah saat memproses gambar
         print(f"Terjadi kesalahan: {e}")
 
+# Ekstensi file gambar yang dicari saat input berupa folder
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+# Fungsi untuk mengumpulkan path gambar dari folder, pola glob, file, atau daftar file
+def collect_paths(inputs, file_list=None):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in sorted(os.walk(item), key=lambda x: x[0]):
+                paths.extend(os.path.join(root, f) for f in sorted(files)
+                             if f.lower().endswith(IMAGE_EXTENSIONS))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+    if file_list:
+        with open(file_list, "r", encoding="utf-8") as f:
+            paths.extend(line.strip() for line in f if line.strip())
+    return paths
+
+# Fungsi untuk decode gambar satu batch di thread pool; error disimpan per gambar.
+# Setiap hasil berupa (array, error, hash isi, probabilitas dari cache)
+def decode_batch(executor, batch_paths):
+    def safe_load(path):
+        try:
+            with tracing.span("read_file"):
+                with open(path, "rb") as f:
+                    data = f.read()
+            digest = content_hash(data) if cache is not None else None
+            probs = cache.get(digest) if cache is not None else None
+            if probs is not None:
+                tracing.counter("cache_hits")
+                return None, None, digest, probs
+            if cache is not None:
+                tracing.counter("cache_misses")
+            return load_input(io.BytesIO(data), input_size(model)), None, digest, None
+        except Exception as e:
+            return None, str(e), None, None
+    return executor.map(safe_load, batch_paths)
+
+# Kelas penulis hasil: CSV atau JSONL (berdasarkan ekstensi), atau CSV ke stdout
+class ResultWriter:
+    def __init__(self, output):
+        self.file = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+        self.jsonl = bool(output) and output.lower().endswith((".jsonl", ".json"))
+        if not self.jsonl:
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(["path", "prediksi", "kepercayaan"] + class_names + ["error"])
+
+    def write(self, path, probs=None, error=None):
+        if self.jsonl:
+            row = {"path": path, "error": error}
+            if probs is not None:
+                row.update(prediksi=class_names[int(np.argmax(probs))],
+                           kepercayaan=round(float(np.max(probs)) * 100, 2),
+                           probabilitas=dict(zip(class_names, (round(float(p), 6) for p in probs))))
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        elif probs is not None:
+            self.csv.writerow([path, class_names[int(np.argmax(probs))], f"{np.max(probs) * 100:.2f}"]
+                              + [f"{p:.6f}" for p in probs] + [""])
+        else:
+            self.csv.writerow([path, "", ""] + [""] * len(class_names) + [error])
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+# Fungsi prediksi massal: decode paralel di thread pool, inferensi per batch,
+# hasil langsung ditulis (streaming) ke CSV/JSONL
+def predict_bulk(paths, batch_size=32, workers=4, output=None):
+    writer = ResultWriter(output)
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    done = failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Batch berikutnya sudah di-decode selagi batch sekarang diprediksi
+        pending = decode_batch(executor, batches[0]) if batches else None
+        for i, batch_paths in enumerate(batches):
+            with tracing.span("wait_decode"):
+                decoded = list(pending)
+            pending = decode_batch(executor, batches[i + 1]) if i + 1 < len(batches) else None
+
+            # Hasil ditulis sesuai urutan input: (probabilitas, error) per gambar
+            rows = [(cached, error) for _, error, _, cached in decoded]
+            ok = [(j, arr, digest) for j, (arr, _, digest, _) in enumerate(decoded) if arr is not None]
+            if ok:
+                predictions = predict_batch(model, [arr for _, arr, _ in ok])
+                for (j, _, digest), probs in zip(ok, predictions):
+                    rows[j] = (probs, None)
+                    if cache is not None:
+                        cache.put(digest, probs)
+            with tracing.span("write_results"):
+                for path, (probs, error) in zip(batch_paths, rows):
+                    if error is not None:
+                        writer.write(path, error=error)
+                        failed += 1
+                    else:
+                        writer.write(path, np.asarray(probs))
+                        done += 1
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"{done} gambar diprediksi, {failed} gagal, {elapsed:.2f} detik ({rate:.1f} gambar/detik)",
+          file=sys.stderr)
+    if cache is not None:
+        print(f"Cache prediksi: {cache.stats()}", file=sys.stderr)
+
 # Fungsi utama saat file dijalankan langsung dari terminal
 if __name__ == "__main__":
-    # Mengecek apakah path gambar diberikan sebagai argumen
-    if len(sys.argv) != 2:
-        print("Usage: python testing/test_model.py <path_ke_gambar>")
-    else:
+    parser = argparse.ArgumentParser(
+        description="Prediksi gaya belajar dari gambar telapak tangan",
+        usage="python testing/test_model.py <path_ke_gambar> | <folder/glob ...> [opsi]")
+    parser.add_argument("inputs", nargs="*", help="File gambar, folder, atau pola glob")
+    parser.add_argument("--file-list", help="File teks berisi satu path gambar per baris")
+    parser.add_argument("--batch-size", type=int, default=32, help="Ukuran batch inferensi")
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah thread decode gambar")
+    parser.add_argument("--output", help="File hasil (.csv atau .jsonl); default CSV ke stdout")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=os.environ.get("VAK_BACKEND", "keras"),
+                        help="Backend inferensi (model Keras atau TFLite hasil ekspor)")
+    parser.add_argument("--no-cache", action="store_true", help="Jangan pakai cache prediksi")
+    args = parser.parse_args()
+
+    # Argumen dicek dulu agar kesalahan pemakaian tidak menunggu model dimuat
+    if not args.inputs and not args.file_list:
+        parser.print_usage()
+        sys.exit(0)
+    if args.file_list and not os.path.isfile(args.file_list):
+        parser.error(f"file daftar tidak ditemukan: {args.file_list}")
+    single = (len(args.inputs) == 1 and not args.file_list and not args.output
+              and os.path.isfile(args.inputs[0]))
+    paths = None if single else collect_paths(args.inputs, args.file_list)
+    if paths is not None and not paths:
+        parser.error("tidak ada gambar yang cocok dengan input")
+
+    # Memuat model CNN yang sudah dilatih sebelumnya
+    with tracing.span("load_model", backend=args.backend):
+        model = load_backend(args.backend)
+    if not args.no_cache:
+        cache = PredictionCache(BACKENDS[args.backend])
+
+    if single:
         # Memanggil fungsi prediksi dengan path gambar dari argumen
-        predict_image(sys.argv[1])
+        predict_image(args.inputs[0])
+    else:
+        predict_bulk(paths, args.batch_size, args.workers, args.output)
@@ -0,0 +1,32 @@
+# === Fixture Bersama untuk Pengujian ===
+# Deskripsi: Membuat folder dataset berisi JPEG kecil di direktori sementara pytest.
+
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+# Menambahkan root proyek ke sys.path agar modul antar-folder dapat diimpor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fungsi untuk menulis satu JPEG kecil berisi pola acak (seed menentukan isinya)
+def write_jpeg(path, seed=0, size=96):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+# Fixture untuk membuat dataset {label: jumlah gambar} di bawah tmp_path/<nama>
+@pytest.fixture
+def make_dataset(tmp_path):
+    def make(counts, name="DATASET"):
+        root = tmp_path / name
+        seed = 0
+        for label, count in counts.items():
+            for i in range(count):
+                write_jpeg(root / label / f"img_{i:02d}.jpg", seed=seed)
+                seed += 1
+        return str(root)
+    return make
@@ -0,0 +1,68 @@
+# === Pengujian Dataset Ringkas ===
+# Deskripsi: Shard ringkas hanya dipakai training selama sidik jarinya cocok dengan
+# manifest folder gambar; preprocessing berikutnya tanpa --format both membuatnya usang.
+
+import os
+import numpy as np
+
+from conftest import write_jpeg
+from model.data_pipeline import open_current_compact
+from preprocessing.compact_dataset import CompactWriter, open_compact_dataset
+from preprocessing.preprocess import process_folder
+
+SIZE = 32
+
+# Fungsi untuk menjalankan preprocessing serial dengan dataset ringkas kecil
+def run(dataset, tmp_path, fmt):
+    return process_folder(dataset, str(tmp_path / "processed"), workers=1,
+                          params={"format": fmt, "compact_size": SIZE},
+                          compact_dir=str(tmp_path / "compact"))
+
+# Fungsi untuk membuka dataset ringkas yang masih sesuai dengan folder hasil preprocessing
+def current(tmp_path):
+    return open_current_compact(str(tmp_path / "compact"), str(tmp_path / "processed"), (SIZE, SIZE))
+
+def test_writer_round_trip(tmp_path):
+    path = str(tmp_path / "compact")
+    writer = CompactWriter(path, (SIZE, SIZE), ["auditori", "visual"], shard_size=2, source="abc")
+    arrays = [np.full((SIZE, SIZE, 3), i, dtype=np.uint8) for i in range(3)]
+    for i, array in enumerate(arrays):
+        writer.add(f"visual/{i}.png", "visual", array, source_hash=str(i))
+    writer.close()
+
+    compact = open_compact_dataset(path)
+    assert (len(compact), len(compact.shards), compact.source) == (3, 2, "abc")
+    assert list(compact.labels) == [1, 1, 1]
+    assert np.array_equal(compact.take([2, 0]), np.stack([arrays[2], arrays[0]]))
+    assert compact.lookup("visual/1.png", "1") is not None
+    assert compact.lookup("visual/1.png", "lain") is None
+
+def test_compact_matches_manifest(make_dataset, tmp_path):
+    dataset = make_dataset({"Auditori": 1, "Visual": 2})
+    run(dataset, tmp_path, "both")
+    compact = current(tmp_path)
+    assert compact is not None and len(compact) == 9
+    assert sorted(compact.class_names) == ["Auditori", "Visual"]
+
+    # Run ulang tanpa perubahan memakai kembali shard yang sama
+    assert run(dataset, tmp_path, "both")["processed"] == 0
+    assert current(tmp_path) is not None
+
+def test_png_run_makes_compact_stale(make_dataset, tmp_path):
+    dataset = make_dataset({"Visual": 2})
+    run(dataset, tmp_path, "both")
+    write_jpeg(os.path.join(dataset, "Visual", "img_02.jpg"), seed=100)
+    run(dataset, tmp_path, "png")
+
+    assert open_compact_dataset(str(tmp_path / "compact")) is not None
+    assert current(tmp_path) is None
+    assert os.path.exists(tmp_path / "processed" / "Visual" / "img_02_zoomed.png")
+
+    # Format both berikutnya menulis ulang shard dari awal dan kembali sesuai
+    assert run(dataset, tmp_path, "both")["processed"] == 3
+    assert len(current(tmp_path)) == 9
+
+def test_size_mismatch_is_not_used(make_dataset, tmp_path):
+    run(make_dataset({"Visual": 1}), tmp_path, "both")
+    assert open_current_compact(str(tmp_path / "compact"), str(tmp_path / "processed"),
+                                (SIZE * 2, SIZE * 2)) is None
@@ -0,0 +1,58 @@
+# === Pengujian Pipeline tf.data ===
+# Deskripsi: Pembagian training/validasi, urutan kelas, dan piksel input harus sama
+# dengan ImageDataGenerator.flow_from_directory; subset kosong tidak boleh gagal.
+
+import os
+import numpy as np
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from conftest import write_jpeg
+from model.data_pipeline import VALIDATION_SPLIT, dataset_from_directory, list_image_files
+
+SIZE = (32, 32)
+
+# Fungsi untuk membuat generator flow_from_directory lama tanpa augmentasi dan tanpa acak
+def legacy_flow(dataset, subset):
+    datagen = ImageDataGenerator(rescale=1./255, validation_split=VALIDATION_SPLIT)
+    return datagen.flow_from_directory(dataset, target_size=SIZE, batch_size=4,
+                                       class_mode='categorical', subset=subset, shuffle=False)
+
+def test_split_matches_flow_from_directory(make_dataset):
+    dataset = make_dataset({"Visual": 7, "Auditori": 3, "Kinestetik": 1})
+    write_jpeg(os.path.join(dataset, "Visual", "sub", "img_99.jpg"), seed=99)
+    with open(os.path.join(dataset, "Visual", "catatan.txt"), "w") as f:
+        f.write("bukan gambar")
+
+    for subset in ("training", "validation"):
+        paths, labels, class_names = list_image_files(dataset, subset)
+        legacy = legacy_flow(dataset, subset)
+        assert class_names == sorted(legacy.class_indices, key=legacy.class_indices.get)
+        assert [os.path.normpath(p) for p in paths] == [os.path.normpath(p) for p in legacy.filepaths]
+        assert labels == list(legacy.classes)
+
+def test_validation_pixels_match_flow_from_directory(make_dataset):
+    dataset = make_dataset({"Visual": 5, "Auditori": 5})
+    write_jpeg(os.path.join(dataset, "Auditori", "a_hasil.png"), seed=50)  # Validasi Auditori: PNG
+    ds, _, count = dataset_from_directory(dataset, 'validation', batch_size=4, image_size=SIZE,
+                                          cache=False)
+    x, y = (np.concatenate(parts) for parts in zip(*[(x.numpy(), y.numpy()) for x, y in ds]))
+    legacy = legacy_flow(dataset, 'validation')
+    lx, ly = (np.concatenate(parts) for parts in zip(*[legacy[i] for i in range(len(legacy))]))
+    assert count == len(x) == 2
+    np.testing.assert_allclose(x, lx, atol=1e-6)
+    np.testing.assert_array_equal(y, ly)
+
+def test_training_batches_have_model_shape(make_dataset):
+    dataset = make_dataset({"Visual": 5, "Auditori": 5})
+    ds, class_names, count = dataset_from_directory(dataset, 'training', batch_size=4, image_size=SIZE,
+                                                    cache=False)
+    x, y = next(iter(ds))
+    assert count == 8 and class_names == ["Auditori", "Visual"]
+    assert x.shape == (4,) + SIZE + (3,) and y.shape == (4, 2)
+    assert 0.0 <= float(np.min(x)) and float(np.max(x)) <= 1.0
+
+def test_empty_validation_subset(make_dataset):
+    dataset = make_dataset({"Visual": 2, "Auditori": 2})
+    ds, _, count = dataset_from_directory(dataset, 'validation', image_size=SIZE, cache=False)
+    assert count == 0
+    assert list(ds) == []
@@ -0,0 +1,67 @@
+# === Pengujian Manifest Preprocessing ===
+# Deskripsi: Gambar yang tidak berubah dilewati, gambar baru/berubah diproses, output
+# gambar yang dihapus ikut dihapus, dan perubahan parameter/versi memproses ulang semua.
+
+import os
+import json
+
+from conftest import write_jpeg
+from preprocessing.preprocess import MANIFEST_NAME, process_folder
+
+# Fungsi untuk menjalankan preprocessing serial ke tmp_path/processed
+def run(input_folder, tmp_path, **kwargs):
+    return process_folder(input_folder, str(tmp_path / "processed"), workers=1,
+                          compact_dir=str(tmp_path / "compact"), **kwargs)
+
+def test_second_run_reuses_manifest(make_dataset, tmp_path):
+    dataset = make_dataset({"Auditori": 2, "Visual": 1})
+    first = run(dataset, tmp_path)
+    assert (first["processed"], first["skipped"]) == (3, 0)
+    assert sorted(os.listdir(tmp_path / "processed" / "Visual")) == [
+        "img_00.jpg", "img_00_rotated.png", "img_00_zoomed.png"]
+
+    second = run(dataset, tmp_path)
+    assert (second["processed"], second["skipped"], second["removed"]) == (0, 3, 0)
+
+def test_touched_file_with_same_content_is_skipped(make_dataset, tmp_path):
+    dataset = make_dataset({"Visual": 2})
+    run(dataset, tmp_path)
+    path = os.path.join(dataset, "Visual", "img_00.jpg")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    result = run(dataset, tmp_path)
+    assert (result["processed"], result["skipped"]) == (0, 2)
+
+def test_added_changed_and_removed_sources(make_dataset, tmp_path):
+    dataset = make_dataset({"Auditori": 2, "Visual": 2})
+    run(dataset, tmp_path)
+    write_jpeg(os.path.join(dataset, "Visual", "img_02.jpg"), seed=100)
+    write_jpeg(os.path.join(dataset, "Auditori", "img_00.jpg"), seed=101)
+    os.remove(os.path.join(dataset, "Auditori", "img_01.jpg"))
+
+    result = run(dataset, tmp_path)
+    assert (result["total"], result["processed"], result["skipped"], result["removed"]) == (4, 2, 2, 3)
+    assert not os.path.exists(tmp_path / "processed" / "Auditori" / "img_01_rotated.png")
+    with open(tmp_path / "processed" / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert sorted(manifest["files"]) == ["Auditori/img_00.jpg", "Visual/img_00.jpg",
+                                         "Visual/img_01.jpg", "Visual/img_02.jpg"]
+
+def test_params_or_version_change_reprocesses_everything(make_dataset, tmp_path):
+    dataset = make_dataset({"Visual": 2})
+    run(dataset, tmp_path)
+    assert run(dataset, tmp_path, params={"low": 30})["processed"] == 2
+
+    manifest_path = tmp_path / "processed" / MANIFEST_NAME
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["version"] = 1
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    assert run(dataset, tmp_path, params={"low": 30})["processed"] == 2
+
+def test_full_reprocesses_everything(make_dataset, tmp_path):
+    dataset = make_dataset({"Visual": 2})
+    run(dataset, tmp_path)
+    assert run(dataset, tmp_path, full=True)["processed"] == 2
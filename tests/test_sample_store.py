@@ -0,0 +1,56 @@
+# === Pengujian Penyimpanan Sampel Berbasis Hash ===
+# Deskripsi: Isi yang sama disimpan satu kali, file di dalam DATASET boleh di-hardlink,
+# file dari luar DATASET selalu disalin agar DATASET tidak berbagi inode dengan sumbernya.
+
+import os
+import pytest
+
+from conftest import write_jpeg
+from app import sample_store
+from app.sample_store import SampleStore, sample_hash
+
+# Reflink dimatikan agar metode yang diuji hanya hardlink atau salin biasa
+@pytest.fixture(autouse=True)
+def no_reflink(monkeypatch):
+    monkeypatch.setattr(sample_store, "fcntl", None)
+
+def test_existing_dataset_is_indexed_once(make_dataset):
+    dataset = make_dataset({"Visual": 2, "Auditori": 1})
+    store = SampleStore(dataset)
+    assert store.counts() == {"auditori": 1, "visual": 2}
+    path = os.path.join(dataset, "Visual", "img_00.jpg")
+    assert store.hashes()[os.path.normpath(path)] == sample_hash(path)
+
+def test_same_content_is_stored_once(make_dataset, tmp_path):
+    store = SampleStore(make_dataset({}))
+    upload = write_jpeg(tmp_path / "upload" / "foto.jpg", seed=7)
+    copy = write_jpeg(tmp_path / "upload" / "foto_lagi.jpg", seed=7)
+
+    target, new = store.add(upload, "visual", confidence=0.9)
+    assert new and os.path.basename(target) == sample_hash(upload) + ".jpg"
+    assert store.add(copy, "visual") == (target, False)
+    assert store.counts() == {"visual": 1}
+
+def test_removed_file_is_stored_again(make_dataset, tmp_path):
+    store = SampleStore(make_dataset({}))
+    upload = write_jpeg(tmp_path / "upload" / "foto.jpg")
+    target, _ = store.add(upload, "visual")
+    os.remove(target)
+    assert store.add(upload, "visual") == (target, True)
+    assert os.path.exists(target)
+
+def test_outside_file_is_copied(make_dataset, tmp_path):
+    store = SampleStore(make_dataset({}))
+    upload = write_jpeg(tmp_path / "upload" / "foto.jpg")
+    target, _ = store.add(upload, "visual")
+    assert not os.path.samefile(upload, target)
+    assert os.stat(upload).st_nlink == 1
+
+def test_file_inside_dataset_is_hardlinked(make_dataset):
+    dataset = make_dataset({"Visual": 1})
+    store = SampleStore(dataset)
+    inbox = write_jpeg(os.path.join(dataset, "masuk", "foto.jpg"), seed=50)
+    assert store.contains(inbox)
+
+    target, new = store.add(inbox, "auditori")
+    assert new and os.path.samefile(inbox, target)
@@ -0,0 +1,90 @@
+# === Pengujian Mode Pantau Folder ===
+# Deskripsi: File yang sudah tercatat di cursor tidak diklasifikasikan ulang setelah
+# restart, file yang ditimpa diproses lagi, dan file gagal dicoba ulang sampai
+# MAX_ATTEMPTS sebelum dicatat sebagai gagal.
+
+import os
+import time
+import numpy as np
+
+from conftest import write_jpeg
+from app.watch_folder import MAX_ATTEMPTS, BatchWorker, FolderWatcher, WatchCursor
+
+# Model palsu berukuran input kecil yang mencatat jumlah gambar yang diprediksi
+class FakeModel:
+    input_shape = (None, 32, 32, 3)
+
+    def __init__(self):
+        self.predicted = 0
+
+    def predict_on_batch(self, batch):
+        self.predicted += len(batch)
+        return np.tile(np.array([[0.1, 0.2, 0.7]], dtype=np.float32), (len(batch), 1))
+
+# Fungsi untuk memulai watcher + worker di atas cursor SQLite di tmp_path
+def start(folder, tmp_path, model):
+    watcher = FolderWatcher(folder, WatchCursor(str(tmp_path / "cursor.sqlite")), settle=0)
+    return watcher, BatchWorker(watcher, model, max_wait_ms=10)
+
+# Fungsi untuk satu putaran: dua pemindaian (file harus stabil) lalu tunggu worker selesai
+def scan_round(watcher):
+    watcher.scan()
+    watcher.scan()
+    deadline = time.time() + 10
+    while watcher.pending and time.time() < deadline:
+        time.sleep(0.01)
+    assert not watcher.pending
+
+def test_cursor_resumes_after_restart(tmp_path):
+    folder = tmp_path / "scanner"
+    for i in range(3):
+        write_jpeg(folder / f"foto_{i}.jpg", seed=i)
+    model = FakeModel()
+    watcher, worker = start(str(folder), tmp_path, model)
+    scan_round(watcher)
+    worker.stop()
+    assert (model.predicted, worker.processed, len(watcher.cursor)) == (3, 3, 3)
+
+    # Restart: hanya file baru yang diproses
+    write_jpeg(folder / "sub" / "foto_baru.jpg", seed=10)
+    model = FakeModel()
+    watcher, worker = start(str(folder), tmp_path, model)
+    scan_round(watcher)
+    scan_round(watcher)
+    worker.stop()
+    assert (model.predicted, len(watcher.cursor)) == (1, 4)
+
+def test_overwritten_file_is_processed_again(tmp_path):
+    folder = tmp_path / "scanner"
+    path = write_jpeg(folder / "foto.jpg", seed=1)
+    model = FakeModel()
+    watcher, worker = start(str(folder), tmp_path, model)
+    scan_round(watcher)
+    old_mtime_ns = os.stat(path).st_mtime_ns
+    write_jpeg(path, seed=2)
+    os.utime(path, ns=(old_mtime_ns - 10 ** 9, old_mtime_ns - 10 ** 9))
+    scan_round(watcher)
+    worker.stop()
+    assert (model.predicted, len(watcher.cursor)) == (2, 1)
+
+def test_failed_file_is_retried_then_marked(tmp_path):
+    folder = tmp_path / "scanner"
+    write_jpeg(folder / "bagus.jpg")
+    bad = folder / "rusak.jpg"
+    bad.write_bytes(b"bukan gambar")
+    model = FakeModel()
+    watcher, worker = start(str(folder), tmp_path, model)
+
+    for attempt in range(1, MAX_ATTEMPTS):
+        scan_round(watcher)
+        assert worker.errors == attempt
+        assert not watcher.cursor.is_done(str(bad), (bad.stat().st_size, bad.stat().st_mtime_ns))
+    scan_round(watcher)
+    assert worker.errors == MAX_ATTEMPTS and not worker.attempts
+    row = watcher.cursor.db.execute("SELECT result FROM processed WHERE path = ?", (str(bad),)).fetchone()
+    assert row == (None,)
+
+    # Setelah dicatat gagal, file tidak dicoba lagi selama isinya tidak berubah
+    scan_round(watcher)
+    worker.stop()
+    assert (worker.errors, worker.processed, model.predicted) == (MAX_ATTEMPTS, 1, 1)
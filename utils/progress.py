@@ -0,0 +1,38 @@
+# === Laporan Progres untuk Proses Latar ===
+# Deskripsi: Skrip preprocessing dan training mencetak baris progres berformat tetap
+# ("@progress {json}") ke stdout jika variabel lingkungan VAK_PROGRESS=1, misalnya saat
+# dijalankan oleh job runner aplikasi (app/job_runner.py). Jika tidak aktif, report()
+# tidak melakukan apa-apa sehingga keluaran terminal biasa tidak berubah.
+
+import os
+import sys
+import json
+import time
+
+ENABLED = os.environ.get("VAK_PROGRESS", "") not in ("", "0")
+PREFIX = "@progress "
+# Jarak minimum antar laporan yang boleh dilewati (detik), agar stdout tidak banjir
+MIN_INTERVAL = 0.2
+_last = {}
+
+# Fungsi untuk melaporkan progres satu tahap (mis. stage="preprocess", done=10, total=200).
+# Dengan force=False, laporan yang terlalu rapat dengan laporan sebelumnya dilewati.
+def report(stage, force=True, **fields):
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    if not force and now - _last.get(stage, 0.0) < MIN_INTERVAL:
+        return
+    _last[stage] = now
+    # Diawali baris baru agar tidak menempel pada keluaran lain yang belum diakhiri newline
+    sys.stdout.write("\n" + PREFIX + json.dumps(dict(fields, stage=stage)) + "\n")
+    sys.stdout.flush()
+
+# Fungsi untuk membaca satu baris keluaran; dict progres, atau None jika baris biasa
+def parse(line):
+    if not line.startswith(PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PREFIX):])
+    except ValueError:
+        return None
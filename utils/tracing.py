@@ -0,0 +1,189 @@
+# === Instrumentasi Jalur Panas ===
+# Deskripsi: Mencatat span berwaktu dan counter pada preprocessing, training, testing,
+# dan aplikasi. Aktif hanya jika variabel lingkungan VAK_TRACE diisi; jika tidak,
+# span() mengembalikan context manager kosong sehingga biayanya hampir nol.
+#
+#   VAK_TRACE=1 python preprocessing/preprocess.py          -> trace_preprocess.json
+#   VAK_TRACE=hasil/trace.json python model/train_model.py   -> hasil/trace.json
+#
+# File hasil dapat dibuka di chrome://tracing atau https://ui.perfetto.dev, dan
+# ringkasan per tahap dicetak ke terminal saat program selesai.
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+_SETTING = os.environ.get("VAK_TRACE", "")
+ENABLED = _SETTING not in ("", "0")
+_NOOP = nullcontext()
+_events = []
+_counters = defaultdict(float)
+_lock = threading.Lock()
+
+# Proses anak hasil fork (worker ProcessPoolExecutor di Linux) mewarisi salinan event
+# induk; dikosongkan agar drain() di worker hanya mengirim event milik worker itu sendiri
+# (worker spawn mengimpor modul ini dari awal sehingga sudah kosong)
+def _reset_after_fork():
+    global _lock
+    _lock = threading.Lock()
+    del _events[:]
+    _counters.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Fungsi untuk waktu sekarang dalam mikrodetik (jam monotonic yang sama di semua proses)
+def now_us():
+    return time.perf_counter_ns() // 1000
+
+# Fungsi untuk mencatat span dari waktu mulai yang diukur sendiri (mis. di callback Keras)
+def record(name, start_us, **args):
+    if not ENABLED:
+        return
+    event = {"name": name, "ph": "X", "ts": start_us, "dur": now_us() - start_us,
+             "pid": os.getpid(), "tid": threading.get_ident()}
+    if args:
+        event["args"] = args
+    with _lock:
+        _events.append(event)
+
+@contextmanager
+def _span(name, args):
+    start = now_us()
+    try:
+        yield
+    finally:
+        record(name, start, **(args or {}))
+
+# Fungsi untuk mengukur durasi satu blok kode: `with span("canny"): ...`
+def span(name, **args):
+    if not ENABLED:
+        return _NOOP
+    return _span(name, args)
+
+# Dekorator untuk mengukur setiap panggilan fungsi sebagai span
+def traced(name):
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        def wrapper(*args, **kwargs):
+            with _span(name, None):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        return wrapper
+    return decorator
+
+# Fungsi untuk menambah counter (mis. jumlah gambar, cache hit)
+def counter(name, value=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += value
+        _events.append({"name": name, "ph": "C", "ts": now_us(), "pid": os.getpid(),
+                        "args": {name: _counters[name]}})
+
+# Fungsi untuk mencatat nilai sesaat (gauge), mis. kedalaman antrean; tidak dijumlahkan
+def gauge(name, value):
+    if not ENABLED:
+        return
+    with _lock:
+        _events.append({"name": name, "ph": "C", "cat": "gauge", "ts": now_us(), "pid": os.getpid(),
+                        "args": {name: value}})
+
+# Fungsi untuk mengambil dan mengosongkan event proses ini (dipakai worker
+# ProcessPoolExecutor untuk mengirim event ke proses utama)
+def drain():
+    if not ENABLED:
+        return []
+    with _lock:
+        events = list(_events)
+        del _events[:]
+    return events
+
+# Fungsi untuk menggabungkan event dari proses lain
+def add_events(events):
+    if events:
+        with _lock:
+            _events.extend(events)
+
+# Fungsi untuk menyimpan event dalam format Chrome trace / Perfetto JSON
+def export(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        with _lock:
+            events = list(_events)
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+# Fungsi untuk membuat ringkasan per tahap: jumlah, total, rata-rata, p50/p99, dan persen
+# terhadap waktu dinding (wall clock) seluruh trace. Span bisa bertumpuk (nested) dan
+# worker berjalan paralel, sehingga jumlah persen tidak harus 100.
+def summary():
+    durations = defaultdict(list)
+    with _lock:
+        events = [event for event in _events if event["ph"] == "X"]
+    for event in events:
+        durations[event["name"]].append(event["dur"] / 1000)
+    if events:
+        wall = (max(e["ts"] + e["dur"] for e in events) - min(e["ts"] for e in events)) / 1000
+    grand_total = (wall if events else 0) or 1.0
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "total_ms": sum(values),
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": values[len(values) // 2],
+            "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))],
+            "percent": sum(values) / grand_total * 100,
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+# Fungsi untuk mencetak ringkasan sebagai tabel
+def print_summary():
+    rows = summary()
+    print(f"\n{'Tahap':<28} {'Jumlah':>7} {'Total ms':>11} {'Rata2 ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'% wall':>7}")
+    for row in rows:
+        print(f"{row['name']:<28} {row['count']:>7} {row['total_ms']:>11.1f} {row['mean_ms']:>9.2f} "
+              f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['percent']:>6.1f}%")
+    # Nilai counter bersifat kumulatif per proses; total = jumlah nilai akhir setiap proses.
+    # Gauge dilaporkan sebagai nilai terakhir dan maksimum.
+    per_process = defaultdict(dict)
+    gauges = {}
+    for event in list(_events):
+        if event["ph"] != "C":
+            continue
+        value = event["args"][event["name"]]
+        if event.get("cat") == "gauge":
+            last, peak = gauges.get(event["name"], (value, value))
+            gauges[event["name"]] = (value, max(peak, value))
+            continue
+        last = per_process[event["name"]].get(event["pid"], 0)
+        per_process[event["name"]][event["pid"]] = max(last, value)
+    for name, values in sorted(per_process.items()):
+        print(f"{name:<28} {sum(values.values()):>7g}")
+    for name, (last, peak) in sorted(gauges.items()):
+        print(f"{name:<28} {last:>7g} (maks {peak:g})")
+
+# Fungsi yang dipanggil saat program selesai: simpan trace dan cetak ringkasan
+def _finish():
+    if not _events:
+        return
+    if _SETTING.endswith(".json"):
+        path = _SETTING
+    else:
+        script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        path = f"trace_{script}.json"
+    export(path)
+    print_summary()
+    print(f"Trace disimpan ke {path} (buka di chrome://tracing atau ui.perfetto.dev)")
+
+if ENABLED:
+    atexit.register(_finish)